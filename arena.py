@@ -0,0 +1,428 @@
+"""
+多数のゲームを1プロセスで同時に動かすサーバー（ボット対戦・大会用）
+
+各セッションは画面なしの GameEngine で、30Hz のティックで進めます。
+すべてのセッションを毎ティック進めるのではなく、
+- 入力が届いたセッション
+- スポーン・ボーナス終了などのイベントが起きるティックになったセッション
+だけを GameEngine.advance() で追いつかせてから処理します。
+何も起きないセッションにはティックごとの処理がないので、
+同時接続数が増えても1ティックの処理は入力とイベントの数にしか比例しません。
+
+通信はローカルのソケットで、1行1コマンドのテキストを受け取り、
+状態が変わったときだけ変化分を1行の JSON で送ります。
+
+受信（クライアント -> サーバー）:
+    click <x> <y>      画面座標をクリック
+    key return|space   キー入力
+    seed <n>           タイトル画面でシードを指定し直す
+    quit               切断
+
+送信（サーバー -> クライアント）:
+    {"id":1,"seed":..,"cols":8,"rows":4,"cw":32,"ch":53}   接続時に1度だけ
+    {"t":フレーム,"state":..,"score":..,"cells":[[マス,カードID],..],"sel":[マス,..],
+     "bonus":倍率,"combo":メッセージ}   変化した項目だけ（カード ID -1 は空き）
+
+使い方:
+    python arena.py serve --port 8765
+    python arena.py bots --count 200 --seconds 10 --port 8765
+    python arena.py bench --sessions 5000 --ticks 300
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import random
+import time
+
+from clock import LOGIC_FPS, FixedClock
+from engine import GameEngine, KEY_RETURN, KEY_SPACE
+from rules import load_rules
+
+# 送信待ちがこれを超えたクライアントは切断する（読まないクライアント対策）
+MAX_WRITE_BUFFER = 256 * 1024
+
+KEY_NAMES = {"return": KEY_RETURN, "space": KEY_SPACE}
+
+
+class Session:
+    """1つのゲーム（1接続）"""
+    __slots__ = ("id", "engine", "start_tick", "send", "clicks", "keys", "sched",
+                 "closed", "sent_cells", "sent_selected", "sent_state", "sent_score",
+                 "sent_bonus", "sent_combo")
+
+    def __init__(self, session_id, engine, start_tick, send):
+        """
+        send: send(bytes) で1行をクライアントに送る関数
+        """
+        self.id = session_id
+        self.engine = engine
+        self.start_tick = start_tick  # engine.frame が 0 だったティック
+        self.send = send
+        self.clicks = []  # 次のティックで処理する入力
+        self.keys = []
+        self.sched = 0  # 予約中のイベントの番号（古い予約を見分ける）
+        self.closed = False
+        self.reset_sent()
+
+    def reset_sent(self):
+        """次の送信で全状態を送る"""
+        self.sent_cells = b""
+        self.sent_selected = -1
+        self.sent_state = None
+        self.sent_score = None
+        self.sent_bonus = None
+        self.sent_combo = None
+
+    def catch_up(self, tick):
+        """tick まで入力なしで進める"""
+        frames = tick - self.start_tick - self.engine.frame
+        if frames > 0:
+            self.engine.advance(frames)
+
+    def step(self, tick):
+        """tick の直前まで追いつかせてから、溜まった入力で1フレーム進める"""
+        self.catch_up(tick - 1)
+        clicks, keys = self.clicks, self.keys
+        self.clicks, self.keys = [], []
+        self.engine.update(clicks, keys)
+
+    def diff(self):
+        """前回送ってから変わった項目（なければ None）"""
+        engine = self.engine
+        board = engine.board
+        message = {}
+
+        cells = board.cells.tobytes()
+        if cells != self.sent_cells:
+            sent = self.sent_cells
+            if len(sent) != len(cells):
+                changed = range(len(cells))
+            else:
+                changed = [i for i in range(len(cells)) if cells[i] != sent[i]]
+            message["cells"] = [[i, board.cells[i]] for i in changed]
+            self.sent_cells = cells
+        if board.selected != self.sent_selected:
+            message["sel"] = engine.selected_cells
+            self.sent_selected = board.selected
+        if engine.game_state != self.sent_state:
+            message["state"] = self.sent_state = engine.game_state
+        if engine.score != self.sent_score:
+            message["score"] = self.sent_score = engine.score
+        if engine.bonus_multiplier != self.sent_bonus:
+            message["bonus"] = self.sent_bonus = engine.bonus_multiplier
+        combo = engine.combo_message if engine.combo_timer > 0 else ""
+        if combo != self.sent_combo:
+            message["combo"] = self.sent_combo = combo
+
+        if not message:
+            return None
+        message["t"] = engine.frame
+        return message
+
+
+class Arena:
+    def __init__(self, rules=None, seed=None, tick_rate=LOGIC_FPS):
+        """
+        rules: すべてのセッションで共有する役ルール
+        seed: セッションのシードを決める乱数のシード
+        """
+        self.rules = rules if rules is not None else load_rules()
+        self.rng = random.Random(seed)
+        self.clock = FixedClock(step=1 / tick_rate, max_steps=tick_rate)
+        self.tick = 0
+        self.sessions = {}
+        self.next_id = 1
+        self.pending = set()  # 入力が届いたセッション
+        self.events = []  # (ティック, 予約番号, セッション) のヒープ
+        self.sched_seq = 0
+        self.sent_bytes = 0
+        self.tick_ms = 0.0  # 直近のティックの処理時間
+
+    def open_session(self, send, seed=None):
+        """新しいセッションを作り、接続情報と全状態を送る"""
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        engine = GameEngine(seed=seed, effects=False, rules=self.rules)
+        session = Session(self.next_id, engine, self.tick, send)
+        self.next_id += 1
+        self.sessions[session.id] = session
+
+        self.write(session, {"id": session.id, "seed": seed,
+                             "cols": engine.board.cols, "rows": engine.board.rows,
+                             "cw": engine.card_width, "ch": engine.card_height})
+        self.publish(session)
+        return session
+
+    def close_session(self, session):
+        session.closed = True
+        self.sessions.pop(session.id, None)
+        self.pending.discard(session)
+
+    def reseed(self, session, seed):
+        """タイトル画面のセッションをシードを指定して作り直す"""
+        if session.engine.game_state != "title":
+            return
+        session.engine = GameEngine(seed=seed, effects=False, rules=self.rules)
+        session.start_tick = self.tick
+        session.sched += 1  # 予約を無効にする
+        session.reset_sent()
+        self.publish(session)
+
+    def receive(self, session, line):
+        """1行のコマンドを処理（入力は次のティックでまとめて反映）"""
+        parts = line.split()
+        if not parts:
+            return
+        command = parts[0]
+        try:
+            if command == "click" and len(parts) == 3:
+                session.clicks.append((int(parts[1]), int(parts[2])))
+            elif command == "key" and len(parts) == 2 and parts[1] in KEY_NAMES:
+                session.keys.append(KEY_NAMES[parts[1]])
+            elif command == "seed" and len(parts) == 2:
+                self.reseed(session, int(parts[1]))
+                return
+            else:
+                return
+        except ValueError:
+            return
+        self.pending.add(session)
+
+    def schedule(self, session):
+        """次にイベントが起きるティックを予約"""
+        frames = session.engine.frames_until_event()
+        self.sched_seq += 1
+        session.sched = self.sched_seq
+        if frames is not None:
+            heapq.heappush(self.events, (self.tick + frames, self.sched_seq, session))
+
+    def run_tick(self):
+        """1ティック進める"""
+        started = time.perf_counter()
+        self.tick += 1
+        tick = self.tick
+
+        # 入力のあったセッション
+        if self.pending:
+            pending = self.pending
+            self.pending = set()
+            for session in pending:
+                session.step(tick)
+                self.publish(session)
+                self.schedule(session)
+
+        # イベントが起きるセッション
+        events = self.events
+        while events and events[0][0] <= tick:
+            _, seq, session = heapq.heappop(events)
+            if seq != session.sched or session.closed:
+                continue  # 入力で先に進んだなどで古くなった予約
+            session.catch_up(tick)
+            self.publish(session)
+            self.schedule(session)
+
+        self.tick_ms = (time.perf_counter() - started) * 1000
+
+    def publish(self, session):
+        message = session.diff()
+        if message is not None:
+            self.write(session, message)
+
+    def write(self, session, message):
+        line = (json.dumps(message, separators=(",", ":"), ensure_ascii=False) + "\n").encode()
+        self.sent_bytes += len(line)
+        session.send(line)
+
+    async def run(self):
+        """実時間に合わせてティックを進め続ける"""
+        loop = asyncio.get_running_loop()
+        self.clock.time_func = loop.time
+        while True:
+            for _ in range(self.clock.tick()):
+                self.run_tick()
+            # 次のティックまで待つ
+            await asyncio.sleep((1.0 - self.clock.alpha) * self.clock.step)
+
+    async def handle_client(self, reader, writer):
+        """1接続を1セッションとして扱う"""
+        session = None
+
+        def send(line):
+            if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                writer.transport.abort()
+                if session is not None:
+                    self.close_session(session)
+                return
+            writer.write(line)
+
+        session = self.open_session(send)
+        try:
+            while not session.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                text = line.decode("utf-8", "replace")
+                if text.strip() == "quit":
+                    break
+                self.receive(session, text)
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError):
+            # 切断、または長すぎる行（読み込みの上限を超えた）。セッションを閉じる
+            pass
+        finally:
+            self.close_session(session)
+            writer.close()
+
+
+async def serve(host, port, seed=None):
+    arena = Arena(seed=seed)
+    server = await asyncio.start_server(arena.handle_client, host, port)
+    print(f"{host}:{port} で待ち受けています")
+
+    async def report():
+        while True:
+            await asyncio.sleep(5)
+            print(f"tick {arena.tick}  セッション {len(arena.sessions)}  "
+                  f"予約 {len(arena.events)}  送信 {arena.sent_bytes / 1024:.0f}KiB  "
+                  f"処理 {arena.tick_ms:.2f}ms/tick")
+
+    async with server:
+        await asyncio.gather(server.serve_forever(), arena.run(), report())
+
+
+# ----------------------------------------------------------------------
+# 動作確認用のクライアント
+
+async def run_bot(host, port, seconds, rng, stats):
+    """状態を受け取って盤面を再現し、ランダムに花札をクリックするボット"""
+    reader, writer = await asyncio.open_connection(host, port)
+    info = json.loads(await reader.readline())
+    cells = {}
+    state = "title"
+
+    async def receive():
+        nonlocal state
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            stats["messages"] += 1
+            stats["bytes"] += len(line)
+            message = json.loads(line)
+            for cell, card in message.get("cells", ()):
+                if card < 0:
+                    cells.pop(cell, None)
+                else:
+                    cells[cell] = card
+            state = message.get("state", state)
+            if "score" in message:
+                stats["scores"][info["id"]] = message["score"]
+
+    receiver = asyncio.ensure_future(receive())
+    end = time.monotonic() + seconds
+    while time.monotonic() < end and not receiver.done():
+        await asyncio.sleep(rng.uniform(0.05, 0.3))
+        if state != "playing":
+            writer.write(b"key space\n")
+        elif cells:
+            cell = rng.choice(list(cells))
+            row, col = divmod(cell, info["cols"])
+            x = col * info["cw"] + info["cw"] // 2
+            y = row * info["ch"] + info["ch"] // 2
+            writer.write(f"click {x} {y}\n".encode())
+        stats["inputs"] += 1
+    writer.write(b"quit\n")
+    receiver.cancel()
+    writer.close()
+
+
+async def run_bots(host, port, count, seconds, seed):
+    rng = random.Random(seed)
+    stats = {"messages": 0, "bytes": 0, "inputs": 0, "scores": {}}
+    await asyncio.gather(*(run_bot(host, port, seconds, random.Random(rng.getrandbits(32)), stats)
+                           for _ in range(count)))
+    print(f"ボット {count}  入力 {stats['inputs']}  受信 {stats['messages']}行 "
+          f"{stats['bytes'] / 1024:.0f}KiB  最高スコア {max(stats['scores'].values(), default=0)}")
+
+
+def bench(sessions, ticks, input_ratio, seed):
+    """ソケットなしで、多数のセッションを同じプロセスで動かしたときのティック処理時間"""
+    arena = Arena(seed=seed)
+    rng = random.Random(seed)
+    sent = [0]
+
+    def send(line):
+        sent[0] += len(line)
+
+    all_sessions = [arena.open_session(send) for _ in range(sessions)]
+
+    # 実際の接続と同じように、開始のタイミングを最初の3秒にばらけさせる
+    warmup = LOGIC_FPS * 3
+    starts = {}
+    for session in all_sessions:
+        starts.setdefault(rng.randrange(warmup), []).append(session)
+    for tick in range(warmup):
+        for session in starts.get(tick, ()):
+            arena.receive(session, "key space")
+        arena.run_tick()
+
+    times = []
+    for _ in range(ticks):
+        # 一部のセッションにだけランダムなクリックが届く
+        for session in rng.sample(all_sessions, int(sessions * input_ratio)):
+            engine = session.engine
+            if engine.game_state != "playing":
+                arena.receive(session, "key space")
+            elif engine.board:
+                x, y = engine.board.cell_position(rng.choice(list(engine.board)))
+                arena.receive(session, f"click {x + 1} {y + 1}")
+        start = time.perf_counter()
+        arena.run_tick()
+        times.append((time.perf_counter() - start) * 1000)
+
+    times.sort()
+    budget = 1000 / LOGIC_FPS
+    p99 = times[int(len(times) * 0.99)]
+    print(f"セッション {sessions}  ティック {ticks}  入力率 {input_ratio:.0%}/tick")
+    print(f"ティック処理 平均 {sum(times) / len(times):.2f}ms  p99 {p99:.2f}ms  "
+          f"最大 {times[-1]:.2f}ms  （1ティック {budget:.1f}ms）")
+    print(f"送信 {sent[0] / (warmup + ticks) / 1024:.1f}KiB/tick")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="花札ポンの多人数ゲームサーバー")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="サーバーを起動")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--seed", type=int)
+
+    p = sub.add_parser("bots", help="ランダムにクリックするボットを接続")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--count", type=int, default=100)
+    p.add_argument("--seconds", type=float, default=10)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("bench", help="ソケットなしでティック処理時間を計測")
+    p.add_argument("--sessions", type=int, default=5000)
+    p.add_argument("--ticks", type=int, default=300)
+    p.add_argument("--input-ratio", type=float, default=0.02,
+                   help="1ティックで入力が届くセッションの割合")
+    p.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.seed))
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "bots":
+        asyncio.run(run_bots(args.host, args.port, args.count, args.seconds, args.seed))
+    elif args.command == "bench":
+        bench(args.sessions, args.ticks, args.input_ratio, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+難易度調整用のモンテカルロシミュレーション
+
+決まった方針でプレイするボットに大量のゲームを遊ばせ、生存時間・スコア・
+成立した役の回数を集計します。シードを区切ってプロセスごとに割り当てるので、
+CPU コア数に比例して速くなります。
+ルールファイルや難易度の上書きを指定すれば、調整前後の比較ができます。
+
+使い方:
+    python balance.py --games 100000
+    python balance.py --games 20000 --policy greedy month --min-spawn-interval 25
+    python balance.py --rules my_rules.json --json result.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import GameEngine
+from rules import DEFAULT_RULES_PATH, RuleSet, read_rules_data
+from solver import AutoPlayer, Solver
+
+FPS = 30
+
+# 1タスクで遊ぶゲーム数（小さいほど負荷が均等になり、大きいほど通信が減る）
+CHUNK_GAMES = 200
+
+
+class RandomClicker:
+    """一定間隔で盤面の花札をランダムにクリックする（初心者の目安）"""
+    def __init__(self, seed, click_interval=15):
+        self.rng = random.Random(seed)
+        self.click_interval = click_interval
+        self.wait = 0
+
+    def idle(self, engine):
+        return False
+
+    def next_clicks(self, engine):
+        if engine.game_state != "playing" or not engine.board:
+            return []
+        if self.wait > 0:
+            self.wait -= 1
+            return []
+        self.wait = self.click_interval - 1
+        cell = self.rng.choice(list(engine.board))
+        x, y = engine.board.cell_position(cell)
+        return [(x + engine.card_width // 2, y + engine.card_height // 2)]
+
+
+def make_policy(name, rules, seed, click_interval):
+    """方針名からボットを作る"""
+    if name == "greedy":
+        # すべての役から一番価値の高いものを狙う
+        return AutoPlayer(Solver(rules), click_interval)
+    if name == "month":
+        # 特殊役以外（同じ月の3枚）だけを狙う
+        names = {yaku["name"] for yaku in rules.yaku if not yaku["special"]}
+        return AutoPlayer(Solver(rules, names=names), click_interval)
+    if name == "random":
+        return RandomClicker(seed, click_interval)
+    raise ValueError(f"未対応の方針です: {name}")
+
+
+POLICIES = ["greedy", "month", "random"]
+
+
+def play_game(engine, policy, max_frames):
+    """ゲームオーバーか max_frames に達するまで遊んで、経過フレーム数を返す"""
+    engine.start_game()
+    start = engine.frame
+    end = start + max_frames
+    while engine.game_state == "playing" and engine.frame < end:
+        clicks = policy.next_clicks(engine)
+        if clicks:
+            engine.update(clicks)
+        elif policy.idle(engine):
+            # 次の花札が出るまで入力はないので一気に進める
+            engine.advance(min(end - engine.frame,
+                               max(1, engine.spawn_interval - engine.spawn_timer)))
+        else:
+            engine.update()
+    return engine.frame - start
+
+
+def run_chunk(task):
+    """ワーカープロセスで start から count 個のシードを遊ぶ"""
+    rules_data, policy_name, start, count, max_frames, click_interval = task
+    rules = get_rules(rules_data)
+
+    frames = array("l")
+    scores = array("q")
+    yaku = Counter()
+    for seed in range(start, start + count):
+        engine = GameEngine(seed=seed, effects=False, rules=rules)
+        policy = make_policy(policy_name, rules, seed, click_interval)
+        frames.append(play_game(engine, policy, max_frames))
+        scores.append(engine.score)
+        yaku.update(engine.yaku_counts)
+    return policy_name, frames, scores, yaku
+
+
+# ワーカーごとのコンパイル済みルール（タスクごとにコンパイルし直さない）
+_worker_rules = {}
+
+
+def get_rules(rules_data):
+    key = json.dumps(rules_data, sort_keys=True)
+    if key not in _worker_rules:
+        _worker_rules[key] = RuleSet(rules_data)
+    return _worker_rules[key]
+
+
+def percentile(ordered, ratio):
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def summarize(frames, scores, yaku, max_frames):
+    """1つの方針の集計結果"""
+    games = len(frames)
+    frames = sorted(frames)
+    scores = sorted(scores)
+    return {
+        "games": games,
+        "survival_sec": {
+            "mean": sum(frames) / games / FPS,
+            "p10": percentile(frames, 0.10) / FPS,
+            "p50": percentile(frames, 0.50) / FPS,
+            "p90": percentile(frames, 0.90) / FPS,
+        },
+        "capped_ratio": sum(1 for f in frames if f >= max_frames) / games,
+        "score": {
+            "mean": sum(scores) / games,
+            "p10": percentile(scores, 0.10),
+            "p50": percentile(scores, 0.50),
+            "p90": percentile(scores, 0.90),
+            "max": scores[-1],
+        },
+        "yaku_per_game": {name or "同じ月": count / games for name, count in yaku.most_common()},
+    }
+
+
+def print_summary(results):
+    print(f"{'policy':<8} {'games':>8}  {'survival s mean/p10/p50/p90':>30}  {'capped':>6}  "
+          f"{'score mean/p10/p50/p90/max':>36}")
+    for name, result in results.items():
+        s = result["survival_sec"]
+        c = result["score"]
+        survival = f"{s['mean']:.1f}/{s['p10']:.1f}/{s['p50']:.1f}/{s['p90']:.1f}"
+        score = f"{c['mean']:.0f}/{c['p10']}/{c['p50']}/{c['p90']}/{c['max']}"
+        print(f"{name:<8} {result['games']:>8}  {survival:>30}  "
+              f"{result['capped_ratio'] * 100:>5.1f}%  {score:>36}")
+
+    print()
+    print("1ゲームあたりの役の回数")
+    names = []
+    for result in results.values():
+        for yaku_name in result["yaku_per_game"]:
+            if yaku_name not in names:
+                names.append(yaku_name)
+    print(f"{'yaku':<12}" + "".join(f"{name:>10}" for name in results))
+    for yaku_name in names:
+        row = "".join(f"{result['yaku_per_game'].get(yaku_name, 0):>10.2f}"
+                      for result in results.values())
+        print(f"{yaku_name:<12}{row}")
+
+
+def apply_overrides(rules_data, args):
+    """コマンドラインで指定した難易度で rules.json の内容を上書き"""
+    difficulty = rules_data.setdefault("difficulty", {})
+    for key in ("spawn_interval", "min_spawn_interval", "spawn_step", "max_cards",
+                "end_on_dead_board"):
+        value = getattr(args, key)
+        if value is not None:
+            difficulty[key] = value
+    return rules_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="花札ポンの難易度シミュレーション")
+    parser.add_argument("--games", type=int, default=10000, help="方針ごとのゲーム数")
+    parser.add_argument("--policy", nargs="+", choices=POLICIES, default=POLICIES,
+                        help="ボットの方針")
+    parser.add_argument("--seed", type=int, default=0, help="最初のシード")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="プロセス数")
+    parser.add_argument("--max-minutes", type=float, default=10,
+                        help="1ゲームの上限時間（分）。これを超えたら打ち切り")
+    parser.add_argument("--click-interval", type=int, default=6,
+                        help="ボットのクリック間隔（フレーム数）")
+    parser.add_argument("--rules", default=DEFAULT_RULES_PATH, help="ルールファイル")
+    parser.add_argument("--spawn-interval", type=int, help="最初のスポーン間隔（フレーム数）")
+    parser.add_argument("--min-spawn-interval", type=int, help="最短のスポーン間隔（フレーム数）")
+    parser.add_argument("--spawn-step", type=int, help="スポーンごとに短くする間隔")
+    parser.add_argument("--max-cards", type=int, help="ゲームオーバーになる枚数")
+    parser.add_argument("--end-on-dead-board", action="store_const", const=True,
+                        help="詰んだ盤面ではスポーンを待たずにゲームオーバーにする")
+    parser.add_argument("--json", help="集計結果を保存する JSON ファイル")
+    args = parser.parse_args()
+
+    rules_data = apply_overrides(read_rules_data(args.rules), args)
+    RuleSet(rules_data)  # ルールの誤りはワーカーを起動する前に報告する
+    max_frames = int(args.max_minutes * 60 * FPS)
+
+    # シードを CHUNK_GAMES ずつに区切ってタスクにする（方針が違っても同じシードを使う）
+    tasks = []
+    for policy_name in args.policy:
+        for start in range(args.seed, args.seed + args.games, CHUNK_GAMES):
+            count = min(CHUNK_GAMES, args.seed + args.games - start)
+            tasks.append((rules_data, policy_name, start, count, max_frames, args.click_interval))
+
+    frames = {name: array("l") for name in args.policy}
+    scores = {name: array("q") for name in args.policy}
+    yaku = {name: Counter() for name in args.policy}
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for policy_name, chunk_frames, chunk_scores, chunk_yaku in pool.map(run_chunk, tasks):
+            frames[policy_name].extend(chunk_frames)
+            scores[policy_name].extend(chunk_scores)
+            yaku[policy_name].update(chunk_yaku)
+    elapsed = time.perf_counter() - started
+
+    results = {name: summarize(frames[name], scores[name], yaku[name], max_frames)
+               for name in args.policy}
+    print(f"{args.games * len(args.policy)} ゲーム  {args.workers} プロセス  "
+          f"{elapsed:.1f}秒  上限 {args.max_minutes:g}分")
+    print(f"難易度: {rules_data['difficulty']}")
+    print()
+    print_summary(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"difficulty": rules_data["difficulty"], "max_frames": max_frames,
+                       "policies": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+フレーム時間のベンチマーク
+
+pyxel の代わりに描画呼び出しを数えるだけのスタブ（softpyxel.SoftPyxel の派生）を使い、HanafudaPon の
+update() / draw() を直接呼んで1フレームごとの処理時間を計測します。
+シナリオごとにパーセンタイル・スループット・メモリ確保量を表示し、
+保存しておいたベースラインより遅くなった項目を知らせます。
+
+使い方:
+    python bench.py                      # 全シナリオを実行してベースラインと比較
+    python bench.py --save-baseline      # 結果をベースラインとして保存
+    python bench.py --scenario particle_burst --frames 3000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from rules import card_id
+from softpyxel import SoftImage, SoftPyxel, install, make_app
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     "bench_baseline.json")
+
+FRAME_BUDGET_MS = 1000 / 30  # 30fps で1フレームに使える時間
+
+# ベースライン比較に使う項目
+COMPARED_METRICS = ["update_p95", "draw_p95", "frame_p99"]
+
+
+class CountingImage(SoftImage):
+    """
+    描かずに描画関数の呼び出し回数だけ数える SoftImage
+    フレーム時間にソフトウェア描画の時間を含めないためのもの
+    """
+    def __init__(self, width, height, banks, calls):
+        super().__init__(width, height, banks)
+        self.calls = calls
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def camera(self, x=0, y=0):
+        self._count("camera")
+
+    def cls(self, col):
+        self._count("cls")
+
+    def pset(self, x, y, col):
+        self._count("pset")
+
+    def line(self, x1, y1, x2, y2, col):
+        self._count("line")
+
+    def rect(self, x, y, w, h, col):
+        self._count("rect")
+
+    def rectb(self, x, y, w, h, col):
+        self._count("rectb")
+
+    def text(self, x, y, s, col, font=None):
+        self._count("text")
+
+    def blt(self, x, y, img, u, v, w, h, colkey=None, rotate=None, scale=None):
+        self._count("blt")
+
+    def set(self, x, y, data):
+        self._count("set")
+
+
+class StubPyxel(SoftPyxel):
+    """
+    描画・サウンドは呼び出し回数を数えるだけの SoftPyxel
+    入力（press()）とフレーム数は SoftPyxel のものをそのまま使います
+    """
+    def __init__(self):
+        self.calls = {}
+        super().__init__()
+
+    def new_image(self, width, height):
+        return CountingImage(width, height, self.images, self.calls)
+
+    def play(self, ch, snd, **kwargs):
+        self.calls["play"] = self.calls.get("play", 0) + 1
+
+
+def fill_board(engine, rng):
+    """空きマスをすべてランダムな花札で埋める"""
+    for cell in list(engine.board.free):
+        engine.place_card(cell, rng.randrange(engine.rules.num_cards))
+
+
+def click_cell(engine, cell):
+    """マスの中央をクリックしたときの座標"""
+    x, y = engine.board.cell_position(cell)
+    return x + engine.card_width // 2, y + engine.card_height // 2
+
+
+# シナリオ: setup(app, stub, rng) で準備し、返した step(i) を毎フレーム前に呼ぶ
+
+def scenario_title(app, stub, rng):
+    """タイトル画面のアニメーション"""
+    def step(i):
+        pass
+    return step
+
+
+def scenario_full_board(app, stub, rng):
+    """32枚で埋まった盤面で、毎フレーム選択・選択解除を繰り返す"""
+    engine = app.engine
+    engine.start_game()
+    engine.max_cards = len(engine.board.cells) + 1  # 満杯でもゲームオーバーにしない
+    fill_board(engine, rng)
+
+    def step(i):
+        if engine.board.free:
+            fill_board(engine, rng)
+        # 同じマスを2回ずつクリックして選択・解除させる
+        x, y = click_cell(engine, (i // 2) % len(engine.board.cells))
+        stub.press(stub.MOUSE_BUTTON_LEFT, x=x, y=y)
+    return step
+
+
+def make_combo(engine, rng, combo):
+    """空きマスに役の花札を置いてすべてクリックし、消去させる"""
+    free = list(engine.board.free)
+    rng.shuffle(free)
+    for cell, (month_idx, card_num) in zip(free, combo):
+        engine.place_card(cell, card_id(month_idx, card_num))
+        engine.handle_click(*click_cell(engine, cell))
+
+
+INOSHIKACHO = [(6, 0), (9, 0), (5, 0)]
+SANKO = [(0, 0), (2, 0), (7, 0)]
+
+
+def scenario_particle_burst(app, stub, rng):
+    """猪鹿蝶と三光を4フレームごとに連続で消して、パーティクルを最大限に出す"""
+    engine = app.engine
+    engine.start_game()
+
+    def step(i):
+        engine.spawn_timer = 0  # 通常のスポーンで盤面が埋まらないようにする
+        if i % 4 == 0:
+            engine.reset_selection()
+            make_combo(engine, rng, INOSHIKACHO)
+            make_combo(engine, rng, SANKO)
+    return step
+
+
+def scenario_game_over(app, stub, rng):
+    """大量のパーティクルが残った状態のゲームオーバー画面"""
+    engine = app.engine
+    engine.start_game()
+    for _ in range(10):
+        make_combo(engine, rng, INOSHIKACHO)
+    fill_board(engine, rng)
+    engine.update()  # ここでゲームオーバーになる
+    engine.pop_sounds()
+
+    def step(i):
+        if i % 60 == 0:
+            for cell in engine.board:
+                x, y = engine.board.cell_position(cell)
+                engine.create_particles(x, y, is_special=True)
+    return step
+
+
+def scenario_large_board(app, stub, rng):
+    """
+    64x64 マスの盤面を9割埋めて、スクロールしながら表示範囲のマスをクリックし続ける
+    描画・クリック判定・スポーンが盤面の大きさに比例しないことの確認用
+    """
+    engine = app.engine
+    engine.start_game()
+    free = list(engine.board.free)
+    rng.shuffle(free)
+    for cell in free[:len(free) * 9 // 10]:
+        engine.place_card(cell, rng.randrange(engine.rules.num_cards))
+    scroll_keys = [stub.KEY_RIGHT] * 6 + [stub.KEY_DOWN] * 3 + [stub.KEY_LEFT] * 6 + [stub.KEY_UP] * 3
+
+    def step(i):
+        engine.spawn_timer = engine.spawn_interval - 1  # 毎フレーム表示範囲の近くに出す
+        if i % 10 == 0:
+            stub.press(scroll_keys[i // 10 % len(scroll_keys)])
+        else:
+            # 表示範囲のマスを順にクリック（画面座標）
+            col = i % engine.view_cols
+            row = i // engine.view_cols % engine.view_rows
+            stub.press(stub.MOUSE_BUTTON_LEFT, x=col * engine.card_width + engine.card_width // 2,
+                       y=row * engine.card_height + engine.card_height // 2)
+    return step
+
+
+SCENARIOS = {
+    "title": scenario_title,
+    "full_board": scenario_full_board,
+    "particle_burst": scenario_particle_burst,
+    "game_over": scenario_game_over,
+    "large_board": scenario_large_board,
+}
+
+# HanafudaPon に渡す設定（シナリオごと）
+SCENARIO_OPTIONS = {
+    "large_board": {"board_size": (64, 64), "decks": 8},
+}
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(stub, name, frames, warmup, alloc_frames, seed):
+    """シナリオを実行して計測結果を辞書で返す"""
+    def start():
+        rng = random.Random(seed)
+        # パーティクルの数は実際のゲームと同じく処理時間で調整させる
+        app = make_app(stub, adaptive_lod=True, seed=seed, **SCENARIO_OPTIONS.get(name, {}))
+        step = SCENARIOS[name](app, stub, rng)
+        return app, step
+
+    # 処理時間
+    app, step = start()
+    update_times = []
+    draw_times = []
+    frame_times = []
+    perf_counter = time.perf_counter
+    calls_before = 0
+    for i in range(warmup + frames):
+        if i == warmup:
+            calls_before = sum(stub.calls.values())
+        step(i)
+        t0 = perf_counter()
+        app.update()
+        t1 = perf_counter()
+        app.draw()
+        t2 = perf_counter()
+        stub.end_frame()
+        if i >= warmup:
+            update_times.append((t1 - t0) * 1000)
+            draw_times.append((t2 - t1) * 1000)
+            frame_times.append((t2 - t0) * 1000)
+    draw_calls = (sum(stub.calls.values()) - calls_before) / frames
+
+    # メモリ確保量（フレーム中に増えたメモリの最大値）
+    app, step = start()
+    for i in range(warmup):
+        step(i)
+        app.update()
+        app.draw()
+        stub.end_frame()
+    tracemalloc.start()
+    alloc_total = 0
+    for i in range(warmup, warmup + alloc_frames):
+        step(i)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        app.update()
+        app.draw()
+        stub.end_frame()
+        _, peak = tracemalloc.get_traced_memory()
+        alloc_total += peak - current
+    tracemalloc.stop()
+
+    update_times.sort()
+    draw_times.sort()
+    total_time = sum(frame_times)
+    frame_times.sort()
+    return {
+        "frames": frames,
+        "update_p50": percentile(update_times, 50),
+        "update_p95": percentile(update_times, 95),
+        "update_p99": percentile(update_times, 99),
+        "draw_p50": percentile(draw_times, 50),
+        "draw_p95": percentile(draw_times, 95),
+        "draw_p99": percentile(draw_times, 99),
+        "frame_p99": percentile(frame_times, 99),
+        "frame_max": frame_times[-1],
+        "fps": frames / (total_time / 1000) if total_time else 0.0,
+        "over_budget": sum(1 for t in frame_times if t > FRAME_BUDGET_MS),
+        "draw_calls": draw_calls,
+        "alloc_kib": alloc_total / alloc_frames / 1024 if alloc_frames else 0.0,
+        "particles": len(app.engine.particles),
+    }
+
+
+def print_results(results):
+    print(f"{'scenario':<16}{'update p50/p95/p99 ms':>24}{'draw p50/p95/p99 ms':>24}"
+          f"{'p99 ms':>9}{'max ms':>9}{'fps':>10}{'over':>6}{'calls':>8}{'KiB/f':>8}")
+    for name, r in results.items():
+        update = f"{r['update_p50']:.3f}/{r['update_p95']:.3f}/{r['update_p99']:.3f}"
+        draw = f"{r['draw_p50']:.3f}/{r['draw_p95']:.3f}/{r['draw_p99']:.3f}"
+        print(f"{name:<16}{update:>24}{draw:>24}{r['frame_p99']:>9.3f}{r['frame_max']:>9.3f}"
+              f"{r['fps']:>10.0f}{r['over_budget']:>6}{r['draw_calls']:>8.1f}{r['alloc_kib']:>8.1f}")
+
+
+def compare_baseline(results, baseline, tolerance):
+    """ベースラインより tolerance 以上遅くなった項目を返す"""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric in base and r[metric] > base[metric] * (1 + tolerance):
+                regressions.append((name, metric, base[metric], r[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="花札ポンのフレーム時間ベンチマーク")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="実行するシナリオ（複数指定可、省略時はすべて）")
+    parser.add_argument("--frames", type=int, default=1000, help="計測するフレーム数")
+    parser.add_argument("--warmup", type=int, default=100, help="計測前に回すフレーム数")
+    parser.add_argument("--alloc-frames", type=int, default=200,
+                        help="メモリ確保量を計測するフレーム数")
+    parser.add_argument("--seed", type=int, default=1, help="乱数シード")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="ベースラインファイル")
+    parser.add_argument("--save-baseline", action="store_true", help="結果をベースラインとして保存")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="遅くなったと判定する割合（0.25 = 25%%）")
+    args = parser.parse_args()
+
+    stub = install(StubPyxel())
+    names = args.scenario or list(SCENARIOS)
+    results = {}
+    for name in names:
+        results[name] = run_scenario(stub, name, args.frames, args.warmup,
+                                     args.alloc_frames, args.seed)
+
+    print()
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"ベースラインを {args.baseline} に保存しました")
+        return
+
+    if not os.path.exists(args.baseline):
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print()
+        print("ベースラインより遅くなった項目:")
+        for name, metric, base, value in regressions:
+            print(f"  {name} {metric}: {base:.3f}ms -> {value:.3f}ms")
+        sys.exit(1)
+    print("ベースラインからの悪化はありません")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+花札を並べる盤面
+
+マス番号（row * cols + col）ごとにカード ID（0～47、空きは EMPTY）を持つ
+バイト配列と、空きマスのリスト、選択中マスのビットマスクで管理します。
+花札1枚あたりのオブジェクトは作らず、月や種類などの属性は
+RuleSet のカード ID ごとの表から引きます。
+空きマスの取得・クリック位置からの花札取得・削除はすべて定数時間です。
+見た目が変わったマスは dirty に記録され、描画側が必要な分だけ描き直します。
+"""
+from array import array
+
+# 空きマスのカード ID
+EMPTY = -1
+
+
+# (cols, rows, cell_width, cell_height) -> マスの左上座標の表
+_positions_cache = {}
+
+
+def cell_positions(cols, rows, cell_width, cell_height):
+    key = (cols, rows, cell_width, cell_height)
+    positions = _positions_cache.get(key)
+    if positions is None:
+        positions = _positions_cache[key] = tuple(
+            (col * cell_width, row * cell_height)
+            for row in range(rows) for col in range(cols))
+    return positions
+
+
+class Board:
+    __slots__ = ("cols", "rows", "cell_width", "cell_height", "positions",
+                 "cells", "free", "free_index", "selected",
+                 "count", "dirty", "version")
+
+    def __init__(self, cols, rows, cell_width, cell_height):
+        self.cols = cols
+        self.rows = rows
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        # マス -> 左上座標（毎回計算しないよう表にしておく。同じ大きさの盤面で共有）
+        self.positions = cell_positions(cols, rows, cell_width, cell_height)
+        self.version = 0
+        self.clear()
+
+    def clear(self):
+        """盤面を空にする"""
+        size = self.cols * self.rows
+        self.cells = array("b", [EMPTY]) * size  # マス -> カード ID
+        self.free = list(range(size))  # 空きマスの一覧（順不同）
+        self.free_index = list(range(size))  # マス -> free 内の位置（使用中は -1）
+        self.selected = 0  # 選択中マスのビットマスク
+        self.count = 0
+        self.dirty = set(range(size))  # 描き直しが必要なマス
+        self.version += 1  # 花札が置かれる・消えるたびに増える
+
+    def load(self, cells, free, selected):
+        """
+        保存しておいた状態に戻す（スナップショットの復元用）
+        cells: マスごとのカード ID（array("b") のバイト列でもよい）、free: 空きマスの一覧（順番も含めて復元する）
+        """
+        size = self.cols * self.rows
+        self.cells = array("b", cells)
+        self.free = list(free)
+        self.free_index = [-1] * size
+        for index, cell in enumerate(self.free):
+            self.free_index[cell] = index
+        self.selected = selected
+        self.count = size - len(self.free)
+        self.dirty = set(range(size))
+        self.version += 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """花札のあるマスを順に返す"""
+        for cell, card in enumerate(self.cells):
+            if card != EMPTY:
+                yield cell
+
+    def card_ids(self):
+        """盤面にある花札のカード ID を順に返す"""
+        for card in self.cells:
+            if card != EMPTY:
+                yield card
+
+    def cell_position(self, cell):
+        """マスの左上座標"""
+        return self.positions[cell]
+
+    def cell_at(self, x, y):
+        """画面座標にあるマス（盤面外なら None）"""
+        if x < 0 or y < 0:
+            return None
+        col = x // self.cell_width
+        row = y // self.cell_height
+        # 右端・下端の境界線上は最後の列・行に含める
+        if col == self.cols and x == self.cols * self.cell_width:
+            col -= 1
+        if row == self.rows and y == self.rows * self.cell_height:
+            row -= 1
+        if col >= self.cols or row >= self.rows:
+            return None
+        return int(row * self.cols + col)
+
+    def card_at(self, x, y):
+        """画面座標にある花札のマス（なければ None）"""
+        cell = self.cell_at(x, y)
+        if cell is None or self.cells[cell] == EMPTY:
+            return None
+        return cell
+
+    def is_selected(self, cell):
+        return (self.selected >> cell) & 1
+
+    def set_selected(self, cell, selected):
+        """マスの花札の選択状態を変える"""
+        if selected:
+            self.selected |= 1 << cell
+        else:
+            self.selected &= ~(1 << cell)
+        self.dirty.add(cell)
+
+    def random_free_cell(self, rng):
+        """空きマスをランダムに1つ選ぶ（空きがなければ None）"""
+        if not self.free:
+            return None
+        return rng.choice(self.free)
+
+    def cells_in(self, col0, row0, col1, row1):
+        """列 col0～col1-1、行 row0～row1-1 の範囲のマスを返す（盤面の外は除く）"""
+        col0 = max(0, col0)
+        col1 = min(self.cols, col1)
+        for row in range(max(0, row0), min(self.rows, row1)):
+            start = row * self.cols
+            yield from range(start + col0, start + col1)
+
+    def random_free_cell_in(self, rng, col0, row0, col1, row1):
+        """範囲内の空きマスをランダムに1つ選ぶ（空きがなければ None）"""
+        cells = self.cells
+        free = [cell for cell in self.cells_in(col0, row0, col1, row1) if cells[cell] == EMPTY]
+        if not free:
+            return None
+        return rng.choice(free)
+
+    def place(self, cell, card):
+        """空きマスにカード ID card の花札を置く"""
+        # 空きリストから末尾と入れ替えて取り除く
+        index = self.free_index[cell]
+        last = self.free.pop()
+        if last != cell:
+            self.free[index] = last
+            self.free_index[last] = index
+        self.free_index[cell] = -1
+
+        self.cells[cell] = card
+        self.count += 1
+        self.dirty.add(cell)
+        self.version += 1
+
+    def remove(self, cell):
+        """マスの花札を取り除く"""
+        self.cells[cell] = EMPTY
+        self.selected &= ~(1 << cell)
+        self.free_index[cell] = len(self.free)
+        self.free.append(cell)
+        self.count -= 1
+        self.dirty.add(cell)
+        self.version += 1
@@ -0,0 +1,58 @@
+"""
+固定ステップのゲーム時計
+
+ゲームのタイマーはすべて「ロジックのステップ数」で数えます（1ステップ = 1/30秒）。
+描画が遅れて pyxel の update() の間隔が伸びても、経過した実時間の分だけ
+ステップを進めるので、ゲームの速さはマシンの速さに左右されません。
+余った端数の時間は alpha（0～1）として描画の補間に使います。
+"""
+import time
+
+LOGIC_FPS = 30
+
+
+class FixedClock:
+    def __init__(self, step=1 / LOGIC_FPS, max_steps=4, time_func=time.perf_counter):
+        """
+        step: 1ステップの秒数
+        max_steps: 1回の tick() で進める最大ステップ数（これを超えた遅れは捨てる）
+        time_func: 現在時刻（秒）を返す関数
+        """
+        self.step = step
+        self.max_steps = max_steps
+        self.time_func = time_func
+        self.last_time = None
+        self.accumulator = 0.0
+        self.alpha = 0.0  # 最後のステップから次のステップまでの進み具合
+        self.dropped = 0  # 追いつけずに捨てたステップ数の累計
+
+    def reset(self):
+        """次の tick() を起点にする（一時停止からの復帰など）"""
+        self.last_time = None
+        self.accumulator = 0.0
+        self.alpha = 0.0
+
+    def tick(self):
+        """前回からの経過時間を足して、今回進めるステップ数を返す"""
+        now = self.time_func()
+        if self.last_time is None:
+            # 最初の1回は1ステップだけ進める
+            self.last_time = now
+            self.alpha = 0.0
+            return 1
+
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        # 浮動小数点の誤差でステップが1つ遅れないよう、わずかに切り上げる
+        steps = int(self.accumulator / self.step + 1e-6)
+        if steps > self.max_steps:
+            # 大きく遅れたときは追いつくのをあきらめて、ゲームをゆっくり進める
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step
+
+        self.alpha = max(0.0, self.accumulator / self.step)
+        return steps
@@ -0,0 +1,103 @@
+"""
+盤面の合成描画
+
+花札を並べた盤面をオフスクリーン画像に描いておき、毎フレームは
+その画像を1回 blt するだけにします。
+花札の出現・選択・消去で変化したマス（Board.dirty）だけを描き直すので、
+描画コストが盤面の枚数に比例しません。
+盤面が画面より大きいときは表示範囲のマスだけを画像に持ち、
+範囲外のマスは描きません（スクロールしたら表示範囲を描き直します）。
+タイトルなど動きのない画面は CachedLayer に1度だけ描いて使い回します。
+"""
+import pyxel
+
+from board import EMPTY
+
+
+class BoardCompositor:
+    def __init__(self, board, draw_card, background=0, view_cols=None, view_rows=None):
+        """
+        board: 描画する Board
+        draw_card: draw_card(image, cell, x, y) でマスの花札を画像の (x, y) に描く関数
+        background: 空きマスの色
+        view_cols / view_rows: 表示範囲のマス数（None なら盤面全体）
+        """
+        self.board = board
+        self.draw_card = draw_card
+        self.background = background
+        self.view_cols = view_cols or board.cols
+        self.view_rows = view_rows or board.rows
+        self.view_col = 0  # 画像に描いてある表示範囲の左上
+        self.view_row = 0
+        self.width = self.view_cols * board.cell_width
+        self.height = self.view_rows * board.cell_height
+        self.image = pyxel.Image(self.width, self.height)
+        self.invalidate()
+
+    def invalidate(self):
+        """表示範囲の全マスを描き直す（描画モードの切り替え時・スクロール時など）"""
+        self.board.dirty.update(self.board.cells_in(
+            self.view_col, self.view_row,
+            self.view_col + self.view_cols, self.view_row + self.view_rows))
+
+    def update(self):
+        """表示範囲の変化したマスだけオフスクリーン画像に描き直す"""
+        board = self.board
+        if not board.dirty:
+            return
+
+        cols = board.cols
+        cell_width = board.cell_width
+        cell_height = board.cell_height
+        for cell in board.dirty:
+            # 表示範囲の外のマスは描かない（スクロールしたときに描く）
+            col = cell % cols - self.view_col
+            row = cell // cols - self.view_row
+            if not (0 <= col < self.view_cols and 0 <= row < self.view_rows):
+                continue
+            x = col * cell_width
+            y = row * cell_height
+            self.image.rect(x, y, cell_width, cell_height, self.background)
+            if board.cells[cell] != EMPTY:
+                self.draw_card(self.image, cell, x, y)
+        board.dirty.clear()
+
+    def draw(self, x=0, y=0, view_col=0, view_row=0):
+        """
+        合成済みの盤面を画面に描画
+        view_col / view_row: 表示範囲の左上のマス
+        """
+        if view_col != self.view_col or view_row != self.view_row:
+            self.view_col = view_col
+            self.view_row = view_row
+            self.invalidate()
+        self.update()
+        pyxel.blt(x, y, self.image, 0, 0, self.width, self.height)
+
+
+class CachedLayer:
+    def __init__(self, width, height, render):
+        """
+        render: render(image) で静的な内容を画像に描く関数
+        """
+        self.width = width
+        self.height = height
+        self.render = render
+        self.image = pyxel.Image(width, height)
+        self.valid = False
+        self.key = None
+
+    def invalidate(self):
+        """次の描画時に描き直す"""
+        self.valid = False
+
+    def draw(self, x=0, y=0, key=None):
+        """
+        キャッシュを画面に転送
+        key: 描画内容が依存する値（前回と変わったら描き直す）
+        """
+        if not self.valid or key != self.key:
+            self.render(self.image)
+            self.valid = True
+            self.key = key
+        pyxel.blt(x, y, self.image, 0, 0, self.width, self.height)
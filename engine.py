@@ -0,0 +1,488 @@
+"""
+花札ポンのゲーム本体（pyxel に依存しないロジック部分）
+
+盤面・デッキ・スコア・タイマーの状態遷移をすべてこのクラスで管理します。
+描画や入力の取得は行わず、update() に入力を渡して1フレームずつ進めます。
+乱数はシード付きの random.Random を使うので、同じシードと入力なら
+同じ結果になります。
+"""
+import random
+import zlib
+from collections import Counter
+
+from board import EMPTY, Board
+from particles import PRIORITY_NORMAL, PRIORITY_SPECIAL, ParticlePool
+from rules import CARDS_PER_MONTH, card_id, load_rules
+from solver import MatchIndex
+from sound import SOUND_PRIORITY_CLEAR, SOUND_PRIORITY_GAME_OVER, SOUND_PRIORITY_SPECIAL
+
+# update() に渡すキー入力の名前
+KEY_RETURN = "return"
+KEY_SPACE = "space"
+KEY_LEFT = "left"  # 表示範囲のスクロール（盤面が画面より大きいとき）
+KEY_RIGHT = "right"
+KEY_UP = "up"
+KEY_DOWN = "down"
+
+# スクロールキー -> (列, 行) の移動量
+SCROLL_KEYS = {KEY_LEFT: (-1, 0), KEY_RIGHT: (1, 0), KEY_UP: (0, -1), KEY_DOWN: (0, 1)}
+
+# 画面に表示できるマス数
+VIEW_COLS = 8
+VIEW_ROWS = 4
+
+# 盤面が画面より大きいとき、表示範囲の外側何マスまでに花札を出すか
+SPAWN_MARGIN = 1
+
+# サウンド番号
+SOUND_GAME_OVER = 0
+SOUND_CLEAR = 2
+
+
+class GameEngine:
+    def __init__(self, seed=None, effects=True, rules=None, profiler=None, telemetry=None,
+                 cols=VIEW_COLS, rows=VIEW_ROWS, decks=1, max_cards=None):
+        """
+        seed: 乱数シード（None ならランダム）
+        effects: False にするとパーティクルを生成しない（高速シミュレーション用）
+        rules: 役ルール（None なら rules.json を読み込む）
+        profiler: 処理時間を計測する Profiler（None なら計測しない）
+        telemetry: プレイデータを記録する Telemetry（None なら記録しない）
+        cols / rows: 盤面のマス数（画面より大きければスクロールして遊ぶ）
+        decks: 使う花札の組数
+        max_cards: この枚数に達したらゲームオーバー（None なら rules.json の値）
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.effects = effects
+        self.profiler = profiler
+        self.telemetry = telemetry
+
+        # ゲーム状態管理
+        self.game_state = "title"  # "title", "playing", "game_over"
+        self.title_timer = 0  # タイトル画面のアニメーション用
+        self.frame = 0  # 経過フレーム数
+
+        # 役ルール（rules.json からコンパイル済みの判定テーブル）
+        self.rules = rules if rules is not None else load_rules()
+
+        # 花札の設定
+        self.card_width = 32
+        self.card_height = 53
+        self.cards_per_row = cols
+        self.max_rows = rows
+        if decks < 1:
+            raise ValueError(f"花札の組数は1以上にしてください: {decks}")
+        self.decks = decks
+        # この枚数に達したらゲームオーバー（盤面のマス数より多くはできない）
+        self.max_cards = min(max_cards if max_cards is not None else self.rules.max_cards,
+                             cols * rows)
+
+        # ゲーム状態
+        self.board = Board(self.cards_per_row, self.max_rows,
+                           self.card_width, self.card_height)  # 画面上の花札
+        self.selected_cells = []  # 選択中の花札のマス（選択順）
+        self.score = 0
+        self.spawn_timer = 0
+        self.spawn_interval = self.rules.spawn_interval  # フレーム数（90 で3秒）
+        self.bonus_timer = 0
+        self.bonus_multiplier = 1
+        self.combo_message = ""  # 役成立メッセージ
+        self.combo_timer = 0     # メッセージ表示時間
+        self.yaku_counts = Counter()  # このゲームで成立した役名ごとの回数
+
+        # 表示範囲（画面に映っているマスの左上の列・行）
+        # 盤面が画面より大きいときだけスクロールし、花札も表示範囲の近くに出す
+        self.view_cols = min(VIEW_COLS, cols)
+        self.view_rows = min(VIEW_ROWS, rows)
+        self.scrolling = cols > self.view_cols or rows > self.view_rows
+        self.view_col = 0
+        self.view_row = 0
+
+        # パーティクルシステム
+        # 演出用の乱数はゲーム進行と分けておき、演出の有無で結果が変わらないようにする
+        self.particles = ParticlePool(capacity=512 if effects else 0,
+                                      seed=self.rng.getrandbits(64))
+
+        # 再生待ちのサウンド (サウンド番号, 優先度)。チャンネルは SoundScheduler が決める
+        self.sounds = []
+
+        # 花札の種類（月ごと、4枚ずつ）
+        self.months = self.rules.months
+
+        # 盤面で揃っている役の索引（花札の出入りのたびに更新）
+        self.matches = MatchIndex(self.rules)
+
+        # 花札デッキの初期化（月とカード番号のペア）
+        self.deck = []
+        self.init_deck()
+
+    def init_deck(self):
+        """デッキ（カード ID のリスト）を初期化"""
+        self.deck = []
+        for _ in range(self.decks):
+            for month_idx in range(len(self.months)):
+                for card_num in range(CARDS_PER_MONTH):  # 各月4枚
+                    self.deck.append(card_id(month_idx, card_num))
+        self.rng.shuffle(self.deck)
+
+    def create_particles(self, x, y, card_color=None, is_special=False):
+        """パーティクルを生成"""
+        if not self.effects:
+            return
+
+        particle_count = 15 if is_special else 8
+
+        # 特殊役の場合はより派手な色を使用
+        if is_special:
+            colors = [8, 9, 10, 11, 12, 14, 15]  # より鮮やかな色
+        else:
+            colors = [7, 8, 10, 11, 14]  # 通常の色
+
+        # カードの中央付近からパーティクルを発生
+        # 上限に達したときは特殊役の演出を優先して残す
+        priority = PRIORITY_SPECIAL if is_special else PRIORITY_NORMAL
+        self.particles.emit(x + self.card_width // 2, y + self.card_height // 2,
+                            particle_count, colors, priority=priority)
+
+    def state_digest(self):
+        """盤面・デッキ・スコアなどゲーム進行に関わる状態のチェックサム"""
+        values = [self.frame, self.score, self.spawn_timer, self.spawn_interval,
+                  self.bonus_timer, self.bonus_multiplier, len(self.deck)]
+        board = self.board
+        for cell, card in enumerate(board.cells):
+            if card == EMPTY:
+                values.append(-1)
+            else:
+                values.append(card * 2 + board.is_selected(cell))
+        values.extend(self.deck)
+        return zlib.crc32(repr(values).encode())
+
+    def log(self, event, *values):
+        """テレメトリーにイベントを記録（値の名前は telemetry.EVENT_FIELDS）"""
+        if self.telemetry is not None:
+            self.telemetry.log(event, self.frame, values)
+
+    def pop_sounds(self):
+        """このフレームで発生したサウンドを取り出す"""
+        sounds = self.sounds
+        self.sounds = []
+        return sounds
+
+    def update(self, clicks=(), keys=()):
+        """
+        1フレーム進めます
+        clicks: このフレームのクリック位置 (x, y) のリスト
+        keys: このフレームで押されたキー名（KEY_RETURN, KEY_SPACE）
+        """
+        self.frame += 1
+        if self.game_state == "title":
+            self.update_title(clicks, keys)
+        elif self.game_state == "playing":
+            if self.scrolling:
+                self.update_view(keys)
+            self.update_playing(clicks)
+        elif self.game_state == "game_over":
+            self.update_game_over(clicks, keys)
+
+    def advance(self, frames):
+        """
+        入力なしで frames フレーム進めます
+        何も起きないフレームはまとめて飛ばすので、update() を繰り返すより高速です
+        """
+        while frames > 0:
+            if self.particles:
+                self.update()
+                frames -= 1
+                continue
+
+            if self.game_state != "playing":
+                # タイトル・ゲームオーバー画面は入力がなければ何も起きない
+                self.frame += frames
+                if self.game_state == "title":
+                    self.title_timer += frames
+                return
+
+            # 次にイベントが起きるまでのフレーム数
+            event = self.frames_until_event()
+            skip = frames if event is None else min(frames, event)
+
+            if skip > 1:
+                # イベント直前まで一気に進める
+                skip -= 1
+                self.frame += skip
+                self.spawn_timer += skip
+                if self.bonus_timer > 0:
+                    self.bonus_timer -= skip
+                if self.combo_timer > 0:
+                    self.combo_timer -= skip
+                frames -= skip
+            else:
+                self.update()
+                frames -= 1
+
+    def frames_until_event(self):
+        """
+        入力がなければ、何回目の update() で次に状態が変わるか
+        （スポーン・ボーナス終了・メッセージ消去。プレイ中以外は None）
+        """
+        if self.game_state != "playing":
+            return None
+        frames = self.spawn_interval - self.spawn_timer
+        if len(self.board) >= self.max_cards:
+            frames = None
+        for timer in (self.bonus_timer, self.combo_timer):
+            if timer > 0 and (frames is None or timer < frames):
+                frames = timer
+        return frames
+
+    def update_title(self, clicks, keys):
+        """タイトル画面の更新"""
+        self.title_timer += 1
+
+        # キー入力またはマウスクリックでゲーム開始
+        if KEY_RETURN in keys or KEY_SPACE in keys or clicks:
+            self.start_game()
+
+    def update_view(self, keys):
+        """スクロールキーで表示範囲を1マスずつ動かす"""
+        for key in keys:
+            move = SCROLL_KEYS.get(key)
+            if move is not None:
+                self.scroll_to(self.view_col + move[0], self.view_row + move[1])
+
+    def scroll_to(self, col, row):
+        """表示範囲の左上を (col, row) にする（盤面の外には出ない）"""
+        self.view_col = max(0, min(self.cards_per_row - self.view_cols, col))
+        self.view_row = max(0, min(self.max_rows - self.view_rows, row))
+
+    def update_playing(self, clicks):
+        """プレイ中の更新"""
+        profiler = self.profiler
+        if profiler is None or not profiler.enabled:
+            self.update_particles()
+            self.update_timers()
+            self.update_spawn()
+            self.process_clicks(clicks)
+            self.check_game_over()
+            return
+
+        # 計測が有効なときは処理ごとに時間を測る
+        with profiler.section("particles"):
+            self.update_particles()
+        with profiler.section("timers"):
+            self.update_timers()
+        with profiler.section("spawn"):
+            self.update_spawn()
+        with profiler.section("input"):
+            self.process_clicks(clicks)
+        with profiler.section("game_over"):
+            self.check_game_over()
+
+    def update_particles(self):
+        """パーティクルの更新"""
+        self.particles.update()
+
+    def update_timers(self):
+        """ボーナスタイム・役成立メッセージの残り時間を進める"""
+        # ボーナスタイム管理
+        if self.bonus_timer > 0:
+            self.bonus_timer -= 1
+            if self.bonus_timer == 0:
+                self.bonus_multiplier = 1
+
+        # 役成立メッセージ管理
+        if self.combo_timer > 0:
+            self.combo_timer -= 1
+            if self.combo_timer == 0:
+                self.combo_message = ""
+
+    def update_spawn(self):
+        """花札のスポーン"""
+        self.spawn_timer += 1
+        if self.spawn_timer >= self.spawn_interval and len(self.board) < self.max_cards:
+            self.spawn_card()
+            self.spawn_timer = 0
+
+            # 時間経過で難易度上昇
+            min_interval = self.rules.min_spawn_interval  # 30 で最小1秒
+            if self.spawn_interval > min_interval:
+                self.spawn_interval = max(min_interval, self.spawn_interval - self.rules.spawn_step)
+
+    def process_clicks(self, clicks):
+        """マウス・タッチ入力処理"""
+        for mouse_x, mouse_y in clicks:
+            self.handle_click(mouse_x, mouse_y)
+
+    def check_game_over(self):
+        """ゲームオーバー判定"""
+        if len(self.board) >= self.max_cards or self.is_dead_board():
+            self.game_state = "game_over"
+            self.sounds.append((SOUND_GAME_OVER, SOUND_PRIORITY_GAME_OVER))
+            self.log("game_over", self.score, len(self.board),
+                     len(self.board) < self.max_cards)
+
+    def is_dead_board(self):
+        """
+        詰み判定（rules.json の end_on_dead_board が有効なときだけ）
+        あと1枚でゲームオーバーなのに消せる役がなければ、次のスポーンで必ず終わる
+        """
+        return (self.rules.end_on_dead_board and self.matches.available == 0
+                and len(self.board) >= self.max_cards - 1)
+
+    def update_game_over(self, clicks, keys):
+        """ゲームオーバー画面の更新"""
+        # パーティクルの更新（ゲームオーバー画面でも継続）
+        self.particles.update()
+
+        if KEY_RETURN in keys or clicks:
+            self.restart_game()
+
+    def start_game(self):
+        """ゲームを開始"""
+        self.game_state = "playing"
+        self.board.clear()
+        self.matches.clear()
+        self.selected_cells = []
+        self.score = 0
+        self.spawn_timer = 0
+        self.spawn_interval = self.rules.spawn_interval
+        self.bonus_timer = 0
+        self.bonus_multiplier = 1
+        self.combo_message = ""
+        self.combo_timer = 0
+        self.yaku_counts.clear()
+        self.particles.clear()  # パーティクルもリセット
+        self.init_deck()
+        # 表示範囲は盤面の中央から始める
+        self.scroll_to((self.cards_per_row - self.view_cols) // 2,
+                       (self.max_rows - self.view_rows) // 2)
+        self.log("start", self.spawn_interval, self.max_cards)
+
+    def spawn_card(self):
+        if not self.deck:
+            # デッキが空の場合、新しくシャッフル
+            self.init_deck()
+
+        card = self.deck.pop()
+
+        # 空いているマスをランダムに選択
+        if self.scrolling:
+            cell = self.spawn_cell_near_view()
+        else:
+            cell = self.board.random_free_cell(self.rng)
+        if cell is not None:
+            self.place_card(cell, card)
+            self.log("spawn", cell, card, self.spawn_interval)
+
+    def spawn_cell_near_view(self):
+        """
+        表示範囲とその周り SPAWN_MARGIN マスの空きマスをランダムに選ぶ
+        （調べるのは表示範囲の近くだけ。空きがなければ盤面全体から選ぶ）
+        """
+        board = self.board
+        cell = board.random_free_cell_in(
+            self.rng, self.view_col - SPAWN_MARGIN, self.view_row - SPAWN_MARGIN,
+            self.view_col + self.view_cols + SPAWN_MARGIN,
+            self.view_row + self.view_rows + SPAWN_MARGIN)
+        if cell is None:
+            cell = board.random_free_cell(self.rng)
+        return cell
+
+    def place_card(self, cell, card):
+        """空きマスにカード ID card の花札を置く"""
+        self.board.place(cell, card)
+        self.matches.add(card)
+
+    def handle_click(self, mouse_x, mouse_y):
+        board = self.board
+        cell = board.card_at(mouse_x, mouse_y)
+        if cell is None:
+            return
+
+        if board.is_selected(cell):
+            # 既に選択されている場合は選択解除
+            board.set_selected(cell, False)
+            self.selected_cells.remove(cell)
+            self.log("deselect", cell, board.cells[cell])
+        else:
+            # 新しく選択
+            if len(self.selected_cells) < 3:
+                board.set_selected(cell, True)
+                self.selected_cells.append(cell)
+                self.log("select", cell, board.cells[cell])
+
+                # 3枚選択されたら消去判定
+                if len(self.selected_cells) == 3:
+                    self.check_completion()
+                # 2枚選択されたら2枚役の判定も行う
+                elif len(self.selected_cells) == 2:
+                    result = self.evaluate_selection()
+                    if result[0] > 0:
+                        self.check_completion(result)
+
+    def check_completion(self, result=None):
+        """
+        選択中の花札の役を判定し、成立していれば消去
+        result: 判定済みの場合はその結果 (得点, 役名, 特殊役か)
+        """
+        if result is None:
+            result = self.evaluate_selection()
+        yaku_score, combo_name, is_special_combo = result
+
+        if yaku_score == 0:
+            # 無効な組み合わせの場合、選択をリセットして終了
+            if self.telemetry is not None:
+                self.log("reset", [self.board.cells[cell] for cell in self.selected_cells])
+            self.reset_selection()
+            return
+
+        if self.telemetry is not None:
+            self.log("clear", combo_name, yaku_score, self.bonus_multiplier,
+                     [self.board.cells[cell] for cell in self.selected_cells])
+        self.score += yaku_score * self.bonus_multiplier
+        self.yaku_counts[combo_name] += 1
+
+        if is_special_combo:
+            # 特殊役表示用のメッセージを設定
+            self.show_combo_message(combo_name, yaku_score)
+
+        if yaku_score >= self.rules.bonus_min_score:  # 高得点役の場合
+            self.bonus_timer = self.rules.bonus_frames
+            self.bonus_multiplier = self.rules.bonus_multiplier
+
+        # パーティクル生成（カードが消える前に）
+        for cell in self.selected_cells:
+            x, y = self.board.cell_position(cell)
+            self.create_particles(x, y, is_special=is_special_combo)
+
+        # 選択された花札を削除（選択状態も一緒に消える）
+        for cell in self.selected_cells:
+            self.matches.remove(self.board.cells[cell])
+            self.board.remove(cell)
+        self.sounds.append((SOUND_CLEAR, SOUND_PRIORITY_SPECIAL if is_special_combo
+                            else SOUND_PRIORITY_CLEAR))
+
+        self.selected_cells = []
+
+    def evaluate_selection(self):
+        """選択中の花札の役を判定（ルールテーブルを1回引くだけ）"""
+        cells = self.board.cells
+        return self.rules.evaluate([cells[cell] for cell in self.selected_cells])
+
+    def show_combo_message(self, combo_name, score):
+        """役の成立メッセージを表示"""
+        self.combo_message = f"{combo_name} - {score}点!"
+        self.combo_timer = 60  # 2秒間表示
+
+    def reset_selection(self):
+        for cell in self.selected_cells:
+            self.board.set_selected(cell, False)
+        self.selected_cells = []
+
+    def restart_game(self):
+        """ゲームをリスタート（タイトル画面に戻る）"""
+        self.game_state = "title"
+        self.title_timer = 0
+        self.log("restart", self.score)
+        self.particles.clear()  # パーティクルもクリア
@@ -0,0 +1,154 @@
+"""
+日本語の文字（月の漢字・選択・点）の描画
+
+pyxel の標準フォントは ASCII しか描けないので、使う漢字だけを
+ビットマップで持っておき、起動時に色ごとに1度だけ画像（アトラス）へ描きます。
+描画は1文字 = blt 1回で、毎フレームのフォント処理はありません。
+ASCII の部分はそのまま pyxel の標準フォントで描きます。
+
+ビットマップは umplus_j10r.bdf（Copyright (C) 2002-2004 COZ、
+pyxel のサンプルに同梱）から抜き出したものです。
+文字を増やすときは python glyphs.py フォント.bdf 文字 で表を作り直します。
+"""
+import argparse
+
+import pyxel
+
+# 漢字1文字の大きさ（横は次の文字との間隔を含む）
+GLYPH_WIDTH = 10
+GLYPH_HEIGHT = 11
+
+# ASCII の文字の大きさ（pyxel の標準フォント）
+CHAR_WIDTH = 4
+
+# 漢字を描く位置（pyxel.text の y からのずれ。ベースラインを ASCII に合わせる）
+GLYPH_OFFSET_Y = -4
+
+# アトラスの透明色
+TRANSPARENT = 0
+
+# 文字 -> 各行のビット（BDF の BITMAP と同じ16進数、上位ビットが左）
+GLYPHS = {
+    "松": "0000 2700 2100 F880 2A80 6200 6400 B480 A880 2F80 0000",
+    "梅": "0800 2800 2F80 F000 2F80 6A80 7F80 AA80 AA80 2F80 0000",
+    "桜": "0000 2880 2480 F100 2900 6400 7F80 A900 AE00 3180 0000",
+    "藤": "2200 2200 FF80 1280 FF80 A500 BF80 EA80 B700 AA80 0000",
+    "菖": "2200 2200 FF80 2200 4100 7F00 4100 FF80 8080 FF80 0000",
+    "牡": "0200 2200 A200 F200 AF80 A200 3200 E200 2200 2F80 0000",
+    "萩": "2200 2200 FF80 1200 EA80 2B00 FA00 2200 7500 A880 0000",
+    "芒": "2200 2200 FF80 2200 0800 FF80 4000 4000 4000 3F80 0000",
+    "菊": "2200 2200 FF80 2200 7F80 9480 1080 FE80 5480 9300 0000",
+    "紅": "0000 4F80 8200 F200 2200 4200 F200 2200 A200 AF80 0000",
+    "柳": "0000 3B80 2280 EA80 2A80 6A80 6A80 BA80 AB80 2A00 0000",
+    "桐": "0000 2F80 2880 FE80 2880 6E80 6A80 BA80 AE80 2980 0000",
+    "選": "0000 9D80 4480 0900 1F80 C500 5F80 4900 A000 9F80 0000",
+    "択": "0000 4F80 4880 E880 4F80 4900 6900 C900 5080 D080 0000",
+    "点": "0800 0800 0F00 0800 7F00 4100 7F00 0000 5500 8A80 0000",
+}
+
+
+def glyph_rows(bitmap, color):
+    """ビットマップを Image.set() に渡す形（1ピクセル = 色番号の16進1桁）にする"""
+    on = f"{color:x}"
+    off = f"{TRANSPARENT:x}"
+    rows = []
+    for word in bitmap.split():
+        bits = int(word, 16)
+        rows.append("".join(on if bits & (0x8000 >> i) else off for i in range(GLYPH_WIDTH)))
+    return rows
+
+
+class GlyphAtlas:
+    def __init__(self, colors, glyphs=GLYPHS, slots=None):
+        """
+        colors: 起動時に用意しておく文字色
+        slots: アトラスに入る文字数（None なら colors の分だけ。足りない色は使うときに描く）
+        """
+        self.glyphs = glyphs
+        if slots is None:
+            slots = len(glyphs) * len(colors)
+        self.columns = 16
+        rows = max(1, -(-slots // self.columns))
+        self.image = pyxel.Image(self.columns * GLYPH_WIDTH, rows * GLYPH_HEIGHT)
+        self.image.cls(TRANSPARENT)
+        self.slots = self.columns * rows
+        self.table = {}  # (文字, 色) -> アトラス上の (u, v)
+        for color in colors:
+            for char in glyphs:
+                self.rasterize(char, color)
+
+    def rasterize(self, char, color):
+        """文字をアトラスの空いている場所に描き、その位置を返す（空きがなければ None）"""
+        index = len(self.table)
+        if index >= self.slots:
+            return None
+        u = index % self.columns * GLYPH_WIDTH
+        v = index // self.columns * GLYPH_HEIGHT
+        self.image.set(u, v, glyph_rows(self.glyphs[char], color))
+        self.table[char, color] = (u, v)
+        return u, v
+
+    def text_width(self, text):
+        return sum(GLYPH_WIDTH if char in self.glyphs else CHAR_WIDTH for char in text)
+
+    def text(self, target, x, y, text, color):
+        """
+        漢字を含む文字列を描き、描いた幅を返す
+        target: pyxel モジュールまたは pyxel.Image
+        """
+        start = x
+        run = []  # まとめて pyxel.text で描く ASCII の部分
+        for char in text:
+            if char not in self.glyphs:
+                run.append(char)
+                continue
+            if run:
+                target.text(x, y, "".join(run), color)
+                x += len(run) * CHAR_WIDTH
+                run = []
+            uv = self.table.get((char, color)) or self.rasterize(char, color)
+            if uv is not None:
+                target.blt(x, y + GLYPH_OFFSET_Y, self.image, uv[0], uv[1],
+                           GLYPH_WIDTH, GLYPH_HEIGHT, TRANSPARENT)
+            x += GLYPH_WIDTH
+        if run:
+            target.text(x, y, "".join(run), color)
+            x += len(run) * CHAR_WIDTH
+        return x - start
+
+
+def read_bdf(path, chars):
+    """BDF フォントから chars のビットマップを GLYPHS の形で読み出す"""
+    codes = {ord(char): char for char in chars}
+    glyphs = {}
+    with open(path, encoding="latin-1") as f:
+        lines = iter(f.read().splitlines())
+    for line in lines:
+        if not line.startswith("ENCODING"):
+            continue
+        char = codes.get(int(line.split()[1]))
+        if char is None:
+            continue
+        for line in lines:
+            if line.startswith("BITMAP"):
+                break
+        glyphs[char] = " ".join(next(lines) for _ in range(GLYPH_HEIGHT))
+    return glyphs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BDF フォントから GLYPHS の表を作る")
+    parser.add_argument("font", help="10ピクセルの BDF フォント（umplus_j10r.bdf など）")
+    parser.add_argument("chars", help="抜き出す文字")
+    args = parser.parse_args()
+
+    glyphs = read_bdf(args.font, args.chars)
+    for char in args.chars:
+        if char in glyphs:
+            print(f'    "{char}": "{glyphs[char]}",')
+        else:
+            print(f"# {char} はフォントにありません")
+
+
+if __name__ == "__main__":
+    main()
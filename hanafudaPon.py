@@ -1,514 +1,454 @@
+import time
+
+# 起動時間の計測の起点（pyxel などの import にかかる時間も含める）
+LAUNCH_TIME = time.perf_counter()
+
 import pyxel
-import random
+import argparse
+import atexit
 import math
+import random
 
-class Particle:
-    def __init__(self, x, y, color=None):
-        self.x = x
-        self.y = y
-        self.vx = random.uniform(-3, 3)
-        self.vy = random.uniform(-4, -1)
-        self.gravity = 0.1
-        self.life = random.randint(30, 60)  # フレーム数
-        self.max_life = self.life
-        self.color = color if color else random.choice([8, 9, 10, 11, 12, 14, 15])
-        self.size = random.randint(1, 3)
-    
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.vy += self.gravity
-        self.life -= 1
-        
-        # 軽い空気抵抗
-        self.vx *= 0.98
-        
-        return self.life > 0
-    
-    def draw(self):
-        # ライフに応じて透明度を調整（色の明度で表現）
-        alpha_ratio = self.life / self.max_life
-        if alpha_ratio > 0.7:
-            color = self.color
-        elif alpha_ratio > 0.4:
-            color = max(0, self.color - 1)
-        elif alpha_ratio > 0.2:
-            color = max(0, self.color - 2)
-        else:
-            color = 0
-        
-        if self.size == 1:
-            pyxel.pset(int(self.x), int(self.y), color)
-        elif self.size == 2:
-            pyxel.rect(int(self.x), int(self.y), 2, 2, color)
-        else:
-            pyxel.rect(int(self.x), int(self.y), 3, 3, color)
+from clock import LOGIC_FPS, FixedClock
+from compositor import BoardCompositor, CachedLayer
+from engine import (GameEngine, KEY_DOWN, KEY_LEFT, KEY_RETURN, KEY_RIGHT, KEY_SPACE,
+                    KEY_UP, VIEW_COLS, VIEW_ROWS)
+from hud import Hud
+from glyphs import GLYPH_WIDTH, GlyphAtlas
+from inputs import InputQueue
+from particles import LodController
+from profiler import HISTOGRAM_EDGES, Profiler
+from replay import Player, Recorder, Recording
+from resources import ResourceLoader
+from rules import CARDS_PER_MONTH, card_id
+from snapshot import SnapshotRing, restore, save
+from solver import AutoPlayer, Solver
+from sound import SoundScheduler
+from telemetry import Telemetry
+
+# 巻き戻し（BACKSPACE）で戻るステップ数
+REWIND_STEPS = 90
+
+# 中断・再開（F5 / F9）で使うファイル
+SUSPEND_PATH = "suspend.hps"
+
+# スクロールキー（盤面が画面より大きいとき）
+SCROLL_BUTTONS = {
+    KEY_LEFT: (pyxel.KEY_LEFT, pyxel.KEY_A),
+    KEY_RIGHT: (pyxel.KEY_RIGHT, pyxel.KEY_D),
+    KEY_UP: (pyxel.KEY_UP, pyxel.KEY_W),
+    KEY_DOWN: (pyxel.KEY_DOWN, pyxel.KEY_S),
+}
+
+# 計測オーバーレイに表示する区間
+PROFILE_SECTIONS = [
+    "frame", "update", "particles", "timers", "spawn", "input", "game_over",
+    "draw", "draw_cards", "draw_particles", "draw_hud", "draw_cursor", "input_to_draw",
+]
 
 class HanafudaPon:
-    def __init__(self):
-        pyxel.init(256, 240, title="Hanafuda Pon")  # 元の画面比率に戻す
-
-        # ゲーム状態管理
-        self.game_state = "title"  # "title", "playing", "game_over"
-        self.title_timer = 0  # タイトル画面のアニメーション用
-
-        # 花札の設定
-        self.card_width = 32
-        self.card_height = 53
-        self.cards_per_row = 8
-        self.max_rows = 4
-        self.max_cards = 32
-        
-        # ゲーム状態
-        self.cards = []  # 画面上の花札
-        self.selected_cards = []  # 選択中の花札
-        self.score = 0
-        self.spawn_timer = 0
-        self.spawn_interval = 90  # フレーム数（3秒）
-        self.game_over = False
-        self.bonus_timer = 0
-        self.bonus_multiplier = 1
-        self.combo_message = ""  # 役成立メッセージ
-        self.combo_timer = 0     # メッセージ表示時間
-        
-        # パーティクルシステム
-        self.particles = []
-        
-        # 花札の種類（月ごと、4枚ずつ）
-        self.months = ["松", "梅", "桜", "藤", "菖", "牡", "萩", "芒", "菊", "紅", "柳", "桐"]
-        
+    def __init__(self, seed=None, record_path=None, replay=None, speed=1, profile=False,
+                 autoplay=False, fps=LOGIC_FPS, resume_path=None, telemetry_path=None,
+                 board_size=None, decks=1):
+        """
+        seed: 乱数シード（None ならランダム）
+        record_path: 指定するとプレイを記録し、ゲームオーバーごとと終了時に保存する
+        replay: 再生する Recording（入力の代わりに記録を使う）
+        speed: 再生時の倍速
+        profile: 最初から処理時間の計測オーバーレイを表示する
+        autoplay: ソルバーに自動でプレイさせる
+        fps: 描画のフレームレート（ゲームの速さは変わらない）
+        resume_path: 指定すると中断したときの状態から再開する
+        telemetry_path: 指定するとプレイデータをこのファイルに追記する
+        board_size: 盤面のマス数 (列, 行)。画面より大きければ、盤面が埋まるまで続く
+                    エンドレスモードになり、矢印キー・WASD でスクロールする
+        decks: 使う花札の組数
+        """
+        pyxel.init(256, 240, title="Hanafuda Pon", fps=fps)  # 元の画面比率に戻す
+
+        # 記録・再生できるようにシードは必ず決めておく
+        if replay is not None:
+            seed = replay.seed
+            board_size = (replay.cols, replay.rows)
+            decks = replay.decks
+        elif seed is None:
+            seed = random.getrandbits(32)
+
+        # 処理時間の計測（F1 で表示切り替え、F2 でファイルに保存）
+        self.profiler = Profiler(enabled=profile)
+        self.last_frame_time = None
+        self.overlay_lines = []
+        self.profile_message = ""  # F2 で保存した結果（オーバーレイに表示）
+
+        # プレイデータの記録（書き出しはバックグラウンドのスレッドで行う）
+        self.telemetry = None
+        if telemetry_path is not None:
+            self.telemetry = Telemetry(telemetry_path, session={"seed": seed, "fps": fps})
+            atexit.register(self.telemetry.close)
+
+        # ゲームロジック本体
+        cols, rows = board_size or (VIEW_COLS, VIEW_ROWS)
+        max_cards = None
+        if replay is not None and replay.max_cards:
+            max_cards = replay.max_cards
+        elif cols * rows > VIEW_COLS * VIEW_ROWS:
+            max_cards = cols * rows  # エンドレスモード
+        self.engine = GameEngine(seed=seed, profiler=self.profiler, telemetry=self.telemetry,
+                                 cols=cols, rows=rows, decks=decks, max_cards=max_cards)
+
+        # ゲームは固定ステップで進める（pyxel の update() 1回で0～数ステップ）
+        self.clock = FixedClock()
+        self.inputs = InputQueue()  # 次のステップに渡す入力（届いた順・時刻付き）
+
+        # 処理が重いときはパーティクルを減らしてフレームレートを保つ
+        self.particle_lod = LodController(self.engine.particles)
+        self.work_start = time.perf_counter()
+
+        # 効果音（チャンネルが再生中かは pyxel に問い合わせる）
+        self.sound = SoundScheduler(is_playing=lambda channel: pyxel.play_pos(channel) is not None)
+
+        # 記録・再生
+        self.record_path = record_path
+        self.recorder = Recorder(seed, self.engine) if record_path else None
+        if self.recorder is not None:
+            # ゲームの途中で終了・クラッシュしても、そこまでの記録を残す
+            atexit.register(self.save_recording)
+        self.player = Player(replay) if replay is not None else None
+        self.speed = speed
+
+        # 巻き戻し用に直近の状態を保存しておく（3ステップごと、約10秒分）
+        self.history = SnapshotRing(capacity=100, interval=3)
+
+        # ヒント（H キー）と自動プレイ
+        self.solver = Solver(self.engine.rules)
+        self.autoplayer = AutoPlayer(self.solver) if autoplay else None
+        self.hint_cells = []
+        self.hint_timer = 0
+        self.hint_version = None
+
+        # 花札の設定（描画用）
+        self.card_width = self.engine.card_width
+        self.card_height = self.engine.card_height
+        self.months = self.engine.months
+
         # 花札の画像データ初期化
-        self.load_hanafuda_images()
-        
-        # 花札の役定義（カードタイプと月の組み合わせ）
-        # 各月のカード構成: [光札, タン札, タネ札, カス札]の順
-        self.card_types = {
-            "松": ["光", "Akatan", "タネ", "カス"],   # 1月
-            "梅": ["タネ", "Akatan", "カス", "カス"], # 2月
-            "桜": ["光", "Akatan", "タネ", "カス"],   # 3月
-            "藤": ["タネ", "タン", "カス", "カス"], # 4月
-            "菖": ["タネ", "タン", "カス", "カス"], # 5月
-            "牡": ["タネ", "Aotan", "カス", "カス"], # 6月
-            "萩": ["タネ", "タン", "タネ", "カス"], # 7月（猪）
-            "芒": ["光", "タネ", "タン", "カス"],   # 8月
-            "菊": ["タネ", "Aotan", "カス", "カス"], # 9月
-            "紅": ["タネ", "Aotan", "カス", "カス"], # 10月（鹿）
-            "柳": ["光", "タン", "タネ", "カス"],   # 11月（雨）
-            "桐": ["光", "タン", "カス", "カス"]    # 12月
-        }
-        
-        # 特殊役の定義
-        self.special_combinations = {
-            "Aotan": {
-                "cards": [("牡", 1), ("菊", 1), ("紅", 1)],  # 6月青タン、9月青タン、10月青タン
-                "score": 800
-            },
-            "Akatan": {
-                "cards": [("松", 1), ("梅", 1), ("桜", 1)],  # 1月赤タン、2月赤タン、3月赤タン
-                "score": 800
-            },
-            "Inoshikacho": {
-                "cards": [("萩", 0), ("紅", 0), ("牡", 0)],  # 7月猪、10月鹿、6月蝶
-                "score": 2000
-            },
-            "Hanami": {
-                "cards": [("桜", 0), ("菊", 0)],  # 3月光、9月酒
-                "score": 500,
-                "requires_only": 2
-            },
-            "Tsukimi": {
-                "cards": [("芒", 0), ("菊", 0)],  # 8月光、9月酒
-                "score": 500,
-                "requires_only": 2
-            }
-        }
-        
-        # 光札の定義（三光判定用）
-        self.light_cards = [("松", 0), ("桜", 0), ("芒", 0), ("桐", 0)]  # 1月、3月、8月、12月の光
-        
-        # 花札デッキの初期化（月とカード番号のペア）
-        self.deck = []
-        self.init_deck()
-        
+        # 最初の画面はテキスト表示で出し、画像は確認が済んでから読み込んで切り替える
+        self.card_sprites = self.build_card_sprites()
+        self.use_image_bank = False
+        self.first_frame_ms = None
+        self.resources = ResourceLoader(
+            "my_resource.pyxres", pyxel.load, banks=(0, 1),
+            min_width=self.card_width * 8, min_height=self.card_height * 3)
+        self.resources.start()
+
+        if resume_path is not None:
+            self.resume(resume_path)
+
+        # 盤面はオフスクリーン画像に合成して描画
+        # 盤面が画面より大きいときは表示範囲だけを描く
+        self.board_layer = BoardCompositor(self.engine.board, self.draw_card,
+                                           view_cols=self.engine.view_cols,
+                                           view_rows=self.engine.view_rows)
+        # 漢字は起動時に使う色で描いておく（カード・タイトルの装飾・役メッセージ・選択状況）
+        self.glyphs = GlyphAtlas(colors=(1, 8, 11, 12))
+        self.hud = Hud(self.engine, self.glyphs)
+
+        # タイトル・ゲームオーバー画面の動かない部分はキャッシュしておく
+        self.title_instructions = [
+            "How to Play:",
+            "Same month: Select 3 cards",
+            "Special combos: Select specific cards",
+            "Akatan/Aotan: 800pt  Inoshikacho: 2000pt",
+            "Sanko: 1000pt  Hanami/Tsukimi: 500pt",
+            "",
+            "SPACE or CLICK to Start"
+        ]
+        self.title_layer = CachedLayer(256, 240, self.draw_title_static)
+        self.game_over_layer = CachedLayer(256, 240, self.draw_game_over_static)
+
         pyxel.run(self.update, self.draw)
 
-    def load_hanafuda_images(self):
+    def update_resources(self):
         """
-        花札の画像データを読み込みます
+        花札の画像データの読み込み
         my_resource.pyxres ファイルを使用します
         イメージバンク0: 1～6月の花札（3段目まで）
         イメージバンク1: 7～12月の花札（4～6段目）
+        最初のフレームを描画してから読み込み、以降は画像で描画します
         """
-        try:
-            # hanafuda_resource.pyxres ファイルを読み込み
-            pyxel.load("my_resource.pyxres")
+        resources = self.resources
+        if resources.done or self.first_frame_ms is None:
+            return
+
+        result = resources.apply()
+        if result == "ready":
             self.use_image_bank = True
-            print("my_resource.pyxres を読み込みました")
-        except:
-            self.use_image_bank = False
-            print("my_resource.pyxres が見つかりません。")
+            # テキスト表示で描いたキャッシュを描き直す
+            self.board_layer.invalidate()
+            self.title_layer.invalidate()
+            self.game_over_layer.invalidate()
+            self.profiler.set_counter("resource_ms", round(resources.load_ms))
+            print(f"my_resource.pyxres を読み込みました ({resources.load_ms:.0f}ms)")
+        elif result == "failed":
+            print(resources.error)
             print("テキスト表示モードで実行します。")
 
-    def init_deck(self):
-        """デッキを初期化"""
-        self.deck = []
-        for month_idx, month in enumerate(self.months):
-            for card_num in range(4):  # 各月4枚
-                self.deck.append((month, month_idx, card_num))
-        random.shuffle(self.deck)
-    
-    def create_particles(self, x, y, card_color=None, is_special=False):
-        """パーティクルを生成"""
-        particle_count = 15 if is_special else 8
-        
-        # 特殊役の場合はより派手な色を使用
-        if is_special:
-            colors = [8, 9, 10, 11, 12, 14, 15]  # より鮮やかな色
-        else:
-            colors = [7, 8, 10, 11, 14]  # 通常の色
-        
-        for _ in range(particle_count):
-            # カードの中央付近からパーティクルを発生
-            px = x + self.card_width // 2 + random.randint(-8, 8)
-            py = y + self.card_height // 2 + random.randint(-8, 8)
-            color = random.choice(colors)
-            self.particles.append(Particle(px, py, color))
-    
+    def build_card_sprites(self):
+        """
+        各花札のイメージバンク上の位置を計算
+        card_sprites[カード ID] = (イメージバンク, x, y)
+        """
+        sprites = []
+        for month_idx in range(len(self.months)):
+            if month_idx < 6:  # 1-6月
+                img_bank = 0
+                adjusted_month = month_idx
+            else:  # 7-12月
+                img_bank = 1
+                adjusted_month = month_idx - 6
+            row = adjusted_month // 2  # 0,1,2行目
+            col_base = (adjusted_month % 2) * 4  # 0または4
+            sprites.extend(
+                (img_bank, (col_base + card_num) * self.card_width, row * self.card_height)
+                for card_num in range(CARDS_PER_MONTH)
+            )
+        return sprites
+
     def update(self):
-        if self.game_state == "title":
-            self.update_title()
-        elif self.game_state == "playing":
-            self.update_playing()
-        elif self.game_state == "game_over":
-            self.update_game_over()
-
-    def update_title(self):
-        """タイトル画面の更新"""
-        self.title_timer += 1
-        
-        # キー入力またはマウスクリックでゲーム開始
-        if (pyxel.btnp(pyxel.KEY_RETURN) or 
-            pyxel.btnp(pyxel.KEY_SPACE) or 
-            pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT)):
-            self.start_game()
-
-    def update_playing(self):
-        """プレイ中の更新"""
-        # パーティクルの更新
-        self.particles = [p for p in self.particles if p.update()]
-        
-        # ボーナスタイム管理
-        if self.bonus_timer > 0:
-            self.bonus_timer -= 1
-            if self.bonus_timer == 0:
-                self.bonus_multiplier = 1
-        
-        # 役成立メッセージ管理
-        if self.combo_timer > 0:
-            self.combo_timer -= 1
-            if self.combo_timer == 0:
-                self.combo_message = ""
-        
-        # 花札のスポーン
-        self.spawn_timer += 1
-        if self.spawn_timer >= self.spawn_interval and len(self.cards) < self.max_cards:
-            self.spawn_card()
-            self.spawn_timer = 0
-            
-            # 時間経過で難易度上昇
-            if self.spawn_interval > 30:  # 最小0.5秒
-                self.spawn_interval = max(30, self.spawn_interval - 1)
-        
-        # マウス・タッチ入力処理
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            self.handle_click(pyxel.mouse_x, pyxel.mouse_y)
-        
-        # ゲームオーバー判定
-        if len(self.cards) >= self.max_cards:
-            self.game_state = "game_over"
-            pyxel.play(0, 0)
-
-    def update_game_over(self):
-        """ゲームオーバー画面の更新"""
-        # パーティクルの更新（ゲームオーバー画面でも継続）
-        self.particles = [p for p in self.particles if p.update()]
-        
-        if pyxel.btnp(pyxel.KEY_RETURN) or pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            self.restart_game()
-
-    def start_game(self):
-        """ゲームを開始"""
-        self.game_state = "playing"
-        self.cards = []
-        self.selected_cards = []
-        self.score = 0
-        self.spawn_timer = 0
-        self.spawn_interval = 90
-        self.bonus_timer = 0
-        self.bonus_multiplier = 1
-        self.combo_message = ""
-        self.combo_timer = 0
-        self.particles = []  # パーティクルもリセット
-        self.init_deck()
-    
-    def spawn_card(self):
-        if not self.deck:
-            # デッキが空の場合、新しくシャッフル
-            self.init_deck()
-        
-        month, month_idx, card_num = self.deck.pop()
-        
-        # 空いている位置を探す
-        available_positions = []
-        for row in range(self.max_rows):
-            for col in range(self.cards_per_row):
-                x = col * self.card_width
-                y = row * self.card_height
-                
-                # この位置に既に花札があるかチェック
-                position_occupied = False
-                for card in self.cards:
-                    if card['x'] == x and card['y'] == y:
-                        position_occupied = True
+        self.work_start = time.perf_counter()
+        self.update_profiler()
+        self.update_resources()
+
+        # 実時間の経過に合わせて進めるステップ数（描画が遅れても速さは変わらない）
+        steps = self.clock.tick()
+        self.profiler.set_counter("logic_steps", steps)
+
+        with self.profiler.section("update"):
+            if self.player is not None:
+                # 記録された入力で speed 倍のステップ数を進める
+                for _ in range(steps * self.speed):
+                    if self.player.finished(self.engine):
                         break
-                
-                if not position_occupied:
-                    available_positions.append((x, y))
-        
-        # ランダムに位置を選択
-        if available_positions:
-            x, y = random.choice(available_positions)
-            
-            self.cards.append({
-                'month': month,
-                'month_idx': month_idx,
-                'card_num': card_num,
-                'x': x,
-                'y': y,
-                'selected': False
-            })
-    
-    def handle_click(self, mouse_x, mouse_y):
-        for card in self.cards:
-            if (card['x'] <= mouse_x <= card['x'] + self.card_width and
-                card['y'] <= mouse_y <= card['y'] + self.card_height):
-                
-                if card['selected']:
-                    # 既に選択されている場合は選択解除
-                    card['selected'] = False
-                    self.selected_cards.remove(card)
-                else:
-                    # 新しく選択
-                    if len(self.selected_cards) < 3:
-                        card['selected'] = True
-                        self.selected_cards.append(card)
-                        
-                        # 3枚選択されたら消去判定
-                        if len(self.selected_cards) == 3:
-                            self.check_completion()
-                        # 2枚選択されたら2枚役の判定も行う
-                        elif len(self.selected_cards) == 2:
-                            special_score, combo_name = self.check_special_combinations()
-                            if special_score > 0:
-                                self.check_completion()
-                break
-    
-    def check_completion(self):
-        # 特殊役の判定
-        special_score, combo_name = self.check_special_combinations()
-        
-        is_special_combo = False
-        
-        if special_score > 0:
-            self.score += special_score * self.bonus_multiplier
-            # 特殊役表示用のメッセージを設定
-            self.show_combo_message(combo_name, special_score)
-            is_special_combo = True
-            
-            if special_score >= 1000:  # 高得点役の場合
-                self.bonus_timer = 600  # 10秒間
-                self.bonus_multiplier = 2
-        else:
-            # 同じ月の3枚消しかチェック
-            if len(self.selected_cards) == 3 and self.is_same_month_combo():
-                self.score += 100 * self.bonus_multiplier
+                    clicks, keys = self.player.next_input(self.engine)
+                    self.engine.update(clicks, keys)
             else:
-                # 無効な組み合わせの場合、選択をリセットして終了
-                self.reset_selection()
-                return
-        
-        # パーティクル生成（カードが消える前に）
-        for card in self.selected_cards:
-            self.create_particles(card['x'], card['y'], is_special=is_special_combo)
-        
-        # 選択された花札を削除
-        for card in self.selected_cards:
-            self.cards.remove(card)
-            pyxel.play(0, 2)
-        
-        self.reset_selection()
-    
-    def is_same_month_combo(self):
-        """選択されたカードが全て同じ月かチェック"""
-        if len(self.selected_cards) != 3:
-            return False
-        
-        first_month = self.selected_cards[0]['month']
-        return all(card['month'] == first_month for card in self.selected_cards)
-    
-    def check_special_combinations(self):
-        """特殊役の判定を行う"""
-        selected_cards_info = []
-        
-        # 選択されたカードの情報を整理
-        for card in self.selected_cards:
-            month = card['month']
-            card_num = card['card_num']
-            card_type = self.card_types[month][card_num]
-            selected_cards_info.append((month, card_num, card_type))
-        
-        # 三光の特別判定（光札3枚の組み合わせ、重複OK）
-        if len(self.selected_cards) == 3:
-            light_count = 0
-            
-            for month, card_num, card_type in selected_cards_info:
-                if (month, card_num) in self.light_cards:
-                    light_count += 1
-            
-            # 3枚全てが光札の場合
-            if light_count == 3:
-                return 1000, "Sanko"
-        
-        # 青タンの特別判定（重複OK）
-        if len(self.selected_cards) == 3:
-            aotan_count = 0
-            for month, card_num, card_type in selected_cards_info:
-                if card_type == "Aotan":
-                    aotan_count += 1
-            
-            if aotan_count == 3:
-                return 800, "Aotan"
-        
-        # 赤タンの特別判定（重複OK）
-        if len(self.selected_cards) == 3:
-            akatan_count = 0
-            for month, card_num, card_type in selected_cards_info:
-                if card_type == "Akatan":
-                    akatan_count += 1
-            
-            if akatan_count == 3:
-                return 800, "Akatan"
-        
-        # 通常の役をチェック（猪鹿蝶、花見で一杯、月見で一杯は従来通り）
-        for combo_name, combo_data in self.special_combinations.items():
-            # 青タンと赤タンは上で処理済みなのでスキップ
-            if combo_name in ["Aotan", "Akatan"]:
-                continue
-                
-            required_cards = combo_data["cards"]
-            score = combo_data["score"]
-            requires_only = combo_data.get("requires_only", 3)
-            
-            # 選択されたカード数が要求数と一致するかチェック
-            if len(self.selected_cards) != requires_only:
-                continue
-            
-            # 必要なカードが全て揃っているかチェック
-            if self.check_cards_match(selected_cards_info, required_cards):
-                return score, combo_name
-        
-        return 0, ""
-    
-    def check_cards_match(self, selected_cards_info, required_cards):
-        """選択されたカードが必要なカードと一致するかチェック"""
-        # 必要なカードのリストをコピー
-        required_copy = required_cards.copy()
-        
-        # 選択されたカード情報をチェック
-        for month, card_num, card_type in selected_cards_info:
-            # 必要なカードリストから一致するものを探す
-            found = False
-            for i, (req_month, req_card_num) in enumerate(required_copy):
-                if month == req_month and card_num == req_card_num:
-                    required_copy.pop(i)  # 見つかったら削除
-                    found = True
-                    break
-            
-            if not found:
-                return False
-        
-        # 全ての必要なカードが見つかった場合
-        return len(required_copy) == 0
-    
-    def show_combo_message(self, combo_name, score):
-        """役の成立メッセージを表示"""
-        self.combo_message = f"{combo_name} - {score}点!"
-        self.combo_timer = 60  # 2秒間表示
-    
-    def reset_selection(self):
-        for card in self.selected_cards:
-            card['selected'] = False
-        self.selected_cards = []
-    
-    def restart_game(self):
-        """ゲームをリスタート（タイトル画面に戻る）"""
-        self.game_state = "title"
-        self.title_timer = 0
-        self.particles = []  # パーティクルもクリア
-    
+                self.update_input(steps)
+
+            # 同じフレームの重複や連打をまとめ、優先度でチャンネルを決めて鳴らす
+            for channel, sound in self.sound.schedule(self.engine.frame, self.engine.pop_sounds()):
+                pyxel.play(channel, sound)
+
+    def update_profiler(self):
+        """計測の切り替え・保存とフレーム間隔の記録"""
+        profiler = self.profiler
+        if pyxel.btnp(pyxel.KEY_F1):
+            profiler.toggle()
+            profiler.clear()
+            self.last_frame_time = None
+        if pyxel.btnp(pyxel.KEY_F2):
+            path = time.strftime("profile_%Y%m%d_%H%M%S.json")
+            try:
+                profiler.dump(path)
+            except OSError as e:
+                print(f"{path} に計測結果を保存できません: {e}")
+                self.profile_message = "DUMP FAILED"
+            else:
+                print(f"{path} に計測結果を保存しました")
+                self.profile_message = "DUMP SAVED"
+            self.overlay_lines = []  # 次の描画で結果を表示する
+
+        if not profiler.enabled:
+            return
+
+        now = time.perf_counter()
+        if self.last_frame_time is not None:
+            profiler.add_sample("frame", (now - self.last_frame_time) * 1000)
+        self.last_frame_time = now
+
+        profiler.set_counter("particles", len(self.engine.particles))
+        profiler.set_counter("particle_lod", self.engine.particles.lod)
+        profiler.set_counter("cards", len(self.engine.board))
+        profiler.set_counter("spawn_interval", self.engine.spawn_interval)
+        profiler.set_counter("sound_merged", self.sound.merged)
+        profiler.set_counter("sound_dropped", self.sound.dropped)
+        if self.telemetry is not None:
+            profiler.set_counter("telemetry_dropped", self.telemetry.dropped)
+
+    def update_input(self, steps):
+        """
+        入力を集めてゲーム本体を steps ステップ進める
+        入力は次にステップが進むまで取っておくので、steps が 0 でも失われません
+        （pyxel が入力を調べるのはフレームに1回なので、1フレーム内の2回のタップは1回になります）
+        """
+        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            # 画面座標を盤面の座標にする（スクロールしていればその分ずらす）
+            camera_x, camera_y = self.camera_offset()
+            self.inputs.push_click(pyxel.mouse_x + camera_x, pyxel.mouse_y + camera_y)
+        if pyxel.btnp(pyxel.KEY_RETURN):
+            self.inputs.push_key(KEY_RETURN)
+        if pyxel.btnp(pyxel.KEY_SPACE):
+            self.inputs.push_key(KEY_SPACE)
+        if self.engine.scrolling:
+            for key, buttons in SCROLL_BUTTONS.items():
+                if any(pyxel.btnp(button, hold=10, repeat=3) for button in buttons):
+                    self.inputs.push_key(key)
+        if pyxel.btnp(pyxel.KEY_H):
+            self.show_hint()
+        if pyxel.btnp(pyxel.KEY_BACKSPACE):
+            self.rewind()
+        if pyxel.btnp(pyxel.KEY_F5):
+            self.suspend(SUSPEND_PATH)
+        if pyxel.btnp(pyxel.KEY_F9):
+            self.resume(SUSPEND_PATH)
+
+        for _ in range(steps):
+            clicks, keys = self.inputs.take()
+            if self.autoplayer is not None:
+                clicks.extend(self.autoplayer.next_clicks(self.engine))
+            self.step_engine(clicks, keys)
+            self.update_hint()
+
+    def step_engine(self, clicks, keys):
+        """入力を記録してゲーム本体を1ステップ進める"""
+        if self.recorder is not None:
+            self.recorder.record(self.engine.frame, clicks, keys)
+
+        prev_state = self.engine.game_state
+        self.engine.update(clicks, keys)
+
+        # ゲームオーバーになったら、そこまでの記録を保存
+        if (self.recorder is not None and prev_state != "game_over"
+                and self.engine.game_state == "game_over"):
+            self.save_recording()
+
+        if self.engine.game_state == "playing":
+            self.history.push(self.engine)
+        elif prev_state != "title" and self.engine.game_state == "title":
+            # 新しいゲームの前には戻れないようにする
+            self.history.clear()
+
+    def save_recording(self):
+        """ここまでの記録を保存する（保存済みの時点から進んでいなければ何もしない）"""
+        if self.recorder is None or self.recorder.recording.frames == self.engine.frame:
+            return
+        self.recorder.finish(self.engine).save(self.record_path)
+        print(f"{self.record_path} に記録しました")
+
+    def rewind(self):
+        """REWIND_STEPS ステップ前の状態に戻す（BACKSPACE キー）"""
+        engine = self.engine
+        frame = self.history.rewind(engine, engine.frame - REWIND_STEPS)
+        if frame is None:
+            return
+        # 戻った時点から先の保存と記録は捨てて、そこから分岐させる
+        self.history.truncate(frame + 1)
+        if self.recorder is not None:
+            self.recorder.truncate(frame)
+        self.after_restore()
+
+    def suspend(self, path):
+        """今の状態をファイルに保存する（F5 キー）"""
+        try:
+            with open(path, "wb") as f:
+                f.write(save(self.engine))
+        except OSError as e:
+            print(f"{path} に中断できません: {e}")
+            return
+        print(f"{path} に中断しました")
+
+    def resume(self, path):
+        """中断したときの状態に戻す（F9 キー・--resume）"""
+        try:
+            with open(path, "rb") as f:
+                restore(self.engine, f.read())
+        except (OSError, ValueError) as e:
+            print(f"{path} から再開できません: {e}")
+            return
+        self.history.clear()
+        if self.recorder is not None:
+            # 記録は最初からの入力でないと再生できないので、ここで止める
+            self.recorder = None
+            print("再開したので記録を中止しました")
+        self.after_restore()
+        print(f"{path} から再開しました")
+
+    def after_restore(self):
+        """スナップショットから戻したあとの表示・入力・効果音の後始末"""
+        self.inputs.clear()
+        self.sound.reset()
+        self.hint_timer = 0
+        self.hint_cells = []
+        if self.autoplayer is not None:
+            self.autoplayer.reset()
+
+    def show_hint(self):
+        """一番得点の高い役を一定時間ハイライト（H キー）"""
+        engine = self.engine
+        if engine.game_state != "playing":
+            return
+        best = self.solver.best_move(engine)
+        self.hint_cells = best[1] if best else []
+        self.hint_timer = 90  # 3秒間
+        self.hint_version = engine.board.version
+
+    def update_hint(self):
+        """ヒントの残り時間を1ステップ進める"""
+        engine = self.engine
+        if self.hint_timer > 0:
+            self.hint_timer -= 1
+            # 盤面が変わったらヒントは消す
+            if engine.board.version != self.hint_version or engine.game_state != "playing":
+                self.hint_timer = 0
+            if self.hint_timer == 0:
+                self.hint_cells = []
+
     def draw(self):
-        pyxel.cls(0)
-        
-        if self.game_state == "title":
-            self.draw_title()
-        elif self.game_state == "playing":
-            self.draw_playing()
-        elif self.game_state == "game_over":
-            self.draw_game_over()
+        with self.profiler.section("draw"):
+            # タイトル・ゲームオーバー画面はキャッシュで全面を塗るので消去不要
+            if self.engine.game_state == "title":
+                self.draw_title()
+            elif self.engine.game_state == "playing":
+                pyxel.cls(0)
+                self.draw_playing()
+            elif self.engine.game_state == "game_over":
+                self.draw_game_over()
+
+        if self.profiler.enabled:
+            self.draw_profiler_overlay()
+
+        # update から draw までの処理時間で、パーティクルの詳細度を調整
+        self.particle_lod.update((time.perf_counter() - self.work_start) * 1000)
+
+        # フレームで入力を読んでから、その結果を描き終えるまでの時間
+        # （押してから読むまでの最大1フレームの待ちは含まないので、実際の入力遅延より短い）
+        for ms in self.inputs.presented():
+            self.profiler.add_sample("input_to_draw", ms)
+        self.profiler.set_counter("input_dropped", self.inputs.dropped)
+
+        if self.first_frame_ms is None:
+            # 起動から最初の画面を描き終えるまでの時間
+            self.first_frame_ms = (time.perf_counter() - LAUNCH_TIME) * 1000
+            self.profiler.set_counter("first_frame_ms", round(self.first_frame_ms))
+            print(f"起動時間: {self.first_frame_ms:.0f}ms")
 
     def draw_title(self):
         """タイトル画面の描画"""
-        pyxel.cls(3)  # 濃い青の背景
-        
-        # タイトルロゴ
-        title_text = "HANAFUDA PON"
-        title_x = 128 - len(title_text) * 4 // 2
-        
-        # タイトルの影
-        pyxel.text(title_x + 1, 61, title_text, 0)
-        pyxel.text(title_x, 60, title_text, 10)
-        
-        # サブタイトル
-        subtitle = "Matching Game"
-        sub_x = 128 - len(subtitle) * 4 // 2
-        pyxel.text(sub_x, 80, subtitle, 14)
-        
+        # 動かない部分（背景・ロゴ・説明文・クレジット）はキャッシュから転送
+        self.title_layer.draw()
+
         # 花札の装飾表示（タイトル画面用）
         for i in range(6):
             x = 40 + i * 30
-            y = 100 + math.sin(self.title_timer * 0.05 + i * 0.5) * 5
+            y = 100 + math.sin(self.engine.title_timer * 0.05 + i * 0.5) * 5
             
             month_idx = i * 2
             if month_idx < len(self.months):
-                if hasattr(self, 'use_image_bank') and self.use_image_bank:
+                if self.use_image_bank:
                     # リソース画像を使用して装飾用花札を描画
                     card_num = 0  # 各月の最初のカード（光札など）を使用
                     
-                    # 画像の位置を計算（ゲーム本体と同じロジック）
-                    if month_idx < 6:  # 1-6月
-                        img_bank = 0
-                        row = month_idx // 2
-                        col_base = (month_idx % 2) * 4
-                        img_x = (col_base + card_num) * self.card_width
-                        img_y = row * self.card_height
-                    else:  # 7-12月
-                        img_bank = 1
-                        adjusted_month = month_idx - 6
-                        row = adjusted_month // 2
-                        col_base = (adjusted_month % 2) * 4
-                        img_x = (col_base + card_num) * self.card_width
-                        img_y = row * self.card_height
-                    
+                    img_bank, img_x, img_y = self.card_sprites[card_id(month_idx, card_num)]
+
                     # 小さめのサイズで描画（縮小して表示）
                     card_w, card_h = 32, 53
                     pyxel.blt(x, y, img_bank, img_x, img_y, card_w, card_h, None, None, 0.6)
@@ -517,136 +457,186 @@ class HanafudaPon:
                     month = self.months[month_idx]
                     pyxel.rect(x, y, 20, 32, 7)
                     pyxel.rectb(x, y, 20, 32, 1)
-                    pyxel.text(x + 6, y + 12, month, 8)
+                    self.glyphs.text(pyxel, x + 10 - GLYPH_WIDTH // 2, y + 14, month, 8)
         
-        # 操作説明
-        instructions = [
-            "How to Play:",
-            "Same month: Select 3 cards",
-            "Special combos: Select specific cards",
-            "Akatan/Aotan: 800pt  Inoshikacho: 2000pt",
-            "Sanko: 1000pt  Hanami/Tsukimi: 500pt",
-            "",
-            "SPACE or CLICK to Start"
-        ]
+        # 最後の行（スタート案内）を点滅させる
+        if (self.engine.title_timer // 4) % 2 == 0:
+            start_text = self.title_instructions[-1]
+            text_x = 128 - len(start_text) * 4 // 2
+            pyxel.text(text_x, 150 + (len(self.title_instructions) - 1) * 10, start_text, 7)
+
+    def draw_title_static(self, target):
+        """タイトル画面の動かない部分を描画（キャッシュ作成用）"""
+        target.cls(3)  # 濃い青の背景
+        
+        # タイトルロゴ
+        title_text = "HANAFUDA PON"
+        title_x = 128 - len(title_text) * 4 // 2
+        
+        # タイトルの影
+        target.text(title_x + 1, 61, title_text, 0)
+        target.text(title_x, 60, title_text, 10)
         
+        # サブタイトル
+        subtitle = "Matching Game"
+        sub_x = 128 - len(subtitle) * 4 // 2
+        target.text(sub_x, 80, subtitle, 14)
+        
+        # 操作説明（点滅するスタート案内以外）
         start_y = 150
-        for i, instruction in enumerate(instructions):
+        for i, instruction in enumerate(self.title_instructions[:-1]):
             text_x = 128 - len(instruction) * 4 // 2
-            color = 7 if i == len(instructions) - 1 else 7
-            
-            # 最後の行（スタート案内）を点滅させる
-            if i == len(instructions) - 1:
-                if (self.title_timer // 4) % 2 == 0:
-                    pyxel.text(text_x, start_y + i * 10, instruction, color)
-            else:
-                pyxel.text(text_x, start_y + i * 10, instruction, color)
+            target.text(text_x, start_y + i * 10, instruction, 7)
         
         # クレジット表示
-        pyxel.text(190, 217, "(V)1.7", 7)
-        pyxel.text(190, 225, "(C)2025 Saizo", 7)
+        target.text(190, 217, "(V)1.7", 7)
+        target.text(190, 225, "(C)2025 Saizo", 7)
+
+    def camera_offset(self):
+        """表示範囲の左上の盤面上の座標"""
+        engine = self.engine
+        return engine.view_col * self.card_width, engine.view_row * self.card_height
 
     def draw_playing(self):
         """プレイ中の描画"""
-        # 花札を描画
-        for card in self.cards:
-            if hasattr(self, 'use_image_bank') and self.use_image_bank:
-                # 画像データを使用して描画
-                month_idx = card['month_idx']  # 0-11 (1月-12月)
-                card_num = card['card_num']    # 0-3 (各月の1-4枚目)
-                
-                if month_idx < 6:  # 1-6月
-                    img_bank = 0
-                    row = month_idx // 2  # 0,1,2行目
-                    col_base = (month_idx % 2) * 4  # 0または4
-                    img_x = (col_base + card_num) * self.card_width
-                    img_y = row * self.card_height
-                else:  # 7-12月
-                    img_bank = 1
-                    adjusted_month = month_idx - 6
-                    row = adjusted_month // 2  # 0,1,2行目
-                    col_base = (adjusted_month % 2) * 4  # 0または4
-                    img_x = (col_base + card_num) * self.card_width
-                    img_y = row * self.card_height
-                
-                # 花札を描画
-                pyxel.blt(card['x'], card['y'], img_bank, img_x, img_y, self.card_width, self.card_height)
-                
-                # 選択状態の表示
-                if card['selected']:
-                    pyxel.rectb(card['x'], card['y'], self.card_width, self.card_height, 11)
-                    pyxel.rectb(card['x']+1, card['y']+1, self.card_width-2, self.card_height-2, 11)
-            else:
-                # 画像データがない場合は従来の描画方法
-                color = 11 if card['selected'] else 7
-                pyxel.rect(card['x'], card['y'], self.card_width, self.card_height, color)
-                pyxel.rectb(card['x'], card['y'], self.card_width, self.card_height, 1)
-                
-                # 月の文字を描画
-                text_x = card['x'] + self.card_width // 2 - 4
-                text_y = card['y'] + self.card_height // 2 - 4
-                pyxel.text(text_x, text_y, card['month'], 1)
-                
-                # カード番号も表示
-                num_text = str(card['card_num'] + 1)
-                pyxel.text(card['x'] + 2, card['y'] + 2, num_text, 8)
-        
+        profiler = self.profiler
+        engine = self.engine
+
+        # 花札を描画（変化したマスだけ描き直した盤面を1回で転送）
+        # ヒントとパーティクルは盤面の座標で描くので、表示範囲の分だけずらす
+        with profiler.section("draw_cards"):
+            self.board_layer.draw(view_col=engine.view_col, view_row=engine.view_row)
+            pyxel.camera(*self.camera_offset())
+            self.draw_hint()
+
         # パーティクルを描画
-        for particle in self.particles:
-            particle.draw()
-        
+        with profiler.section("draw_particles"):
+            self.draw_particles()
+            pyxel.camera()
+
         # UI表示
-        score_text = f"SCORE: {self.score:06d}"
-        pyxel.text(8, 230, score_text, 7)
-        
-        if self.bonus_timer > 0:
-            pyxel.text(8, 220, "BONUS x2!", 10)
-        
-        # 役成立メッセージの表示
-        if self.combo_message and self.combo_timer > 0:
-            msg_x = 128 - len(self.combo_message) * 4 // 2
-            # 背景
-            pyxel.rect(msg_x - 4, 46, len(self.combo_message) * 4 + 8, 12, 0)
-            pyxel.rectb(msg_x - 4, 46, len(self.combo_message) * 4 + 8, 12, 11)
-            # テキスト
-            pyxel.text(msg_x, 50, self.combo_message, 11)
-        
-        if self.selected_cards:
-            if len(self.selected_cards) == 1:
-                selected_text = f"選択: {len(self.selected_cards)}/3 ({self.selected_cards[0]['month']})"
-            else:
-                months = [card['month'] for card in self.selected_cards]
-                selected_text = f"選択: {len(self.selected_cards)}/3 ({', '.join(months)})"
-            pyxel.text(8, 200, selected_text, 12)
-        
+        with profiler.section("draw_hud"):
+            self.draw_hud()
+
         # マウスカーソル描画
-        self.draw_cursor()
+        with profiler.section("draw_cursor"):
+            self.draw_cursor()
+
+    def draw_hint(self):
+        """ヒントの花札を点滅する枠で表示"""
+        if not self.hint_cells or (self.hint_timer // 8) % 2:
+            return
+        for cell in self.hint_cells:
+            x, y = self.engine.board.cell_position(cell)
+            pyxel.rectb(x, y, self.card_width, self.card_height, 10)
+            pyxel.rectb(x + 1, y + 1, self.card_width - 2, self.card_height - 2, 10)
+
+    def draw_hud(self):
+        """スコア・ボーナス・役成立メッセージ・選択状況の描画（値が変わったときだけ作り直す）"""
+        self.hud.draw()
 
     def draw_game_over(self):
         """ゲームオーバー画面の描画"""
-        # ゲーム画面を暗く表示
-        self.draw_playing()
-        
+        # オーバーレイで盤面は完全に隠れるので、ゲームオーバー時の画面を
+        # 1度だけキャッシュに描いて転送する（最終スコアが変わったら描き直す）
+        self.game_over_layer.draw(key=self.engine.score)
+
+    def draw_game_over_static(self, target):
+        """ゲームオーバー画面を描画（キャッシュ作成用）"""
         # オーバーレイ
-        pyxel.rect(0, 0, 256, 240, 0)
+        target.rect(0, 0, 256, 240, 0)
         
         # ゲームオーバーボックス
         box_x, box_y = 64, 80
         box_w, box_h = 128, 80
         
-        pyxel.rect(box_x, box_y, box_w, box_h, 1)
-        pyxel.rectb(box_x, box_y, box_w, box_h, 7)
+        target.rect(box_x, box_y, box_w, box_h, 1)
+        target.rectb(box_x, box_y, box_w, box_h, 7)
         
         # テキスト
-        pyxel.text(100, 100, "GAME OVER", 8)
+        target.text(100, 100, "GAME OVER", 8)
         
-        final_score_text = f"FINAL SCORE: {self.score}"
+        final_score_text = f"FINAL SCORE: {self.engine.score}"
         score_x = 128 - len(final_score_text) * 4 // 2
-        pyxel.text(score_x, 120, final_score_text, 7)
+        target.text(score_x, 120, final_score_text, 7)
         
         restart_text = "Click to Return to Title"
         restart_x = 128 - len(restart_text) * 4 // 2
-        pyxel.text(restart_x, 140, restart_text, 11)
+        target.text(restart_x, 140, restart_text, 11)
+
+    def draw_particles(self):
+        """パーティクルの描画（サイズ1の rect は pset と同じ）"""
+        # 最後のステップからの経過時間の分だけ位置を補間する
+        for x, y, size, color in self.engine.particles.draw_list(self.clock.alpha):
+            pyxel.rect(x, y, size, size, color)
+
+    def draw_card(self, target, cell, x, y):
+        """
+        マスの花札を (x, y) に1枚描画
+        target: pyxel モジュールまたは pyxel.Image（オフスクリーン画像）
+        """
+        board = self.engine.board
+        card = board.cells[cell]
+        selected = board.is_selected(cell)
+        if self.use_image_bank:
+            # 画像データを使用して描画
+            img_bank, img_x, img_y = self.card_sprites[card]
+            target.blt(x, y, img_bank, img_x, img_y, self.card_width, self.card_height)
+
+            # 選択状態の表示
+            if selected:
+                target.rectb(x, y, self.card_width, self.card_height, 11)
+                target.rectb(x+1, y+1, self.card_width-2, self.card_height-2, 11)
+        else:
+            # 画像データがない場合は従来の描画方法
+            color = 11 if selected else 7
+            target.rect(x, y, self.card_width, self.card_height, color)
+            target.rectb(x, y, self.card_width, self.card_height, 1)
+
+            # 月の文字を描画
+            text_x = x + self.card_width // 2 - GLYPH_WIDTH // 2
+            text_y = y + self.card_height // 2 - 2
+            self.glyphs.text(target, text_x, text_y, self.engine.rules.card_month[card], 1)
+
+            # カード番号も表示
+            num_text = str(self.engine.rules.card_num[card] + 1)
+            target.text(x + 2, y + 2, num_text, 8)
+
+    def draw_profiler_overlay(self):
+        """処理時間の計測結果を画面右上に表示"""
+        profiler = self.profiler
+
+        # 文字列の作り直しは10フレームごと
+        if pyxel.frame_count % 10 == 0 or not self.overlay_lines:
+            lines = [f"{'SECTION(ms)':<14}{'AVG':>6}{'P95':>6}"]
+            for name in PROFILE_SECTIONS:
+                if name in profiler.samples:
+                    avg, p95, _ = profiler.stats(name)
+                    lines.append(f"{name:<14}{avg:6.2f}{p95:6.2f}")
+            for name, value in profiler.counters.items():
+                lines.append(f"{name:<20}{value:>6}")
+            if self.profile_message:
+                lines.append(self.profile_message)
+            self.overlay_lines = lines
+
+        x, y = 136, 2
+        text_height = len(self.overlay_lines) * 7
+        pyxel.rect(x - 2, y - 2, 120, text_height + 30, 0)
+        pyxel.rectb(x - 2, y - 2, 120, text_height + 30, 5)
+        for i, line in enumerate(self.overlay_lines):
+            pyxel.text(x, y + i * 7, line, 7)
+
+        # フレーム時間のヒストグラム（最後の棒が 33ms 超）
+        counts = profiler.histogram("frame")
+        total = max(1, sum(counts))
+        base_y = y + text_height + 20
+        labels = [str(edge) for edge in HISTOGRAM_EDGES] + ["+"]
+        for i, count in enumerate(counts):
+            bar_x = x + i * 16
+            bar_h = count * 18 // total
+            color = 8 if i == len(counts) - 1 else 11
+            pyxel.rect(bar_x, base_y - bar_h - 1, 10, bar_h + 1, color)
+            pyxel.text(bar_x, base_y + 1, labels[i], 13)
 
     def draw_cursor(self):
         """マウスカーソルの描画"""
@@ -660,5 +650,52 @@ class HanafudaPon:
             pyxel.line(mouse_x, mouse_y - 3, mouse_x, mouse_y + 3, 7)
             pyxel.pset(mouse_x, mouse_y, 11)
 
+def parse_seed(text):
+    """--seed は記録できる 0～2^64-1 の整数"""
+    seed = int(text)
+    if not 0 <= seed < 1 << 64:
+        raise argparse.ArgumentTypeError(f"シードは 0～{(1 << 64) - 1} で指定してください: {text}")
+    return seed
+
+
+def parse_decks(text):
+    """--decks は1以上"""
+    decks = int(text)
+    if decks < 1:
+        raise argparse.ArgumentTypeError(f"花札の組数は1以上で指定してください: {text}")
+    return decks
+
+
+def parse_board_size(text):
+    """--board の "64x64" を (64, 64) にする"""
+    try:
+        cols, rows = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"COLSxROWS の形式で指定してください: {text}")
+    if not (1 <= cols <= 255 and 1 <= rows <= 255):
+        raise argparse.ArgumentTypeError(f"列・行は 1～255 で指定してください: {text}")
+    return cols, rows
+
+
 if __name__ == "__main__":
-    HanafudaPon()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Hanafuda Pon")
+    parser.add_argument("--seed", type=parse_seed, help="乱数シード")
+    parser.add_argument("--record", metavar="PATH", help="プレイを記録するファイル")
+    parser.add_argument("--replay", metavar="PATH", help="再生するリプレイファイル")
+    parser.add_argument("--speed", type=int, default=1, help="再生時の倍速")
+    parser.add_argument("--profile", action="store_true", help="処理時間の計測を表示する")
+    parser.add_argument("--autoplay", action="store_true", help="ソルバーに自動でプレイさせる")
+    parser.add_argument("--fps", type=int, default=LOGIC_FPS,
+                        help="描画のフレームレート（ゲームの速さは変わらない）")
+    parser.add_argument("--resume", metavar="PATH", help="中断したファイル（F5 で保存）から再開する")
+    parser.add_argument("--telemetry", metavar="PATH", help="プレイデータを追記する JSON Lines ファイル")
+    parser.add_argument("--board", metavar="COLSxROWS", type=parse_board_size,
+                        help="盤面のマス数（例: 64x64。画面より大きければエンドレスモード）")
+    parser.add_argument("--decks", type=parse_decks, default=1, help="使う花札の組数")
+    args = parser.parse_args()
+
+    HanafudaPon(seed=args.seed, record_path=args.record,
+                replay=Recording.load(args.replay) if args.replay else None,
+                speed=args.speed, profile=args.profile, autoplay=args.autoplay,
+                fps=args.fps, resume_path=args.resume,
+                telemetry_path=args.telemetry, board_size=args.board, decks=args.decks)
\ No newline at end of file
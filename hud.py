@@ -0,0 +1,116 @@
+"""
+プレイ中の HUD（スコア・ボーナス・役成立メッセージ・選択状況・消せる役の数）
+
+各部品は表示する値が変わったときだけ文字列を作って小さな画像に描き、
+それ以外のフレームはその画像を blt するだけにします。
+毎フレームの文字列の生成や、メッセージ枠の位置の計算がなくなります。
+"""
+import pyxel
+
+from glyphs import GLYPH_HEIGHT, GLYPH_OFFSET_Y
+
+# 文字の大きさ（pyxel の標準フォント）
+CHAR_WIDTH = 4
+CHAR_HEIGHT = 6
+
+# 役成立メッセージの枠の高さ
+COMBO_HEIGHT = 16
+
+# 透明色（文字の部品の背景）
+TRANSPARENT = 0
+
+_UNSET = object()
+
+
+class HudWidget:
+    """値が変わったときだけ描き直す HUD の部品"""
+    def __init__(self, width, height, render, colkey=TRANSPARENT):
+        """
+        render: render(image, value) で image に描き、画面上の (x, y, 幅, 高さ) を返す関数
+        colkey: 透明にする色（None なら不透明）
+        """
+        self.image = pyxel.Image(width, height)
+        self.render = render
+        self.colkey = colkey
+        self.value = _UNSET
+        self.layout = (0, 0, 0, 0)
+
+    def draw(self, value):
+        """value が前回と違えば描き直してから画面に転送"""
+        if value != self.value:
+            self.value = value
+            self.image.cls(TRANSPARENT)
+            self.layout = self.render(self.image, value)
+        x, y, w, h = self.layout
+        pyxel.blt(x, y, self.image, 0, 0, w, h, self.colkey)
+
+
+class Hud:
+    def __init__(self, engine, glyphs):
+        """
+        glyphs: 漢字（月・選択・点）を描く GlyphAtlas
+        """
+        self.engine = engine
+        self.glyphs = glyphs
+        self.score = HudWidget(64, CHAR_HEIGHT, self.render_score)
+        self.bonus = HudWidget(64, CHAR_HEIGHT, self.render_bonus)
+        self.combo = HudWidget(256, COMBO_HEIGHT, self.render_combo, colkey=None)
+        self.selection = HudWidget(160, GLYPH_HEIGHT, self.render_selection)
+        self.moves = HudWidget(64, CHAR_HEIGHT, self.render_moves)
+
+    def draw(self):
+        engine = self.engine
+        self.score.draw(engine.score)
+
+        # 消せる役の数（索引から引くだけ）
+        if engine.board:
+            self.moves.draw(engine.matches.count)
+
+        if engine.bonus_timer > 0:
+            self.bonus.draw(engine.bonus_multiplier)
+
+        # 役成立メッセージの表示
+        if engine.combo_message and engine.combo_timer > 0:
+            self.combo.draw(engine.combo_message)
+
+        # 選択状況はカード ID の並び（選択順）が変わったときだけ作り直す
+        selected_cells = engine.selected_cells
+        if selected_cells:
+            cells = engine.board.cells
+            self.selection.draw(tuple([cells[cell] for cell in selected_cells]))
+
+    def render_score(self, image, score):
+        text = f"SCORE: {score:06d}"
+        image.text(0, 0, text, 7)
+        return 8, 230, len(text) * CHAR_WIDTH, CHAR_HEIGHT
+
+    def render_moves(self, image, count):
+        if count:
+            text = f"MOVES: {count}"
+            image.text(0, 0, text, 11)
+        else:
+            text = "NO MOVES"
+            image.text(0, 0, text, 8)
+        width = len(text) * CHAR_WIDTH
+        return 248 - width, 230, width, CHAR_HEIGHT
+
+    def render_bonus(self, image, multiplier):
+        text = f"BONUS x{multiplier}!"
+        image.text(0, 0, text, 10)
+        return 8, 220, len(text) * CHAR_WIDTH, CHAR_HEIGHT
+
+    def render_combo(self, image, message):
+        # 画面中央に、文字数に合わせた枠を置く（「点」の漢字が入る高さにする）
+        text_width = self.glyphs.text_width(message)
+        width = text_width + 8
+        image.rect(0, 0, width, COMBO_HEIGHT, 0)
+        image.rectb(0, 0, width, COMBO_HEIGHT, 11)
+        self.glyphs.text(image, 4, 3 - GLYPH_OFFSET_Y, message, 11)
+        return 128 - text_width // 2 - 4, 44, width, COMBO_HEIGHT
+
+    def render_selection(self, image, card_ids):
+        card_month = self.engine.rules.card_month
+        months = [card_month[card] for card in card_ids]
+        text = f"選択: {len(card_ids)}/3 ({', '.join(months)})"
+        width = self.glyphs.text(image, 0, -GLYPH_OFFSET_Y, text, 12)
+        return 8, 200 + GLYPH_OFFSET_Y, min(width, image.width), GLYPH_HEIGHT
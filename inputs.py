@@ -0,0 +1,89 @@
+"""
+入力イベントのキュー
+
+クリック・キー入力を、押された位置と時刻と一緒に届いた順に溜めておき、
+ゲームのステップごとに順番どおり取り出します。
+ステップが進まないフレームが続いても入力は失われず、1ステップに
+まとめて届いたクリックもすべて handle_click に渡ります。
+取り出した入力が画面に反映されるまでの時間も測ります。
+pyxel には依存しないので、画面なしのシミュレーションでも使えます。
+
+注意: pyxel は入力をフレームごとに1回まとめて調べるだけなので、
+- 1フレームの間に2回タップしても1回の入力になる
+- 時刻は押された瞬間ではなく、そのフレームで入力を読んだ時刻になる
+  （押してから読むまでの最大1フレームの待ちは、測った時間に含まれない）
+"""
+import time
+from collections import deque
+
+CLICK = "click"
+KEY = "key"
+
+
+class InputEvent:
+    __slots__ = ("kind", "x", "y", "key", "time")
+
+    def __init__(self, kind, x=0, y=0, key=None, time=0.0):
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.key = key
+        self.time = time  # 入力を読んだ時刻（秒。押された瞬間ではない）
+
+
+class InputQueue:
+    def __init__(self, max_events=64, time_func=time.perf_counter):
+        """
+        max_events: 溜めておける数（超えたら古いものから捨てる）
+        time_func: 現在時刻（秒）を返す関数
+        """
+        self.events = deque()
+        self.max_events = max_events
+        self.time_func = time_func
+        self.dropped = 0  # あふれて捨てた入力の累計
+        self.in_flight = []  # ゲームに渡して、まだ画面に出ていない入力の時刻
+
+    def __len__(self):
+        return len(self.events)
+
+    def clear(self):
+        self.events.clear()
+        self.in_flight = []
+
+    def push(self, event):
+        if len(self.events) >= self.max_events:
+            self.events.popleft()
+            self.dropped += 1
+        self.events.append(event)
+
+    def push_click(self, x, y):
+        self.push(InputEvent(CLICK, x, y, time=self.time_func()))
+
+    def push_key(self, key):
+        self.push(InputEvent(KEY, key=key, time=self.time_func()))
+
+    def take(self):
+        """溜まっている入力をすべて届いた順に取り出して (clicks, keys) を返す（1ステップ分）"""
+        clicks = []
+        keys = []
+        events = self.events
+        while events:
+            event = events.popleft()
+            if event.kind == CLICK:
+                clicks.append((event.x, event.y))
+            else:
+                keys.append(event.key)
+            self.in_flight.append(event.time)
+        return clicks, keys
+
+    def presented(self):
+        """
+        画面に描き終えたときに呼ぶ
+        前回からゲームに渡した入力ごとの、読んでから描き終えるまでの時間（ミリ秒）を返す
+        """
+        if not self.in_flight:
+            return []
+        now = self.time_func()
+        latencies = [(now - t) * 1000 for t in self.in_flight]
+        self.in_flight = []
+        return latencies
@@ -0,0 +1,251 @@
+"""
+パーティクルシステム（NumPy の配列でまとめて管理）
+
+位置・速度・ライフ・色・サイズを個別の配列に持ち、生成・更新・消去を
+配列演算で一括処理します。描画は pyxel 側で draw_list() の結果を使います。
+
+同時に存在できる数には上限（budget）があり、上限を超えるときは
+優先度の低いもの・寿命の残りが短いものから消して場所を空けます。
+詳細度（LOD）を上げると生成数・サイズ・寿命を減らします。
+LodController がフレームの処理時間を見て詳細度を自動で切り替えます。
+"""
+import numpy as np
+
+GRAVITY = 0.1
+AIR_RESISTANCE = 0.98  # 軽い空気抵抗
+
+# 同時に存在できるパーティクル数（LOD 0 のとき）
+DEFAULT_BUDGET = 384
+
+# 詳細度ごとの (生成数・上限の倍率, 最大サイズ, 寿命の倍率)
+LOD_LEVELS = [
+    (1.0, 3, 1.0),
+    (0.6, 3, 0.8),
+    (0.35, 2, 0.6),
+    (0.2, 1, 0.5),
+]
+
+# 優先度（大きいほど残りやすい）
+PRIORITY_NORMAL = 0
+PRIORITY_SPECIAL = 1
+
+# フェード用の色テーブル: FADE_RAMP[元の色, 段階] が表示色
+# 段階はライフの割合で 0: >0.7, 1: >0.4, 2: >0.2, 3: それ以下
+FADE_RAMP = np.array(
+    [[c, max(0, c - 1), max(0, c - 2), 0] for c in range(16)], dtype=np.uint8
+)
+
+
+class ParticlePool:
+    def __init__(self, capacity=512, seed=None, budget=DEFAULT_BUDGET):
+        """
+        budget: 同時に存在できる数の上限（None なら無制限）
+        """
+        self.seed = seed
+        self._rng = None  # 最初に生成するときに作る（演出なしのゲームでは作らない）
+        self.count = 0
+        self.budget = budget
+        self.lod = 0
+        self._allocate(capacity)
+
+    @property
+    def rng(self):
+        if self._rng is None:
+            self._rng = np.random.default_rng(self.seed)
+        return self._rng
+
+    def _allocate(self, capacity):
+        """配列を確保（既存の中身は引き継ぐ）"""
+        n = self.count
+        old = getattr(self, "x", None)
+        self.capacity = capacity
+
+        arrays = {
+            "x": np.float32, "y": np.float32,
+            "prev_x": np.float32, "prev_y": np.float32,  # 1ステップ前の位置（描画の補間用）
+            "vx": np.float32, "vy": np.float32,
+            "life": np.int16, "max_life": np.int16,
+            "color": np.uint8, "size": np.uint8, "priority": np.uint8,
+        }
+        for name, dtype in arrays.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                array[:n] = getattr(self, name)[:n]
+            setattr(self, name, array)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def limit(self):
+        """現在の詳細度での上限数（None なら無制限）"""
+        if self.budget is None:
+            return None
+        return int(self.budget * LOD_LEVELS[self.lod][0])
+
+    def set_lod(self, lod):
+        """詳細度を変える（上限を超えた分はすぐに消す）"""
+        self.lod = max(0, min(len(LOD_LEVELS) - 1, lod))
+        limit = self.limit()
+        if limit is not None and self.count > limit:
+            self._evict(self.count - limit)
+
+    def emit(self, cx, cy, count, colors, spread=8, priority=PRIORITY_NORMAL):
+        """
+        (cx, cy) の周囲に count 個のパーティクルを生成
+        count は詳細度に応じて減らし、上限を超える分は優先度の低いものを
+        消して空けるか、空けられなければ生成数を減らします
+        """
+        scale, max_size, life_scale = LOD_LEVELS[self.lod]
+        count = max(1, int(count * scale + 0.5))
+
+        limit = self.limit()
+        if limit is not None and self.count + count > limit:
+            self._evict(self.count + count - limit, priority)
+            count = min(count, limit - self.count)
+            if count <= 0:
+                return
+
+        n = self.count
+        if n + count > self.capacity:
+            self._allocate(max(self.capacity * 2, n + count))
+
+        rng = self.rng
+        end = n + count
+        self.x[n:end] = cx + rng.integers(-spread, spread + 1, count)
+        self.y[n:end] = cy + rng.integers(-spread, spread + 1, count)
+        self.prev_x[n:end] = self.x[n:end]
+        self.prev_y[n:end] = self.y[n:end]
+        self.vx[n:end] = rng.uniform(-3, 3, count)
+        self.vy[n:end] = rng.uniform(-4, -1, count)
+        life = rng.integers(int(30 * life_scale), int(60 * life_scale) + 1, count)  # フレーム数
+        self.life[n:end] = life
+        self.max_life[n:end] = life
+        self.color[n:end] = rng.choice(colors, count)
+        self.size[n:end] = rng.integers(1, max_size + 1, count)
+        self.priority[n:end] = priority
+        self.count = end
+
+    def _evict(self, need, priority=None):
+        """
+        優先度の低い順・寿命の残りが短い順に need 個まで消す
+        priority を指定したときは、それより優先度の低いものだけが対象
+        """
+        n = self.count
+        candidates = np.arange(n)
+        if priority is not None:
+            candidates = np.flatnonzero(self.priority[:n] < priority)
+            if len(candidates) == 0:
+                return
+        keys = self.priority[candidates].astype(np.int32) * 32768 + self.life[candidates]
+        victims = candidates[np.argsort(keys, kind="stable")[:need]]
+        alive = np.ones(n, dtype=bool)
+        alive[victims] = False
+        self._compact(alive)
+
+    def update(self):
+        """全パーティクルを1フレーム進め、寿命が尽きたものを詰める"""
+        n = self.count
+        if n == 0:
+            return
+
+        x, y = self.x[:n], self.y[:n]
+        vx, vy = self.vx[:n], self.vy[:n]
+        life = self.life[:n]
+
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        x += vx
+        y += vy
+        vy += GRAVITY
+        life -= 1
+        vx *= AIR_RESISTANCE
+
+        alive = life > 0
+        if alive.all():
+            return
+        self._compact(alive)
+
+    def _compact(self, alive):
+        """生きているものを前に詰める"""
+        keep = np.flatnonzero(alive)
+        k = len(keep)
+        for array in (self.x, self.y, self.prev_x, self.prev_y, self.vx, self.vy,
+                      self.life, self.max_life, self.color, self.size, self.priority):
+            array[:k] = array[keep]
+        self.count = k
+
+    def fade_colors(self):
+        """ライフに応じた表示色（色の明度で透明度を表現）"""
+        n = self.count
+        ratio = self.life[:n] / self.max_life[:n]
+        stage = (ratio <= 0.7).astype(np.uint8)
+        stage += ratio <= 0.4
+        stage += ratio <= 0.2
+        return FADE_RAMP[self.color[:n], stage]
+
+    def draw_list(self, alpha=1.0):
+        """
+        描画用に (x, y, サイズ, 色) のリストを返す
+        alpha: 1ステップ前の位置と現在の位置の間の補間の割合（1 なら現在の位置）
+        """
+        n = self.count
+        if n == 0:
+            return []
+        x, y = self.x[:n], self.y[:n]
+        if alpha < 1.0:
+            prev_x, prev_y = self.prev_x[:n], self.prev_y[:n]
+            x = prev_x + (x - prev_x) * alpha
+            y = prev_y + (y - prev_y) * alpha
+        return list(zip(
+            x.astype(np.int32).tolist(),
+            y.astype(np.int32).tolist(),
+            self.size[:n].tolist(),
+            self.fade_colors().tolist(),
+        ))
+
+
+class LodController:
+    """
+    フレームの処理時間に応じてパーティクルの詳細度を切り替える
+    処理時間の移動平均が target_ms を超え続けたら詳細度を1段下げ（LOD を上げ）、
+    target_ms の半分を下回り続けたら1段戻します。
+    行ったり来たりしないよう、戻すときは長めに様子を見ます。
+    """
+    def __init__(self, pool, target_ms=20.0, degrade_frames=10, recover_frames=90,
+                 smoothing=0.1):
+        """
+        pool: 詳細度を切り替える ParticlePool
+        target_ms: 1フレームの処理時間の目標（30fps の1フレームは約33ms）
+        """
+        self.pool = pool
+        self.target_ms = target_ms
+        self.degrade_frames = degrade_frames
+        self.recover_frames = recover_frames
+        self.smoothing = smoothing
+        self.average_ms = 0.0
+        self.over = 0  # 目標を超えた連続フレーム数
+        self.under = 0  # 余裕のある連続フレーム数
+
+    def update(self, work_ms):
+        """1フレームの処理時間（ミリ秒）を渡す"""
+        self.average_ms += (work_ms - self.average_ms) * self.smoothing
+        pool = self.pool
+
+        if self.average_ms > self.target_ms:
+            self.over += 1
+            self.under = 0
+            if self.over >= self.degrade_frames and pool.lod < len(LOD_LEVELS) - 1:
+                pool.set_lod(pool.lod + 1)
+                self.over = 0
+        elif self.average_ms < self.target_ms * 0.5:
+            self.under += 1
+            self.over = 0
+            if self.under >= self.recover_frames and pool.lod > 0:
+                pool.set_lod(pool.lod - 1)
+                self.under = 0
+        else:
+            self.over = 0
+            self.under = 0
@@ -0,0 +1,124 @@
+"""
+処理時間の計測
+
+区間ごとの処理時間を直近 window フレーム分だけ保持し、平均・パーセンタイル・
+ヒストグラムを求めます。無効のときは何も計測しません。
+pyxel には依存しないので、画面なしのシミュレーションでも使えます。
+"""
+import json
+import time
+from collections import deque
+
+# ヒストグラムの区切り（ミリ秒）
+HISTOGRAM_EDGES = [1, 2, 4, 8, 16, 33]
+
+
+class Section:
+    """with 文で区間の処理時間を計測する"""
+    def __init__(self, samples):
+        self.samples = samples
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append((time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class NullSection:
+    """無効時に使う、何もしない区間"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SECTION = NullSection()
+
+
+class Profiler:
+    def __init__(self, window=300, enabled=False):
+        """
+        window: 保持するサンプル数（30fps で 300 なら10秒分）
+        enabled: 最初から計測するか
+        """
+        self.window = window
+        self.enabled = enabled
+        self.samples = {}  # 区間名 -> 直近の処理時間（ミリ秒）
+        self.sections = {}  # 区間名 -> Section（使い回す）
+        self.counters = {}  # 表示用のカウンター
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    def get_samples(self, name):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        return samples
+
+    def section(self, name):
+        """区間の計測（with 文で使う）"""
+        if not self.enabled:
+            return NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = Section(self.get_samples(name))
+        return section
+
+    def add_sample(self, name, ms):
+        """外部で測った処理時間を記録"""
+        if self.enabled:
+            self.get_samples(name).append(ms)
+
+    def set_counter(self, name, value):
+        self.counters[name] = value
+
+    def clear(self):
+        self.samples.clear()
+        self.sections.clear()
+
+    def stats(self, name):
+        """(平均, 95パーセンタイル, 最大) をミリ秒で返す"""
+        samples = self.samples.get(name)
+        if not samples:
+            return 0.0, 0.0, 0.0
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return sum(ordered) / len(ordered), p95, ordered[-1]
+
+    def histogram(self, name):
+        """HISTOGRAM_EDGES で区切ったサンプル数（最後は 33ms 超）"""
+        counts = [0] * (len(HISTOGRAM_EDGES) + 1)
+        for ms in self.samples.get(name, ()):
+            for i, edge in enumerate(HISTOGRAM_EDGES):
+                if ms < edge:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def dump(self, path):
+        """サンプルと集計結果を JSON で保存"""
+        data = {
+            "window": self.window,
+            "histogram_edges_ms": HISTOGRAM_EDGES,
+            "counters": self.counters,
+            "sections": {},
+        }
+        for name, samples in self.samples.items():
+            avg, p95, worst = self.stats(name)
+            data["sections"][name] = {
+                "avg_ms": avg,
+                "p95_ms": p95,
+                "max_ms": worst,
+                "histogram": self.histogram(name),
+                "samples_ms": list(samples),
+            }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
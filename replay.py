@@ -0,0 +1,231 @@
+"""
+プレイの記録と再生
+
+乱数シードと入力のあったフレームだけを小さなバイナリファイルに記録し、
+GameEngine で再実行して最終スコアと盤面が一致するか確認します。
+入力のないフレームは GameEngine.advance() でまとめて飛ばすので、
+画面なしの再生は一瞬で終わります。
+
+使い方:
+    python hanafudaPon.py --record play.hpr      # 記録しながらプレイ
+    python replay.py play.hpr                    # 画面なしで再生して検証
+    python replay.py play.hpr --visual --speed 4 # 4倍速で画面に再生
+"""
+import argparse
+import struct
+import sys
+import time
+
+from engine import (GameEngine, KEY_DOWN, KEY_LEFT, KEY_RETURN, KEY_RIGHT, KEY_SPACE,
+                    KEY_UP, VIEW_COLS, VIEW_ROWS)
+
+MAGIC = b"HPRP"
+VERSION = 2
+
+# 入力フラグ（下位6ビットがキー、残りがクリック数）
+# バージョン1 のファイルはキーが RETURN / SPACE の2ビットだけ
+KEY_FLAGS = [KEY_RETURN, KEY_SPACE, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN]
+CLICK_SHIFT = 6
+CLICK_SHIFT_V1 = 2
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class Recording:
+    def __init__(self, seed, events=None, frames=0, score=0, digest=0,
+                 cols=VIEW_COLS, rows=VIEW_ROWS, decks=1, max_cards=0):
+        """
+        seed: GameEngine に渡した乱数シード
+        events: (フレーム番号, クリック位置のリスト, キー名のリスト) のリスト
+        frames / score / digest: 記録終了時点のフレーム数・スコア・状態チェックサム
+        cols / rows / decks / max_cards: GameEngine に渡した盤面の設定（max_cards 0 は rules.json の値）
+        """
+        self.seed = seed
+        self.cols = cols
+        self.rows = rows
+        self.decks = decks
+        self.max_cards = max_cards
+        self.events = events if events is not None else []
+        self.frames = frames
+        self.score = score
+        self.digest = digest
+
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        out += struct.pack("<BQ", VERSION, self.seed)
+        out += struct.pack("<HHHH", self.cols, self.rows, self.decks, self.max_cards)
+        write_varint(out, len(self.events))
+
+        last_frame = 0
+        for frame, clicks, keys in self.events:
+            write_varint(out, frame - last_frame)
+            last_frame = frame
+            flags = len(clicks) << CLICK_SHIFT
+            for bit, key in enumerate(KEY_FLAGS):
+                if key in keys:
+                    flags |= 1 << bit
+            write_varint(out, flags)
+            for x, y in clicks:
+                out += struct.pack("<hh", x, y)
+
+        write_varint(out, self.frames)
+        out += struct.pack("<QI", self.score, self.digest)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("リプレイファイルではありません")
+        version, seed = struct.unpack_from("<BQ", data, 4)
+        if version not in (1, VERSION):
+            raise ValueError(f"未対応のリプレイ形式です: {version}")
+        pos = 4 + struct.calcsize("<BQ")
+        board = (VIEW_COLS, VIEW_ROWS, 1, 0)
+        if version >= 2:
+            board = struct.unpack_from("<HHHH", data, pos)
+            pos += struct.calcsize("<HHHH")
+        click_shift = CLICK_SHIFT if version >= 2 else CLICK_SHIFT_V1
+        count, pos = read_varint(data, pos)
+
+        events = []
+        frame = 0
+        for _ in range(count):
+            delta, pos = read_varint(data, pos)
+            frame += delta
+            if version >= 2:
+                flags, pos = read_varint(data, pos)
+            else:
+                flags = data[pos]
+                pos += 1
+            keys = [key for bit, key in enumerate(KEY_FLAGS[:click_shift]) if flags >> bit & 1]
+            clicks = []
+            for _ in range(flags >> click_shift):
+                clicks.append(struct.unpack_from("<hh", data, pos))
+                pos += 4
+            events.append((frame, clicks, keys))
+
+        frames, pos = read_varint(data, pos)
+        score, digest = struct.unpack_from("<QI", data, pos)
+        return cls(seed, events, frames, score, digest, *board)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    """プレイ中の入力を記録する"""
+    def __init__(self, seed, engine=None):
+        """engine: 盤面の設定を記録する GameEngine（None なら標準の盤面）"""
+        self.recording = Recording(seed)
+        if engine is not None:
+            self.recording.cols = engine.cards_per_row
+            self.recording.rows = engine.max_rows
+            self.recording.decks = engine.decks
+            self.recording.max_cards = engine.max_cards
+
+    def record(self, frame, clicks, keys):
+        """frame: update() を呼ぶ前の GameEngine.frame"""
+        if clicks or keys:
+            self.recording.events.append((frame, list(clicks), list(keys)))
+
+    def truncate(self, frame):
+        """frame 以降の入力を捨てる（巻き戻した後の分岐用）"""
+        events = self.recording.events
+        while events and events[-1][0] >= frame:
+            events.pop()
+
+    def finish(self, engine):
+        """現在の状態を最終結果として記録"""
+        self.recording.frames = engine.frame
+        self.recording.score = engine.score
+        self.recording.digest = engine.state_digest()
+        return self.recording
+
+
+class Player:
+    """記録を1フレームずつ取り出す（画面に再生する場合用）"""
+    def __init__(self, recording):
+        self.recording = recording
+        self.index = 0
+
+    def finished(self, engine):
+        return engine.frame >= self.recording.frames
+
+    def next_input(self, engine):
+        """engine の次のフレームの入力 (clicks, keys)"""
+        events = self.recording.events
+        if self.index < len(events) and events[self.index][0] == engine.frame:
+            _, clicks, keys = events[self.index]
+            self.index += 1
+            return clicks, keys
+        return (), ()
+
+
+def replay(recording, effects=False, rules=None):
+    """記録を画面なしで最後まで再実行して GameEngine を返す"""
+    engine = GameEngine(seed=recording.seed, effects=effects, rules=rules,
+                        cols=recording.cols, rows=recording.rows, decks=recording.decks,
+                        max_cards=recording.max_cards or None)
+    for frame, clicks, keys in recording.events:
+        engine.advance(frame - engine.frame)
+        engine.update(clicks, keys)
+    engine.advance(recording.frames - engine.frame)
+    return engine
+
+
+def verify(recording, rules=None):
+    """再実行した結果が記録と一致するか"""
+    engine = replay(recording, rules=rules)
+    return engine.score == recording.score and engine.state_digest() == recording.digest, engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="花札ポンのリプレイ再生")
+    parser.add_argument("path", help="リプレイファイル")
+    parser.add_argument("--visual", action="store_true", help="画面に表示して再生する")
+    parser.add_argument("--speed", type=int, default=1, help="画面再生時の倍速")
+    args = parser.parse_args()
+
+    recording = Recording.load(args.path)
+
+    if args.visual:
+        from hanafudaPon import HanafudaPon
+        HanafudaPon(replay=recording, speed=args.speed)
+        return
+
+    start = time.perf_counter()
+    ok, engine = verify(recording)
+    elapsed = time.perf_counter() - start
+
+    print(f"フレーム数: {engine.frame}  入力数: {len(recording.events)}  "
+          f"再生時間: {elapsed * 1000:.2f}ms")
+    print(f"スコア: {engine.score} (記録: {recording.score})")
+    print("一致しました" if ok else "記録と一致しません")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+リソースファイルの遅延読み込み
+
+.pyxres は zip の中に pyxel_resource.toml が入った形式です。
+ファイルの確認（zip の展開と、花札に必要なイメージバンクがあるか）は
+バックグラウンドのスレッドで行い、最初の画面を待たせません。
+TOML 全体の解析は重い（画像データだけで数百 ms）ので、確認では
+各イメージバンクの見出しの width / height だけを読みます。
+pyxel.load() はメインスレッドでしか呼べないので、確認が終わったあとの
+フレームで apply() を呼んで読み込みます。
+Web 版（Pyodide）のようにスレッドを起動できない環境では、確認も
+apply() の中でメインスレッドで行います。
+"""
+import re
+import threading
+import time
+import zipfile
+
+RESOURCE_TOML = "pyxel_resource.toml"
+
+IMAGE_SIZE_PATTERN = re.compile(r"^width = (\d+)\s*^height = (\d+)", re.MULTILINE)
+
+
+class ResourceError(Exception):
+    """リソースファイルが使えない"""
+
+
+def validate_resource(path, banks, min_width, min_height):
+    """
+    リソースファイルを確認して、使えなければ ResourceError を送出
+    banks: 使うイメージバンクの番号
+    min_width / min_height: 各イメージバンクに必要な大きさ
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            text = archive.read(RESOURCE_TOML).decode("utf-8")
+    except FileNotFoundError:
+        raise ResourceError(f"{path} が見つかりません")
+    except (OSError, zipfile.BadZipFile, KeyError, UnicodeDecodeError) as e:
+        raise ResourceError(f"{path} を開けません: {e}")
+
+    # [[images]] の見出しごとに区切る（先頭は format_version など）
+    images = text.split("[[images]]")[1:]
+    for bank in banks:
+        if bank >= len(images):
+            raise ResourceError(f"{path} にイメージバンク{bank}がありません")
+        match = IMAGE_SIZE_PATTERN.search(images[bank], 0, 200)
+        if match is None:
+            raise ResourceError(f"{path} のイメージバンク{bank}の形式が正しくありません")
+        width, height = int(match.group(1)), int(match.group(2))
+        if width < min_width or height < min_height:
+            raise ResourceError(
+                f"{path} のイメージバンク{bank}が小さすぎます "
+                f"({width}x{height}、{min_width}x{min_height} 以上が必要)")
+
+
+class ResourceLoader:
+    """リソースファイルをバックグラウンドで確認し、準備ができたら読み込む"""
+    def __init__(self, path, load, banks=(0,), min_width=0, min_height=0):
+        """
+        load: メインスレッドで実際に読み込む関数（pyxel.load など）
+        """
+        self.path = path
+        self.load = load
+        self.banks = banks
+        self.min_width = min_width
+        self.min_height = min_height
+        self.state = "pending"  # "pending", "checking", "checked", "ready", "failed"
+        self.error = None
+        self.started = None
+        self.load_ms = 0.0  # 確認開始から読み込み完了までの時間
+        self.thread = None
+        self.done = False  # 読み込みか失敗の結果を apply() で返したか
+
+    def start(self):
+        """バックグラウンドで確認を始める"""
+        self.state = "checking"
+        self.started = time.perf_counter()
+        thread = threading.Thread(target=self.check, daemon=True)
+        try:
+            thread.start()
+        except RuntimeError:
+            # スレッドが使えない（Web 版など）ときは apply() で確認する
+            return
+        self.thread = thread
+
+    def wait(self):
+        """バックグラウンドの確認が終わるまで待つ（計測・テスト用）"""
+        if self.thread is not None:
+            self.thread.join()
+
+    def check(self):
+        try:
+            validate_resource(self.path, self.banks, self.min_width, self.min_height)
+        except ResourceError as e:
+            self.error = e
+            self.state = "failed"
+        else:
+            self.state = "checked"
+
+    def apply(self):
+        """
+        確認が終わっていればメインスレッドで読み込む
+        読み込みが済んだとき・失敗が分かったときに、1度だけ "ready" / "failed" を返す
+        """
+        if self.done:
+            return None
+        if self.state == "checking":
+            if self.thread is not None:
+                return None
+            self.check()
+        if self.state == "checked":
+            try:
+                self.load(self.path)
+            except (OSError, RuntimeError, ValueError) as e:
+                self.error = ResourceError(f"{self.path} を読み込めません: {e}")
+                self.state = "failed"
+            else:
+                self.state = "ready"
+                self.load_ms = (time.perf_counter() - self.started) * 1000
+        self.done = True
+        return self.state
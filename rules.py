@@ -0,0 +1,163 @@
+"""
+花札の役ルール
+
+役の定義は rules.json から読み込み、起動時に「2枚・3枚の選択すべて」に
+対する役を引ける辞書にコンパイルします。
+カードは月番号 * 4 + カード番号 の ID（0～47）で表し、選択したカードの
+ID を昇順に並べたタプル（重複あり）をキーにするので、判定は1回の辞書引きです。
+ルールを変えたい場合は rules.json を差し替えるだけで済みます。
+"""
+import json
+import os
+from itertools import combinations_with_replacement
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+CARDS_PER_MONTH = 4
+
+# 役なしの判定結果 (得点, 役名, 特殊役か)
+NO_YAKU = (0, "", False)
+
+# カードの種類のフラグ（RuleSet.card_flags）
+FLAG_LIGHT = 1
+FLAG_TAN = 2
+FLAG_TANE = 4
+
+# 短冊として扱う種類
+TAN_TYPES = ("タン", "Akatan", "Aotan")
+
+
+def card_id(month_idx, card_num):
+    """月番号とカード番号からカード ID を求める"""
+    return month_idx * CARDS_PER_MONTH + card_num
+
+
+class RuleSet:
+    def __init__(self, data):
+        self.months = list(data["months"])
+        self.card_types = {month: list(types) for month, types in data["card_types"].items()}
+        self.light_cards = [tuple(card) for card in data["light_cards"]]
+        # special: 特殊役（派手な演出・コンボ表示・優先度の高い効果音）。省略時は名前のある役
+        self.yaku = [dict(yaku, special=yaku.get("special", bool(yaku["name"])))
+                     for yaku in data["yaku"]]
+
+        bonus = data.get("bonus", {})
+        self.bonus_min_score = bonus.get("min_score", 1000)
+        self.bonus_frames = bonus.get("frames", 600)
+        self.bonus_multiplier = bonus.get("multiplier", 2)
+
+        # 難易度（スポーン間隔は spawn_step ずつ min_spawn_interval まで短くなる）
+        difficulty = data.get("difficulty", {})
+        self.spawn_interval = difficulty.get("spawn_interval", 90)
+        self.min_spawn_interval = difficulty.get("min_spawn_interval", 30)
+        self.spawn_step = difficulty.get("spawn_step", 1)
+        self.max_cards = difficulty.get("max_cards", 32)
+        # あと1枚でゲームオーバーかつ消せる役がないとき、スポーンを待たずに終える
+        self.end_on_dead_board = difficulty.get("end_on_dead_board", False)
+
+        for month in self.months:
+            if len(self.card_types.get(month, ())) != CARDS_PER_MONTH:
+                raise ValueError(f"card_types に {month} の4枚分の定義がありません")
+
+        self.num_cards = len(self.months) * CARDS_PER_MONTH
+        self.build_card_tables()
+        self.table = self.compile()
+
+    def build_card_tables(self):
+        """カード ID ごとの属性表を作る（判定や描画で文字列の辞書を引かないため）"""
+        lights = {self.to_id(card) for card in self.light_cards}
+        self.card_month = []  # 月名
+        self.card_type = []  # 種類名
+        month_idx = bytearray()
+        card_num = bytearray()
+        flags = bytearray()
+        for i, month in enumerate(self.months):
+            for num, card_type in enumerate(self.card_types[month]):
+                self.card_month.append(month)
+                self.card_type.append(card_type)
+                month_idx.append(i)
+                card_num.append(num)
+                flag = 0
+                if card_id(i, num) in lights:
+                    flag |= FLAG_LIGHT
+                if card_type in TAN_TYPES:
+                    flag |= FLAG_TAN
+                if card_type == "タネ":
+                    flag |= FLAG_TANE
+                flags.append(flag)
+        self.card_month_idx = bytes(month_idx)  # 月番号
+        self.card_num = bytes(card_num)  # 月の中のカード番号
+        self.card_flags = bytes(flags)
+
+    def to_id(self, card):
+        """(月名, カード番号) をカード ID に変換"""
+        month, card_num = card
+        if month not in self.months:
+            raise ValueError(f"未定義の月です: {month}")
+        return card_id(self.months.index(month), card_num)
+
+    def compile(self):
+        """2枚・3枚の組み合わせすべてを判定して、役になるものを辞書にまとめる"""
+        matchers = []
+        for yaku in self.yaku:
+            matchers.append((self.make_matcher(yaku),
+                             (yaku["score"], yaku["name"], bool(yaku["special"]))))
+
+        table = {}
+        for count in (2, 3):
+            for key in combinations_with_replacement(range(self.num_cards), count):
+                # 定義順で最初に一致した役を採用
+                for matcher, result in matchers:
+                    if matcher(key):
+                        table[key] = result
+                        break
+        return table
+
+    def make_matcher(self, yaku):
+        """役の定義から、ID タプルを受け取って一致を返す関数を作る"""
+        match = yaku["match"]
+        card_months = self.card_month_idx
+        card_types = self.card_type
+        flags = self.card_flags
+
+        if match == "cards":
+            # 指定カードの組み合わせと完全一致
+            required = tuple(sorted(self.to_id(card) for card in yaku["cards"]))
+            return lambda key: key == required
+
+        count = yaku.get("count", 3)
+        if match == "light":
+            # 光札だけで count 枚（重複OK）
+            return lambda key: len(key) == count and all(flags[c] & FLAG_LIGHT for c in key)
+        if match == "type":
+            # 指定タイプだけで count 枚（重複OK）
+            card_type = yaku["type"]
+            return lambda key: len(key) == count and all(card_types[c] == card_type for c in key)
+        if match == "same_month":
+            # 同じ月だけで count 枚
+            return lambda key: (len(key) == count and
+                                all(card_months[c] == card_months[key[0]] for c in key))
+
+        raise ValueError(f"未対応の役の種類です: {match}")
+
+    def evaluate(self, ids):
+        """選択したカード ID の役を判定して (得点, 役名, 特殊役か) を返す"""
+        return self.table.get(tuple(sorted(ids)), NO_YAKU)
+
+
+# コンパイル済みルールのキャッシュ（ファイルパス -> RuleSet）
+_loaded_rules = {}
+
+
+def read_rules_data(path=DEFAULT_RULES_PATH):
+    """ルールファイルをコンパイルせずに辞書で読み込む（一部を書き換えて使う場合用）"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    """ルールファイルを読み込んでコンパイル（同じファイルは1度だけ）"""
+    path = os.path.abspath(path)
+    if path not in _loaded_rules:
+        _loaded_rules[path] = RuleSet(read_rules_data(path))
+    return _loaded_rules[path]
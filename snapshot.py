@@ -0,0 +1,309 @@
+"""
+ゲーム状態のスナップショット
+
+GameEngine の状態（デッキの順番・盤面・空きマスの順番・選択・スコア・表示範囲・
+タイマー・乱数の状態、必要ならパーティクル）を小さなバイナリにして、
+そのまま同じ状態に戻せるようにします。
+空きマスの順番と乱数の状態も保存するので、復元後は元のゲームと
+まったく同じように進みます。
+
+SnapshotRing は直近のスナップショットを一定間隔で持っておき、
+巻き戻しや、過去のフレームからの入力のやり直しに使います。
+"""
+import struct
+from array import array
+from collections import deque
+
+import numpy as np
+
+from board import EMPTY
+from particles import LOD_LEVELS
+
+MAGIC = b"HPSS"
+VERSION = 2
+
+# EMPTY（-1）をバイト列にしたときの値
+EMPTY_BYTE = EMPTY & 0xFF
+
+GAME_STATES = ["title", "playing", "game_over"]
+
+# magic, version, flags, state, frame, score, spawn_timer, spawn_interval,
+# bonus_timer, bonus_multiplier, combo_timer, title_timer, 表示範囲の列・行,
+# マス数, デッキ枚数, 空きマス数, 選択枚数, 役の種類数, メッセージのバイト数
+HEADER = struct.Struct("<4sBBBIQiiiiiiHHHHHBBH")
+
+FLAG_GAUSS = 1  # random.Random の gauss_next がある
+FLAG_PARTICLES = 2  # パーティクルを含む
+FLAG_PARTICLE_RNG = 4  # パーティクルの乱数が作られている
+
+RNG_STATE = struct.Struct("<625I")
+GAUSS = struct.Struct("<d")
+YAKU_COUNT = struct.Struct("<BI")
+PCG_STATE = struct.Struct("<16s16sBI")
+PARTICLE_HEADER = struct.Struct("<IB")  # パーティクル数, 詳細度
+
+# パーティクルの配列（ParticlePool の属性名）
+PARTICLE_ARRAYS = ["x", "y", "prev_x", "prev_y", "vx", "vy",
+                   "life", "max_life", "color", "size", "priority"]
+
+
+def save(engine, particles=False):
+    """engine の状態をバイナリにする"""
+    board = engine.board
+    version, rng_state, gauss = engine.rng.getstate()
+    message = engine.combo_message.encode("utf-8")
+
+    # 役の回数は rules.yaku の並び順で保存する
+    names = [yaku["name"] for yaku in engine.rules.yaku]
+    yaku_counts = [(names.index(name), count) for name, count in engine.yaku_counts.items()
+                   if name in names]
+
+    pool = engine.particles
+    flags = 0
+    if gauss is not None:
+        flags |= FLAG_GAUSS
+    if particles:
+        flags |= FLAG_PARTICLES
+        if pool._rng is not None:
+            flags |= FLAG_PARTICLE_RNG
+
+    out = bytearray(HEADER.pack(
+        MAGIC, VERSION, flags, GAME_STATES.index(engine.game_state),
+        engine.frame, engine.score, engine.spawn_timer, engine.spawn_interval,
+        engine.bonus_timer, engine.bonus_multiplier, engine.combo_timer, engine.title_timer,
+        engine.view_col, engine.view_row, len(board.cells), len(engine.deck), len(board.free), len(engine.selected_cells),
+        len(yaku_counts), len(message)))
+    out += board.cells.tobytes()
+    out += bytes(engine.deck)
+    # マスの番号は大きな盤面では 255 を超えるので2バイトで保存する
+    out += array("H", board.free).tobytes()
+    out += array("H", engine.selected_cells).tobytes()
+    out += message
+    for index, count in yaku_counts:
+        out += YAKU_COUNT.pack(index, count)
+    out += RNG_STATE.pack(*rng_state)
+    if gauss is not None:
+        out += GAUSS.pack(gauss)
+
+    if particles:
+        n = pool.count
+        out += PARTICLE_HEADER.pack(n, pool.lod)
+        for name in PARTICLE_ARRAYS:
+            out += getattr(pool, name)[:n].tobytes()
+        if pool._rng is not None:
+            state = pool._rng.bit_generator.state
+            out += PCG_STATE.pack(state["state"]["state"].to_bytes(16, "little"),
+                                  state["state"]["inc"].to_bytes(16, "little"),
+                                  state["has_uint32"], state["uinteger"])
+    return bytes(out)
+
+
+def restore(engine, data):
+    """
+    save() で作ったバイナリの状態に engine を戻す
+    壊れた・途中で切れたデータなら、engine を変えずに ValueError を送出
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("スナップショットが途中で切れています")
+    (magic, version, flags, state, frame, score, spawn_timer, spawn_interval,
+     bonus_timer, bonus_multiplier, combo_timer, title_timer, view_col, view_row,
+     num_cells, deck_len, free_len, selected_len, yaku_len, message_len) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("スナップショットではありません")
+    if version != VERSION:
+        raise ValueError(f"未対応のスナップショット形式です: {version}")
+    board = engine.board
+    if num_cells != len(board.cells):
+        raise ValueError(f"盤面の大きさが違います: {num_cells}")
+    if state >= len(GAME_STATES):
+        raise ValueError(f"ゲームの状態が正しくありません: {state}")
+
+    pos = HEADER.size
+    size = (num_cells + deck_len + (free_len + selected_len) * 2 + message_len
+            + yaku_len * YAKU_COUNT.size + RNG_STATE.size)
+    if flags & FLAG_GAUSS:
+        size += GAUSS.size
+    if len(data) < pos + size:
+        raise ValueError("スナップショットが途中で切れています")
+
+    cells = bytes(data[pos:pos + num_cells])
+    pos += num_cells
+    deck = bytes(data[pos:pos + deck_len])
+    pos += deck_len
+    free = array("H", data[pos:pos + free_len * 2])
+    pos += free_len * 2
+    selected_cells = array("H", data[pos:pos + selected_len * 2]).tolist()
+    pos += selected_len * 2
+    message = bytes(data[pos:pos + message_len]).decode("utf-8")
+    pos += message_len
+    yaku_counts = []
+    for _ in range(yaku_len):
+        yaku_counts.append(YAKU_COUNT.unpack_from(data, pos))
+        pos += YAKU_COUNT.size
+    rng_state = RNG_STATE.unpack_from(data, pos)
+    pos += RNG_STATE.size
+    gauss = None
+    if flags & FLAG_GAUSS:
+        gauss, = GAUSS.unpack_from(data, pos)
+        pos += GAUSS.size
+
+    # 中身を確かめてから engine を書き換える（途中で失敗して中途半端な状態にしない）
+    card_bytes = bytes(range(engine.rules.num_cards))
+    if cells.translate(None, card_bytes + bytes([EMPTY_BYTE])) or deck.translate(None, card_bytes):
+        raise ValueError("存在しないカードがあります")
+    if (free_len != cells.count(EMPTY_BYTE) or max(free, default=0) >= num_cells
+            or len(set(free)) != free_len or any(cells[cell] != EMPTY_BYTE for cell in free)):
+        raise ValueError("空きマスの一覧が盤面と合いません")
+    if (len(set(selected_cells)) != selected_len
+            or any(cell >= num_cells or cells[cell] == EMPTY_BYTE for cell in selected_cells)):
+        raise ValueError("選択中のマスが正しくありません")
+    names = [yaku["name"] for yaku in engine.rules.yaku]
+    if any(index >= len(names) for index, _ in yaku_counts):
+        raise ValueError("役の番号が正しくありません")
+    if (view_col > engine.cards_per_row - engine.view_cols
+            or view_row > engine.max_rows - engine.view_rows):
+        raise ValueError("表示範囲が盤面の外です")
+    if rng_state[-1] > len(rng_state) - 1:
+        raise ValueError("乱数の状態が正しくありません")
+    if flags & FLAG_PARTICLES:
+        check_particles(engine.particles, data, pos, flags)
+
+    engine.game_state = GAME_STATES[state]
+    engine.frame = frame
+    engine.score = score
+    engine.spawn_timer = spawn_timer
+    engine.spawn_interval = spawn_interval
+    engine.bonus_timer = bonus_timer
+    engine.bonus_multiplier = bonus_multiplier
+    engine.combo_timer = combo_timer
+    engine.combo_message = message
+    engine.title_timer = title_timer
+    engine.view_col = view_col
+    engine.view_row = view_row
+    engine.deck = list(deck)
+    engine.rng.setstate((3, rng_state, gauss))
+
+    # 役の索引は盤面から作り直さず、入れ替わったマスの分だけ差分で更新する
+    # （近いフレームへの巻き戻しなら数枚で済む）
+    matches = engine.matches
+    for old, new in zip(board.cells.tobytes(), cells):
+        if old != new:
+            if old != EMPTY_BYTE:
+                matches.remove(old)
+            if new != EMPTY_BYTE:
+                matches.add(new)
+
+    selected = 0
+    for cell in selected_cells:
+        selected |= 1 << cell
+    board.load(cells, free, selected)
+    engine.selected_cells = selected_cells
+
+    engine.yaku_counts.clear()
+    for index, count in yaku_counts:
+        engine.yaku_counts[names[index]] = count
+
+    if flags & FLAG_PARTICLES:
+        pos = restore_particles(engine.particles, data, pos, flags)
+    else:
+        engine.particles.clear()
+    engine.sounds = []
+    return pos
+
+
+def check_particles(pool, data, pos, flags):
+    """パーティクルの部分が途中で切れていないか（壊れていれば ValueError）"""
+    if len(data) < pos + PARTICLE_HEADER.size:
+        raise ValueError("パーティクルの状態が途中で切れています")
+    n, lod = PARTICLE_HEADER.unpack_from(data, pos)
+    if lod >= len(LOD_LEVELS):
+        raise ValueError(f"パーティクルの詳細度が正しくありません: {lod}")
+    size = PARTICLE_HEADER.size + n * sum(getattr(pool, name).itemsize for name in PARTICLE_ARRAYS)
+    if flags & FLAG_PARTICLE_RNG:
+        size += PCG_STATE.size
+    if len(data) < pos + size:
+        raise ValueError("パーティクルの状態が途中で切れています")
+
+
+def restore_particles(pool, data, pos, flags):
+    n, lod = PARTICLE_HEADER.unpack_from(data, pos)
+    pos += PARTICLE_HEADER.size
+    if n > pool.capacity:
+        pool.count = 0
+        pool._allocate(n)
+    for name in PARTICLE_ARRAYS:
+        array = getattr(pool, name)
+        size = n * array.itemsize
+        array[:n] = np.frombuffer(data, dtype=array.dtype, count=n, offset=pos)
+        pos += size
+    pool.count = n
+    pool.lod = lod
+    if flags & FLAG_PARTICLE_RNG:
+        state, inc, has_uint32, uinteger = PCG_STATE.unpack_from(data, pos)
+        pos += PCG_STATE.size
+        pool.rng.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {"state": int.from_bytes(state, "little"),
+                      "inc": int.from_bytes(inc, "little")},
+            "has_uint32": has_uint32, "uinteger": uinteger,
+        }
+    return pos
+
+
+class SnapshotRing:
+    """直近のスナップショットを一定間隔で保持する（巻き戻し・やり直し用）"""
+    def __init__(self, capacity=300, interval=1, particles=False):
+        """
+        capacity: 保持する数（古いものから捨てる）
+        interval: 何フレームごとに保存するか
+        particles: パーティクルも保存するか
+        """
+        self.snapshots = deque(maxlen=capacity)  # (フレーム, バイナリ)
+        self.interval = interval
+        self.particles = particles
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def clear(self):
+        self.snapshots.clear()
+
+    def push(self, engine):
+        """interval ごとに現在の状態を保存"""
+        if engine.frame % self.interval == 0:
+            if self.snapshots and self.snapshots[-1][0] >= engine.frame:
+                self.truncate(engine.frame)
+            self.snapshots.append((engine.frame, save(engine, self.particles)))
+
+    def truncate(self, frame):
+        """frame 以降のスナップショットを捨てる（巻き戻した後の分岐用）"""
+        while self.snapshots and self.snapshots[-1][0] >= frame:
+            self.snapshots.pop()
+
+    def rewind(self, engine, frame):
+        """
+        frame 以前で一番新しいスナップショットに戻し、戻ったフレームを返す
+        （なければ何もせず None）
+        """
+        for saved_frame, data in reversed(self.snapshots):
+            if saved_frame <= frame:
+                restore(engine, data)
+                return saved_frame
+        return None
+
+    def resimulate(self, engine, frame, inputs):
+        """
+        frame から入力をやり直して、現在のフレームまで進め直す
+        inputs: フレーム番号（update() を呼ぶ前の engine.frame）-> (clicks, keys)
+        遅れて届いた入力を過去のフレームに差し込むときに使います
+        """
+        target = engine.frame
+        if self.rewind(engine, frame) is None:
+            return False
+        self.truncate(engine.frame + 1)
+        while engine.frame < target:
+            clicks, keys = inputs.get(engine.frame, ((), ()))
+            engine.update(clicks, keys)
+            self.push(engine)
+        return True
+
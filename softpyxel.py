@@ -0,0 +1,601 @@
+"""
+ソフトウェア描画の pyxel
+
+このゲームが使う pyxel の描画関数（cls / pset / line / rect / rectb / text / blt /
+camera と pyxel.Image）を NumPy の配列（パレット番号の 256x240 フレームバッファ）に
+描く代役です。画面のない環境でも HanafudaPon をそのまま動かして、
+1フレームごとの画面を取り出せます。
+pyxel.load() は my_resource.pyxres のイメージバンクを直接読み込みます。
+
+使い方:
+    python softpyxel.py golden --update        # 基準画像を golden/ に作る
+    python softpyxel.py golden                 # 基準画像と1ピクセル単位で比較
+    python softpyxel.py export play.hpr out/   # リプレイを PNG の連番に書き出す
+"""
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+import types
+import zipfile
+import zlib
+
+import numpy as np
+
+from resources import IMAGE_SIZE_PATTERN, RESOURCE_TOML
+
+DEFAULT_GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# pyxel の標準パレット
+DEFAULT_COLORS = [
+    0x000000, 0x2B335F, 0x7E2072, 0x19959C, 0x8B4852, 0x395C98, 0xA9C1FF, 0xEEEEEE,
+    0xD4186C, 0xD38441, 0xE9C35B, 0x70C6A9, 0x7696DE, 0xA3A3A3, 0xFF9798, 0xEDC7B0,
+]
+
+# pyxel の標準フォント（文字コード 32～127、1文字 4x6 ドット。上の行から4ビットずつ）
+FONT_WIDTH = 4
+FONT_HEIGHT = 6
+FONT_DATA = [
+    0x000000, 0x444040, 0xAA0000, 0xAEAEA0, 0x6C6C40, 0x824820, 0x4A4AC0, 0x440000,
+    0x244420, 0x844480, 0xA4E4A0, 0x04E400, 0x000480, 0x00E000, 0x000040, 0x224880,
+    0x6AAAC0, 0x4C4440, 0xC248E0, 0xC242C0, 0xAAE220, 0xE8C2C0, 0x68EAE0, 0xE24880,
+    0xEAEAE0, 0xEAE2C0, 0x040400, 0x040480, 0x248420, 0x0E0E00, 0x842480, 0xE24040,
+    0x4AA860, 0x4AEAA0, 0xCACAC0, 0x688860, 0xCAAAC0, 0xE8E8E0, 0xE8E880, 0x68EA60,
+    0xAAEAA0, 0xE444E0, 0x222A40, 0xAACAA0, 0x8888E0, 0xAEEAA0, 0xCAAAA0, 0x4AAA40,
+    0xCAC880, 0x4AAE60, 0xCAECA0, 0x6842C0, 0xE44440, 0xAAAA60, 0xAAAA40, 0xAAEEA0,
+    0xAA4AA0, 0xAA4440, 0xE248E0, 0x644460, 0x884220, 0xC444C0, 0x4A0000, 0x0000E0,
+    0x840000, 0x06AA60, 0x8CAAC0, 0x068860, 0x26AA60, 0x06AC60, 0x24E440, 0x06AE24,
+    0x8CAAA0, 0x404440, 0x2022A4, 0x8ACCA0, 0xC444E0, 0x0EEEA0, 0x0CAAA0, 0x04AA40,
+    0x0CAAC8, 0x06AA62, 0x068880, 0x06C6C0, 0x4E4460, 0x0AAA60, 0x0AAA40, 0x0AAEE0,
+    0x0A44A0, 0x0AA624, 0x0E24E0, 0x64C460, 0x444440, 0xC464C0, 0x6C0000, 0xEEEEE0,
+]
+
+
+def font_masks():
+    """FONT_DATA を文字ごとの 6x4 の真偽値の配列にする"""
+    bits = np.array(FONT_DATA, dtype=np.uint32)
+    shifts = np.arange(FONT_WIDTH * FONT_HEIGHT - 1, -1, -1, dtype=np.uint32)
+    masks = (bits[:, None] >> shifts) & 1
+    return masks.reshape(len(FONT_DATA), FONT_HEIGHT, FONT_WIDTH).astype(bool)
+
+
+FONT_MASKS = font_masks()
+
+
+def to_pixel(value):
+    """
+    座標をピクセル位置にする
+    pyxel と同じく float32 にしてから四捨五入します（0.5 は 0 から遠い方へ）
+    """
+    value = float(np.float32(value))
+    pixel = math.floor(abs(value) + 0.5)
+    return pixel if value >= 0 else -pixel
+
+
+def scale_samples(start, src, size, scale, left=None):
+    """
+    拡大・縮小した blt で、転送先のピクセルが使う転送元の位置
+    start・src は転送先・転送元の始点、size は大きさ（負なら反転）です
+    pyxel は行の中では画面に入る最初のピクセル（left）から float32 で 1/scale ずつ足していき、
+    行の位置は毎回掛け算で求めます。丸め誤差まで同じになるよう、同じ順に計算します
+    left を渡すと足していく方、渡さなければ掛け算の方になります
+    (転送先の始点, 転送元の位置の配列) を返します
+    """
+    f32 = np.float32
+    length = abs(size)
+    half = f32(length) / f32(2)
+    reach = (half + f32(0.5)) * f32(scale)
+    center = f32(start) + half
+    first = math.floor(center - reach)
+    last = math.ceil(center + reach)
+    if left is not None:
+        first = max(first, left)
+    if last < first:
+        return first, np.zeros(0, dtype=int)
+    step = f32(1) / f32(scale)
+    if size < 0:
+        step = -step
+    middle = f32(length - 1) / f32(2)
+    offsets = np.arange(first, last + 1, dtype=np.float32) - (f32(start) + middle)
+    if left is not None:
+        steps = np.full(len(offsets), step, dtype=np.float32)
+        steps[0] = f32(src) + middle + offsets[0] * step
+        # cumsum は先頭から順に float32 で足していく
+        positions = np.cumsum(steps, dtype=np.float32)
+    else:
+        positions = f32(src) + middle + offsets * step
+    positions = positions.astype(np.float64)
+    samples = np.floor(np.abs(positions) + 0.5) * np.sign(positions)
+    return first, samples.astype(int)
+
+
+def expand_image(rows, width, height):
+    """
+    .pyxres の画像データを配列にする
+    各行は末尾の同じ値が省略され、行も末尾の同じ行が省略されている
+    """
+    data = np.zeros((height, width), dtype=np.uint8)
+    for y, row in enumerate(rows[:height]):
+        row = row[:width]
+        data[y, :len(row)] = row
+        data[y, len(row):] = row[-1]
+    if rows and len(rows) < height:
+        data[len(rows):] = data[len(rows) - 1]
+    return data
+
+
+def load_pyxres(path):
+    """
+    .pyxres のイメージバンクを読み込んで、配列のリストを返す
+    TOML 全体は解析せず（数百 ms かかる）、画像データの行だけを JSON として読みます
+    """
+    with zipfile.ZipFile(path) as archive:
+        text = archive.read(RESOURCE_TOML).decode("utf-8")
+    banks = []
+    for section in text.split("[[images]]")[1:]:
+        match = IMAGE_SIZE_PATTERN.search(section)
+        if match is None:
+            raise ValueError(f"{path} のイメージバンク{len(banks)}の形式が正しくありません")
+        width, height = int(match.group(1)), int(match.group(2))
+        start = section.index("data = ") + len("data = ")
+        end = section.find("\n", start)
+        rows = json.loads(section[start:end if end >= 0 else None])
+        banks.append(expand_image(rows, width, height))
+    return banks
+
+
+class SoftImage:
+    """pyxel.Image の代役（data はパレット番号の配列）"""
+    def __init__(self, width, height, banks=None):
+        """banks: blt() にバンク番号を渡されたときに使う画像のリスト"""
+        self.width = width
+        self.height = height
+        self.data = np.zeros((height, width), dtype=np.uint8)
+        self.banks = banks
+        self.camera_x = 0
+        self.camera_y = 0
+
+    def camera(self, x=0, y=0):
+        self.camera_x = to_pixel(x)
+        self.camera_y = to_pixel(y)
+
+    def clip(self, x, y, w, h):
+        """描画範囲を画像の中に収めて (x0, y0, x1, y1) を返す（はみ出した分は描かない）"""
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.width, x + w)
+        y1 = min(self.height, y + h)
+        return x0, y0, x1, y1
+
+    def cls(self, col):
+        self.data[:] = col
+
+    def pset(self, x, y, col):
+        x = to_pixel(x) - self.camera_x
+        y = to_pixel(y) - self.camera_y
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.data[y, x] = col
+
+    def pget(self, x, y):
+        x = to_pixel(x)
+        y = to_pixel(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return int(self.data[y, x])
+        return 0
+
+    def rect(self, x, y, w, h, col):
+        x0, y0, x1, y1 = self.clip(to_pixel(x) - self.camera_x, to_pixel(y) - self.camera_y,
+                                   to_pixel(w), to_pixel(h))
+        if x0 < x1 and y0 < y1:
+            self.data[y0:y1, x0:x1] = col
+
+    def rectb(self, x, y, w, h, col):
+        x, y, w, h = to_pixel(x), to_pixel(y), to_pixel(w), to_pixel(h)
+        if w <= 0 or h <= 0:
+            return
+        self.rect(x, y, w, 1, col)
+        self.rect(x, y + h - 1, w, 1, col)
+        self.rect(x, y, 1, h, col)
+        self.rect(x + w - 1, y, 1, h, col)
+
+    def line(self, x1, y1, x2, y2, col):
+        """
+        pyxel と同じ線の引き方
+        端点を丸めてから、長い方の軸に1ピクセルずつ進め、短い方の軸は傾きを掛けて丸めます
+        """
+        x1, y1, x2, y2 = to_pixel(x1), to_pixel(y1), to_pixel(x2), to_pixel(y2)
+        if abs(x2 - x1) >= abs(y2 - y1):
+            if x1 > x2:
+                x1, y1, x2, y2 = x2, y2, x1, y1
+            length = x2 - x1
+            alpha = np.float32(y2 - y1) / np.float32(length) if length else np.float32(0)
+            for i in range(length + 1):
+                self.pset(x1 + i, y1 + to_pixel(alpha * np.float32(i)), col)
+        else:
+            if y1 > y2:
+                x1, y1, x2, y2 = x2, y2, x1, y1
+            length = y2 - y1
+            alpha = np.float32(x2 - x1) / np.float32(length)
+            for i in range(length + 1):
+                self.pset(x1 + to_pixel(alpha * np.float32(i)), y1 + i, col)
+
+    def paste(self, x, y, pixels, colkey=None):
+        """pixels を (x, y) に描く（colkey の色は透明）"""
+        h, w = pixels.shape
+        x0, y0, x1, y1 = self.clip(x, y, w, h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        src = pixels[y0 - y:y1 - y, x0 - x:x1 - x]
+        dst = self.data[y0:y1, x0:x1]
+        if colkey is None:
+            dst[:] = src
+        else:
+            np.copyto(dst, src, where=src != colkey)
+
+    def text(self, x, y, s, col, font=None):
+        x = to_pixel(x) - self.camera_x
+        y = to_pixel(y) - self.camera_y
+        left = x
+        for char in s:
+            if char == "\n":
+                x = left
+                y += FONT_HEIGHT
+                continue
+            code = ord(char) - 32
+            if 0 <= code < len(FONT_MASKS):
+                x0, y0, x1, y1 = self.clip(x, y, FONT_WIDTH, FONT_HEIGHT)
+                if x0 < x1 and y0 < y1:
+                    mask = FONT_MASKS[code][y0 - y:y1 - y, x0 - x:x1 - x]
+                    self.data[y0:y1, x0:x1][mask] = col
+            x += FONT_WIDTH
+
+    def blt(self, x, y, img, u, v, w, h, colkey=None, rotate=None, scale=None):
+        """rotate（回転）には対応していないので、0 以外を渡すと ValueError"""
+        if rotate:
+            raise ValueError(f"softpyxel の blt は回転に対応していません（rotate={rotate}）")
+        if isinstance(img, int):
+            img = self.banks[img]
+        x = to_pixel(x) - self.camera_x
+        y = to_pixel(y) - self.camera_y
+        u, v, w, h = to_pixel(u), to_pixel(v), to_pixel(w), to_pixel(h)
+
+        if scale is not None and scale != 1:
+            # 転送先の中心を基準に拡大・縮小（最近傍）
+            x, sx = scale_samples(x, u, w, scale, left=0)
+            y, sy = scale_samples(y, v, h, scale)
+            keep_x = (sx >= max(0, u)) & (sx < min(img.width, u + abs(w)))
+            keep_y = (sy >= max(0, v)) & (sy < min(img.height, v + abs(h)))
+            if not keep_x.any() or not keep_y.any():
+                return
+            # 位置は単調に並ぶので、転送元の範囲内に入るのは連続した一部分
+            pixels = img.data[np.ix_(sy[keep_y], sx[keep_x])]
+            x += int(np.argmax(keep_x))
+            y += int(np.argmax(keep_y))
+        else:
+            # 負の幅・高さは左右・上下反転
+            pixels = img.data[max(0, v):max(0, v + abs(h)), max(0, u):max(0, u + abs(w))]
+            if w < 0:
+                pixels = pixels[:, ::-1]
+            if h < 0:
+                pixels = pixels[::-1]
+            if pixels.size == 0:
+                return
+
+        self.paste(x, y, pixels, colkey)
+
+    def set(self, x, y, data):
+        """各行を色番号の16進数の文字列で描く"""
+        for row, line in enumerate(data):
+            values = np.array([int(c, 16) for c in line], dtype=np.uint8)
+            self.paste(x, y + row, values[None, :])
+
+
+class SoftPyxel(types.ModuleType):
+    """
+    pyxel モジュールの代役
+    描画は screen（SoftImage）に行い、入力は press() で与えます
+    """
+    def __init__(self):
+        super().__init__("pyxel")
+        self.width = 256
+        self.height = 240
+        self.images = []
+        self.images.extend(self.new_image(256, 256) for _ in range(3))
+        self.screen = self.new_image(self.width, self.height)
+        self.mouse_x = 0
+        self.mouse_y = 0
+        self.frame_count = 0
+        self.pressed = set()
+
+    def __getattr__(self, name):
+        # KEY_* や MOUSE_* などの定数は名前そのものを値にする
+        if name.isupper():
+            return name
+        raise AttributeError(name)
+
+    def new_image(self, width, height):
+        """画面・イメージバンク・pyxel.Image() の画像を作る（描き方を変えるときはここを差し替える）"""
+        return SoftImage(width, height, self.images)
+
+    def Image(self, width, height):
+        return self.new_image(width, height)
+
+    # システム
+    def init(self, width, height, **kwargs):
+        self.width = width
+        self.height = height
+        self.screen = self.new_image(width, height)
+
+    def run(self, update, draw):
+        pass
+
+    def load(self, filename, *args, **kwargs):
+        for image, data in zip(self.images, load_pyxres(filename)):
+            image.data = data[:image.height, :image.width].copy()
+
+    def quit(self):
+        pass
+
+    # 入力
+    def press(self, *keys, x=None, y=None):
+        """次のフレームで押されたことにするキーとマウス位置"""
+        self.pressed.update(keys)
+        if x is not None:
+            self.mouse_x = x
+            self.mouse_y = y
+
+    def btn(self, key):
+        return key in self.pressed
+
+    def btnp(self, key, hold=None, repeat=None):
+        return key in self.pressed
+
+    def btnr(self, key):
+        return False
+
+    def end_frame(self):
+        self.pressed.clear()
+        self.frame_count += 1
+
+    # 描画（画面への描画は screen に渡す）
+    def camera(self, x=0, y=0):
+        self.screen.camera(x, y)
+
+    def cls(self, col):
+        self.screen.cls(col)
+
+    def pset(self, x, y, col):
+        self.screen.pset(x, y, col)
+
+    def pget(self, x, y):
+        return self.screen.pget(x, y)
+
+    def line(self, x1, y1, x2, y2, col):
+        self.screen.line(x1, y1, x2, y2, col)
+
+    def rect(self, x, y, w, h, col):
+        self.screen.rect(x, y, w, h, col)
+
+    def rectb(self, x, y, w, h, col):
+        self.screen.rectb(x, y, w, h, col)
+
+    def text(self, x, y, s, col, font=None):
+        self.screen.text(x, y, s, col, font)
+
+    def blt(self, x, y, img, u, v, w, h, colkey=None, rotate=None, scale=None):
+        self.screen.blt(x, y, img, u, v, w, h, colkey, rotate, scale)
+
+    # サウンド（鳴らさない）
+    def play(self, ch, snd, **kwargs):
+        pass
+
+    def play_pos(self, ch):
+        return None
+
+
+def install(soft=None):
+    """pyxel を soft（省略時は SoftPyxel）に差し替える（hanafudaPon を import する前に呼ぶ）"""
+    if soft is None:
+        soft = SoftPyxel()
+    sys.modules["pyxel"] = soft
+    return soft
+
+
+def write_png(path, data, colors=DEFAULT_COLORS):
+    """パレット番号の配列をパレット形式の PNG に保存"""
+    height, width = data.shape
+
+    def chunk(kind, body):
+        return (struct.pack(">I", len(body)) + kind + body
+                + struct.pack(">I", zlib.crc32(kind + body)))
+
+    palette = b"".join(struct.pack(">I", color)[1:] for color in colors)
+    rows = np.zeros((height, width + 1), dtype=np.uint8)  # 各行の先頭はフィルタ 0
+    rows[:, 1:] = data
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)))
+        f.write(chunk(b"PLTE", palette))
+        f.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def read_png(path):
+    """write_png() で保存した PNG をパレット番号の配列に戻す"""
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 8
+    idat = bytearray()
+    width = height = 0
+    while pos < len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b"IHDR":
+            width, height, depth, color_type = struct.unpack_from(">IIBB", body)
+            if depth != 8 or color_type != 3:
+                raise ValueError(f"{path} は write_png() の形式ではありません")
+        elif kind == b"IDAT":
+            idat += body
+        pos += 12 + length
+    rows = np.frombuffer(zlib.decompress(bytes(idat)), dtype=np.uint8).reshape(height, width + 1)
+    if rows[:, 0].any():
+        raise ValueError(f"{path} は write_png() の形式ではありません")
+    return rows[:, 1:].copy()
+
+
+def make_app(soft, adaptive_lod=False, **options):
+    """
+    SoftPyxel で HanafudaPon を作る（毎フレームちょうど1ステップ進める）
+    adaptive_lod: True なら処理時間に応じてパーティクルの数を減らす（実際のゲームと同じ）
+    """
+    from hanafudaPon import HanafudaPon
+
+    app = HanafudaPon(**options)
+    app.resources.wait()  # 画像の確認を待って、画像表示で描く
+    # 実時間ではなくフレーム数で時計を進める
+    app.clock.time_func = lambda: soft.frame_count * app.clock.step
+    if not adaptive_lod:
+        # 処理時間でパーティクルの数が変わらないようにする
+        app.particle_lod.target_ms = float("inf")
+    return app
+
+
+def step_frame(soft, app):
+    app.update()
+    app.draw()
+    soft.end_frame()
+
+
+# 基準画像のシーン: setup(app, soft) で準備し、返した step(i) を毎フレーム前に呼ぶ
+# (HanafudaPon の設定, フレーム数, setup)
+
+def scene_title(app, soft):
+    """タイトル画面のアニメーション"""
+    def step(i):
+        pass
+    return step
+
+
+def scene_playing(app, soft):
+    """自動プレイでしばらく遊んだ盤面（花札・選択・パーティクル・HUD）"""
+    def step(i):
+        if i == 0:
+            soft.press(soft.KEY_RETURN)
+    return step
+
+
+def scene_game_over(app, soft):
+    """盤面が埋まった直後のゲームオーバー画面"""
+    engine = app.engine
+
+    def step(i):
+        if i == 0:
+            engine.start_game()
+            for cell in list(engine.board.free):
+                engine.place_card(cell, cell % engine.rules.num_cards)
+    return step
+
+
+SCENES = {
+    "title": ({"seed": 1}, 45, scene_title),
+    "playing": ({"seed": 1, "autoplay": True}, 900, scene_playing),
+    "game_over": ({"seed": 1}, 10, scene_game_over),
+}
+
+
+def render_scene(soft, name):
+    """シーンを最後のフレームまで描いて、画面の配列と1フレームの平均時間（ms）を返す"""
+    options, frames, setup = SCENES[name]
+    soft.frame_count = 0
+    app = make_app(soft, **options)
+    step = setup(app, soft)
+    start = time.perf_counter()
+    for i in range(frames):
+        step(i)
+        step_frame(soft, app)
+    elapsed = time.perf_counter() - start
+    return soft.screen.data.copy(), elapsed * 1000 / frames
+
+
+def run_golden(soft, names, directory, update):
+    """
+    基準画像と比較（update なら作り直す）。一致しなかったシーン名を返す
+    基準画像がないシーンも一致しなかったものとして扱う（--update で作る）
+    """
+    os.makedirs(directory, exist_ok=True)
+    failed = []
+    for name in names:
+        frame, frame_ms = render_scene(soft, name)
+        path = os.path.join(directory, f"{name}.png")
+        if update:
+            write_png(path, frame)
+            print(f"{name}: {path} に保存しました ({frame_ms:.2f}ms/フレーム)")
+            continue
+        if not os.path.exists(path):
+            print(f"{name}: 基準画像 {path} がありません（--update で作ります）")
+            failed.append(name)
+            continue
+        expected = read_png(path)
+        if expected.shape == frame.shape and (expected == frame).all():
+            print(f"{name}: 一致 ({frame_ms:.2f}ms/フレーム)")
+            continue
+        actual_path = os.path.join(directory, f"{name}.actual.png")
+        write_png(actual_path, frame)
+        if expected.shape == frame.shape:
+            detail = f"{int((expected != frame).sum())} ピクセルが違います"
+        else:
+            detail = f"大きさが違います {expected.shape} -> {frame.shape}"
+        print(f"{name}: {detail}（{actual_path} に保存しました）")
+        failed.append(name)
+    return failed
+
+
+def export_replay(soft, path, directory, every=1, speed=1):
+    """リプレイを画面に再生して every フレームごとに PNG で書き出す"""
+    from replay import Recording
+
+    recording = Recording.load(path)
+    os.makedirs(directory, exist_ok=True)
+    app = make_app(soft, replay=recording, speed=speed)
+    count = 0
+    start = time.perf_counter()
+    while not app.player.finished(app.engine):
+        step_frame(soft, app)
+        if (soft.frame_count - 1) % every == 0:
+            write_png(os.path.join(directory, f"frame_{soft.frame_count - 1:06d}.png"),
+                      soft.screen.data)
+            count += 1
+    elapsed = time.perf_counter() - start
+    print(f"{count} 枚を {directory} に書き出しました "
+          f"({soft.frame_count} フレーム、{soft.frame_count / elapsed:.0f} フレーム/秒)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="花札ポンの画面なし描画（基準画像の比較・リプレイの書き出し）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    golden = commands.add_parser("golden", help="基準画像と1ピクセル単位で比較する")
+    golden.add_argument("--scene", choices=sorted(SCENES), action="append",
+                        help="比較するシーン（複数指定可、省略時はすべて）")
+    golden.add_argument("--dir", default=DEFAULT_GOLDEN_DIR, help="基準画像のディレクトリ")
+    golden.add_argument("--update", action="store_true", help="基準画像を作り直す")
+
+    export = commands.add_parser("export", help="リプレイを PNG の連番に書き出す")
+    export.add_argument("replay", help="リプレイファイル")
+    export.add_argument("output", help="書き出すディレクトリ")
+    export.add_argument("--every", type=int, default=1, help="何フレームごとに書き出すか")
+    export.add_argument("--speed", type=int, default=1, help="1フレームで進めるステップ数")
+    args = parser.parse_args()
+
+    soft = install()
+    if args.command == "golden":
+        failed = run_golden(soft, args.scene or list(SCENES), args.dir, args.update)
+        sys.exit(1 if failed else 0)
+    export_replay(soft, args.replay, args.output, args.every, args.speed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+盤面から消せる役を探すソルバーと自動プレイ
+
+48種類のカードをビット位置（カード ID）に対応させ、盤面にある枚数ごとに
+「1枚以上」「2枚以上」「3枚以上」のビットマスクを作ります。
+役になる組み合わせも同じ形のマスクにしておくと、盤面で揃っているかは
+ビット演算3回で判定できます。
+
+MatchIndex は盤面に花札が置かれる・消えるたびに、役ごとの「足りない枚数」を
+更新しておく索引です。消せる役の数と一番得点の高い役を、盤面を調べずに
+すぐに答えられます。
+"""
+import weakref
+from itertools import permutations
+
+
+# ボーナスタイム1フレームあたりの価値（点）の目安
+BONUS_FRAME_VALUE = 1.0
+
+
+class Combo:
+    """役になるカードの組み合わせ"""
+    __slots__ = ("key", "score", "name", "special", "mask1", "mask2", "mask3")
+
+    def __init__(self, key, score, name, special):
+        self.key = key
+        self.score = score
+        self.name = name
+        self.special = special
+        # 必要枚数ごとのマスク（同じカードを2枚・3枚使う役にも対応）
+        self.mask1 = self.mask2 = self.mask3 = 0
+        for card in set(key):
+            count = key.count(card)
+            bit = 1 << card
+            self.mask1 |= bit
+            if count >= 2:
+                self.mask2 |= bit
+            if count >= 3:
+                self.mask3 |= bit
+
+
+def board_masks(cards):
+    """カード ID の並びから (1枚以上, 2枚以上, 3枚以上) のマスクを作る"""
+    mask1 = mask2 = mask3 = 0
+    for card in cards:
+        bit = 1 << card
+        if mask2 & bit:
+            mask3 |= bit
+        elif mask1 & bit:
+            mask2 |= bit
+        else:
+            mask1 |= bit
+    return mask1, mask2, mask3
+
+
+def sorted_combos(rules, names=None):
+    """役になる組み合わせを得点の高い順に並べたリスト"""
+    return sorted(
+        (Combo(key, score, name, special)
+         for key, (score, name, special) in rules.table.items()
+         if names is None or name in names),
+        key=lambda combo: -combo.score,
+    )
+
+
+# ルールごとの MatchIndex の共有データ（RuleSet -> (combos, required, users)）
+_index_tables = weakref.WeakKeyDictionary()
+
+
+def index_tables(rules):
+    """MatchIndex が使う、ゲームごとに変わらない表（ルールごとに1度だけ作る）"""
+    tables = _index_tables.get(rules)
+    if tables is None:
+        combos = sorted_combos(rules)  # 番号が小さいほど得点が高い
+        required = bytes(len(combo.key) for combo in combos)
+
+        # users[カード ID][n] = そのカードを n 枚以上使う役の番号
+        max_copies = max(required, default=0)
+        users = [[[] for _ in range(max_copies + 1)] for _ in range(rules.num_cards)]
+        for i, combo in enumerate(combos):
+            for card in set(combo.key):
+                for n in range(1, combo.key.count(card) + 1):
+                    users[card][n].append(i)
+        tables = _index_tables[rules] = (combos, required, users)
+    return tables
+
+
+class MatchIndex:
+    """盤面で揃っている役の索引（花札の出入りごとに差分で更新）"""
+    def __init__(self, rules):
+        self.num_cards = rules.num_cards
+        self.combos, self.required, self.users = index_tables(rules)
+        self.clear()
+
+    def clear(self):
+        self.card_counts = [0] * self.num_cards  # カード ID ごとの枚数
+        self.missing = bytearray(self.required)  # 役ごとの足りない枚数
+        self.available = 0  # 揃っている役のビットマスク（ビット位置 = 役の番号）
+
+    def add(self, card):
+        """盤面に花札が置かれた"""
+        count = self.card_counts[card] + 1
+        self.card_counts[card] = count
+        users = self.users[card]
+        if count < len(users):
+            missing = self.missing
+            for i in users[count]:
+                missing[i] -= 1
+                if missing[i] == 0:
+                    self.available |= 1 << i
+
+    def remove(self, card):
+        """盤面から花札が消えた"""
+        count = self.card_counts[card]
+        self.card_counts[card] = count - 1
+        users = self.users[card]
+        if count < len(users):
+            missing = self.missing
+            for i in users[count]:
+                if missing[i] == 0:
+                    self.available &= ~(1 << i)
+                missing[i] += 1
+
+    @property
+    def count(self):
+        """消せる役の数"""
+        return self.available.bit_count()
+
+    def best(self):
+        """一番得点の高い消せる役（なければ None）"""
+        available = self.available
+        if not available:
+            return None
+        return self.combos[(available & -available).bit_length() - 1]
+
+    def available_combos(self):
+        """消せる役を得点の高い順に返す"""
+        available = self.available
+        while available:
+            low = available & -available
+            yield self.combos[low.bit_length() - 1]
+            available ^= low
+
+
+class Solver:
+    def __init__(self, rules, names=None):
+        """
+        names: 狙う役名の集合（None ならすべて）
+        """
+        self.rules = rules
+        self.names = names
+        # 得点の高い順に並べておく
+        self.combos = sorted_combos(rules, names)
+
+    def clearable(self, masks):
+        """盤面のマスクで揃っている役をすべて返す"""
+        mask1, mask2, mask3 = masks
+        return [combo for combo in self.combos
+                if not (combo.mask1 & ~mask1 or combo.mask2 & ~mask2 or combo.mask3 & ~mask3)]
+
+    def move_value(self, combo, engine):
+        """役を消したときの価値（倍率とボーナスタイムの発動を考慮）"""
+        value = combo.score * engine.bonus_multiplier
+        rules = self.rules
+        if combo.score >= rules.bonus_min_score:
+            # ボーナスタイムの残りが少ないほど、発動・延長の価値が高い
+            value += (rules.bonus_frames - engine.bonus_timer) * BONUS_FRAME_VALUE
+        return value
+
+    def moves(self, engine):
+        """消せる役を (価値, Combo) の価値の高い順で返す"""
+        if self.names is None:
+            # 全部の役が対象なら、エンジンの索引に揃っている役がある
+            combos = engine.matches.available_combos()
+        else:
+            combos = self.clearable(board_masks(engine.board.card_ids()))
+        moves = [(self.move_value(combo, engine), combo) for combo in combos]
+        moves.sort(key=lambda move: -move[0])
+        return moves
+
+    def best_move(self, engine):
+        """最も価値の高い役と、クリックするマスの順番を返す（なければ None）"""
+        if self.names is None:
+            # 倍率とボーナスタイムの価値は得点について単調なので、得点最大の役が最善
+            combo = engine.matches.best()
+        else:
+            moves = self.moves(engine)
+            combo = moves[0][1] if moves else None
+        if combo is None:
+            return None
+        return combo, self.click_order(combo, engine)
+
+    def click_order(self, combo, engine):
+        """
+        役のカードがあるマスを、クリックする順に並べる
+        選択中のカードを先頭に使い、3枚役の途中の2枚で別の役が
+        成立してしまわない順番にします
+        """
+        board = engine.board
+        needed = list(combo.key)
+        fixed = []
+        for cell in engine.selected_cells:
+            card = board.cells[cell]
+            if card in needed:
+                needed.remove(card)
+                fixed.append((card, cell))
+
+        cells_by_card = {}
+        for cell in board:
+            if not board.is_selected(cell):
+                cells_by_card.setdefault(board.cells[cell], []).append(cell)
+        rest = [(card, cells_by_card[card].pop()) for card in needed]
+
+        order = fixed + rest
+        if len(order) == 3 and len(fixed) < 2:
+            evaluate = self.rules.evaluate
+            for perm in permutations(rest):
+                candidate = fixed + list(perm)
+                if evaluate([candidate[0][0], candidate[1][0]])[0] == 0:
+                    order = candidate
+                    break
+        return [cell for _, cell in order]
+
+
+class AutoPlayer:
+    """ソルバーを使って盤面をクリックする自動プレイヤー"""
+    def __init__(self, solver, click_interval=6):
+        """
+        click_interval: クリックの間隔（フレーム数）。0 なら1フレームでまとめてクリック
+        """
+        self.solver = solver
+        self.click_interval = click_interval
+        self.plan = []  # これからクリックする (マス, カード ID)
+        self.wait = 0
+        self.idle_version = None  # 消せる役がなかったときの Board.version
+
+    def reset(self):
+        self.plan = []
+        self.wait = 0
+        self.idle_version = None
+
+    def idle(self, engine):
+        """盤面が変わるまでクリックしない状態か"""
+        return not self.plan and self.wait == 0 and engine.board.version == self.idle_version
+
+    def next_clicks(self, engine):
+        """このフレームでクリックする位置のリスト"""
+        if engine.game_state != "playing":
+            self.reset()
+            return []
+        if self.wait > 0:
+            self.wait -= 1
+            return []
+
+        board = engine.board
+        # 計画したマスのカードが変わっていたら作り直す
+        if any(board.cells[cell] != card for cell, card in self.plan):
+            self.plan = []
+
+        if not self.plan:
+            # 前回から盤面が変わっていなければ探し直さない
+            if board.version == self.idle_version:
+                return []
+            clicks = self.make_plan(engine)
+            if clicks:
+                return clicks
+            if not self.plan:
+                self.idle_version = board.version
+
+        clicks = []
+        while self.plan:
+            cell, _ = self.plan.pop(0)
+            clicks.append(self.cell_center(engine, cell))
+            if self.click_interval > 0:
+                self.wait = self.click_interval - 1
+                break
+        return clicks
+
+    def make_plan(self, engine):
+        """
+        次に消す役を決める
+        計画にない選択中のカードがあれば、その選択解除のクリックを返す
+        """
+        best = self.solver.best_move(engine)
+        if best is None:
+            return []
+        _, cells = best
+
+        # 計画に含まれない選択中のカードは選択解除する
+        deselect = [cell for cell in engine.selected_cells if cell not in cells]
+        if deselect:
+            return [self.cell_center(engine, cell) for cell in deselect]
+
+        board = engine.board
+        self.plan = [(cell, board.cells[cell]) for cell in cells
+                     if not board.is_selected(cell)]
+        return []
+
+    def cell_center(self, engine, cell):
+        x, y = engine.board.cell_position(cell)
+        return x + engine.card_width // 2, y + engine.card_height // 2
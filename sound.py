@@ -0,0 +1,95 @@
+"""
+効果音のスケジューラー
+
+GameEngine が出したサウンドの要求（サウンド番号, 優先度）をフレームごとにまとめて、
+再生するチャンネルを決めます。
+- 同じフレームに同じサウンドが何度要求されても1回だけ鳴らす
+- 同じサウンドは min_interval フレーム以内に鳴らし直さない（連続で消したときの連打を防ぐ）
+- 空いているチャンネルを使い、空きがなければ優先度の低いサウンドを止めて鳴らす
+  （ゲームオーバー > 特殊役 > 通常の役。優先度の高いものは止めない）
+pyxel には依存しないので、画面なしでも使えます。
+"""
+
+# サウンドの優先度（大きいほど優先）
+SOUND_PRIORITY_CLEAR = 1
+SOUND_PRIORITY_SPECIAL = 2
+SOUND_PRIORITY_GAME_OVER = 3
+
+
+class SoundScheduler:
+    def __init__(self, channels=(0, 1, 2), min_interval=3, is_playing=None, duration=15):
+        """
+        channels: 効果音に使うチャンネル（空いているものを先頭から使う）
+        min_interval: 同じサウンドを鳴らし直すまでの最短フレーム数
+        is_playing: is_playing(channel) でチャンネルが再生中か返す関数
+                    （None なら鳴らしてから duration フレームは再生中とみなす）
+        """
+        self.channels = channels
+        self.min_interval = min_interval
+        self.is_playing = is_playing
+        self.duration = duration
+        self.channel_priority = {}  # チャンネル -> 再生中のサウンドの優先度
+        self.busy_until = {}  # チャンネル -> 再生が終わるフレーム（is_playing がないとき）
+        self.last_played = {}  # サウンド番号 -> 最後に鳴らしたフレーム
+        self.played = 0  # 鳴らした数の累計
+        self.merged = 0  # 同じフレームの重複・連打としてまとめた数の累計
+        self.dropped = 0  # チャンネルが空かずに鳴らせなかった数の累計
+
+    def reset(self):
+        """
+        再生中・連打の記録を忘れる
+        巻き戻しや再開でフレームが戻ったときに呼ぶ（戻る前のフレームで判定しないため）
+        """
+        self.channel_priority.clear()
+        self.busy_until.clear()
+        self.last_played.clear()
+
+    def channel_busy(self, channel, frame):
+        if channel not in self.channel_priority:
+            return False
+        if self.is_playing is not None:
+            return self.is_playing(channel)
+        return frame < self.busy_until[channel]
+
+    def schedule(self, frame, requests):
+        """
+        このフレームの要求 (サウンド番号, 優先度) から、鳴らす (チャンネル, サウンド番号) を返す
+        frame: GameEngine.frame（連打の判定に使う）
+        """
+        if not requests:
+            return []
+
+        # 同じサウンドは一番高い優先度の1回にまとめる
+        wanted = {}
+        for sound, priority in requests:
+            if priority > wanted.get(sound, -1):
+                wanted[sound] = priority
+        self.merged += len(requests) - len(wanted)
+
+        plays = []
+        for sound, priority in sorted(wanted.items(), key=lambda item: -item[1]):
+            last = self.last_played.get(sound)
+            if last is not None and frame - last < self.min_interval:
+                self.merged += 1
+                continue
+            channel = self.choose_channel(frame, priority)
+            if channel is None:
+                self.dropped += 1
+                continue
+            self.channel_priority[channel] = priority
+            self.busy_until[channel] = frame + self.duration
+            self.last_played[sound] = frame
+            plays.append((channel, sound))
+        self.played += len(plays)
+        return plays
+
+    def choose_channel(self, frame, priority):
+        """空いているチャンネル、なければ priority より低いサウンドを鳴らしているチャンネル"""
+        lowest = None
+        for channel in self.channels:
+            if not self.channel_busy(channel, frame):
+                return channel
+            current = self.channel_priority[channel]
+            if current < priority and (lowest is None or current < self.channel_priority[lowest]):
+                lowest = channel
+        return lowest
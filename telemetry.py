@@ -0,0 +1,98 @@
+"""
+プレイデータの記録（テレメトリー）
+
+ゲーム中のイベント（花札の出現・選択・役の成立・選択のリセット・
+ゲームオーバーなど）をメモリ上のバッファに積むだけにして、
+ファイルへの書き出しはバックグラウンドのスレッドがまとめて行います。
+ゲームのフレーム処理はファイル I/O もロックも待ちません。
+書き出しが追いつかずバッファがあふれたときは古いイベントから捨てて数えます。
+
+出力は1行1イベントの JSON Lines です。
+1行目はセッションの情報、以降は {"e": イベント名, "f": フレーム, ...} です。
+"""
+import json
+import threading
+import time
+from collections import deque
+
+# イベント名 -> 値の名前（GameEngine.log() に渡す値の順番）
+EVENT_FIELDS = {
+    "start": ("spawn_interval", "max_cards"),
+    "spawn": ("cell", "card", "interval"),
+    "select": ("cell", "card"),
+    "deselect": ("cell", "card"),
+    "clear": ("yaku", "score", "multiplier", "cards"),
+    "reset": ("cards",),
+    "game_over": ("score", "cards", "dead_board"),
+    "restart": ("score",),
+}
+
+
+class Telemetry:
+    def __init__(self, path, session=None, capacity=8192, flush_interval=1.0):
+        """
+        path: 書き出す JSON Lines ファイル（追記）
+        session: 1行目に書くセッションの情報（シードなど）
+        capacity: 書き出し待ちにできるイベント数
+        flush_interval: 書き出しの間隔（秒）
+        """
+        self.path = path
+        self.buffer = deque(maxlen=capacity)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.dropped = 0  # バッファがあふれて捨てたイベントの累計
+        self.written = 0  # 書き出したイベントの累計
+        self.error = None  # 書き出しに失敗したときの例外
+
+        self.file = open(path, "a", encoding="utf-8")
+        header = {"e": "session", "time": time.time()}
+        header.update(session or {})
+        self.file.write(json.dumps(header, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+        self.wake = threading.Event()
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def log(self, event, frame, values):
+        """イベントを積む（フレーム処理から呼ぶ。I/O もロックもしない）"""
+        buffer = self.buffer
+        if len(buffer) == self.capacity:
+            self.dropped += 1
+        buffer.append((event, frame, values))
+
+    def run(self):
+        """バックグラウンドで一定間隔ごとにまとめて書き出す"""
+        while not self.stopping:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.write_pending()
+        self.write_pending()
+
+    def write_pending(self):
+        buffer = self.buffer
+        lines = []
+        while buffer:
+            event, frame, values = buffer.popleft()
+            record = {"e": event, "f": frame}
+            record.update(zip(EVENT_FIELDS[event], values))
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        if not lines or self.error is not None:
+            return
+        try:
+            self.file.write("\n".join(lines) + "\n")
+            self.file.flush()
+        except OSError as e:
+            # 書けなくなったらそれ以降は捨てる（ゲームは止めない）
+            self.error = e
+        else:
+            self.written += len(lines)
+
+    def close(self):
+        """残りを書き出してスレッドを止める"""
+        if self.stopping:
+            return
+        self.stopping = True
+        self.wake.set()
+        self.thread.join()
+        self.file.close()
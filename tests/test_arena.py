@@ -0,0 +1,130 @@
+"""アリーナのセッションが、毎ティック進めた GameEngine と同じ結果になるか"""
+import asyncio
+import json
+import random
+
+from arena import Arena
+from engine import KEY_SPACE, GameEngine
+
+
+class Client:
+    """送られてきた変化分から盤面を組み立てる（クライアント側の再現）"""
+    def __init__(self):
+        self.lines = []
+        self.info = None
+        self.cells = {}
+        self.state = {}
+
+    def send(self, line):
+        self.lines.append(line)
+        message = json.loads(line)
+        if "id" in message:
+            self.info = message
+            return
+        for cell, card in message.get("cells", ()):
+            self.cells[cell] = card
+        for name in ("sel", "state", "score", "bonus", "combo"):
+            if name in message:
+                self.state[name] = message[name]
+
+
+def expected_view(engine):
+    return {
+        "sel": engine.selected_cells,
+        "state": engine.game_state,
+        "score": engine.score,
+        "bonus": engine.bonus_multiplier,
+        "combo": engine.combo_message if engine.combo_timer > 0 else "",
+    }
+
+
+def test_lazy_sessions_match_engines_stepped_every_tick():
+    arena = Arena(seed=1)
+    rng = random.Random(2)
+    players = []
+    for _ in range(20):
+        client = Client()
+        session = arena.open_session(client.send)
+        reference = GameEngine(seed=session.engine.seed, effects=False, rules=arena.rules)
+        players.append((session, reference, client))
+
+    for tick in range(1, 3001):
+        for session, reference, client in players:
+            clicks, keys = [], []
+            if rng.random() < 0.05:
+                if reference.game_state != "playing":
+                    arena.receive(session, "key space")
+                    keys.append(KEY_SPACE)
+                elif reference.board:
+                    x, y = reference.board.cell_position(rng.choice(list(reference.board)))
+                    arena.receive(session, f"click {x + 1} {y + 1}")
+                    clicks.append((x + 1, y + 1))
+            reference.update(clicks, keys)
+        arena.run_tick()
+
+        # 送られた変化分だけで、クライアントは毎ティック最新の状態になっている
+        for session, reference, client in players:
+            assert client.state == expected_view(reference), (tick, session.id)
+            cells = reference.board.cells
+            assert all(client.cells[i] == cells[i] for i in range(len(cells)))
+
+        if tick % 500 == 0:
+            for session, reference, _ in players:
+                session.catch_up(arena.tick)
+                assert session.engine.state_digest() == reference.state_digest()
+
+    assert any(reference.score for _, reference, _ in players)
+
+
+def test_diff_sends_only_changes():
+    arena = Arena(seed=3)
+    client = Client()
+    session = arena.open_session(client.send)
+    assert client.info["cols"] == session.engine.board.cols
+    assert len(client.cells) == len(session.engine.board.cells)
+    assert session.diff() is None  # 変化がなければ何も送らない
+
+    arena.receive(session, "key space")
+    arena.run_tick()
+    message = json.loads(client.lines[-1])
+    assert message["state"] == "playing" and message["t"] == 1
+    assert "cells" not in message  # 盤面はまだ空のまま
+
+    sent = len(client.lines)
+    arena.run_tick()
+    assert len(client.lines) == sent  # イベントのないティックは送らない
+
+
+class FakeWriter:
+    class Transport:
+        def get_write_buffer_size(self):
+            return 0
+
+        def abort(self):
+            pass
+
+    def __init__(self):
+        self.transport = self.Transport()
+        self.data = []
+        self.closed = False
+
+    def write(self, data):
+        self.data.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+def test_overlong_line_closes_session():
+    async def run():
+        arena = Arena(seed=4)
+        reader = asyncio.StreamReader(limit=64)
+        reader.feed_data(b"click " + b"1" * 200 + b"\n")
+        reader.feed_eof()
+        writer = FakeWriter()
+        await arena.handle_client(reader, writer)
+        return arena, writer
+
+    arena, writer = asyncio.run(run())
+    assert writer.closed
+    assert not arena.sessions
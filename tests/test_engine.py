@@ -0,0 +1,19 @@
+"""GameEngine の盤面の設定"""
+import pytest
+
+from engine import GameEngine
+
+
+@pytest.mark.parametrize("cols, rows", [(10, 3), (4, 4), (1, 1)])
+def test_small_board_ends_when_full(cols, rows):
+    engine = GameEngine(seed=1, effects=False, cols=cols, rows=rows)
+    assert engine.max_cards == cols * rows
+    engine.start_game()
+    engine.advance(20000)
+    assert engine.game_state == "game_over"
+    assert len(engine.board) == cols * rows
+
+
+def test_decks_must_be_positive():
+    with pytest.raises(ValueError):
+        GameEngine(seed=1, decks=0)
@@ -0,0 +1,13 @@
+"""画面の描画が基準画像（golden/）と1ピクセル単位で一致するか"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_screens_match_golden_images():
+    # softpyxel は pyxel モジュールを差し替えるので、別のプロセスで動かす
+    result = subprocess.run([sys.executable, "softpyxel.py", "golden"], cwd=ROOT,
+                            capture_output=True, text=True, encoding="utf-8")
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,44 @@
+"""ボットのプレイを記録して、再生した結果が記録と一致するか"""
+import pytest
+
+from balance import POLICIES, make_policy
+from engine import KEY_RETURN, GameEngine
+from replay import Recorder, Recording, verify
+
+
+def play_recorded(seed, policy_name, frames, effects=True, **board):
+    """ボットに frames フレーム遊ばせて（ゲームオーバーならやり直して）記録を返す"""
+    engine = GameEngine(seed=seed, effects=effects, **board)
+    policy = make_policy(policy_name, engine.rules, seed, 3)
+    recorder = Recorder(seed, engine)
+    for _ in range(frames):
+        clicks = policy.next_clicks(engine)
+        keys = [KEY_RETURN] if engine.game_state != "playing" else []
+        recorder.record(engine.frame, clicks, keys)
+        engine.update(clicks, keys)
+    return recorder.finish(engine), engine
+
+
+@pytest.mark.parametrize("policy_name", POLICIES)
+def test_bot_games_replay_exactly(policy_name):
+    for seed in range(10):
+        recording, engine = play_recorded(seed, policy_name, 2000)
+        loaded = Recording.from_bytes(recording.to_bytes())
+        ok, replayed = verify(loaded)
+        assert ok, (policy_name, seed)
+        assert replayed.frame == engine.frame
+        assert replayed.yaku_counts == engine.yaku_counts
+
+
+def test_effects_do_not_change_the_game():
+    with_effects, _ = play_recorded(7, "greedy", 2000, effects=True)
+    without_effects, _ = play_recorded(7, "greedy", 2000, effects=False)
+    assert with_effects.digest == without_effects.digest
+    assert with_effects.events == without_effects.events
+
+
+def test_large_board_replays_exactly():
+    recording, _ = play_recorded(3, "greedy", 2000, cols=12, rows=8, decks=2, max_cards=96)
+    loaded = Recording.from_bytes(recording.to_bytes())
+    assert (loaded.cols, loaded.rows, loaded.decks, loaded.max_cards) == (12, 8, 2, 96)
+    assert verify(loaded)[0]
@@ -0,0 +1,69 @@
+"""rules.json からコンパイルした判定テーブルが、元の判定処理と一致するか"""
+from itertools import combinations_with_replacement
+
+from rules import CARDS_PER_MONTH, RuleSet, load_rules, read_rules_data
+
+# 元の判定処理（rules.json 導入前のゲームにあった定義）
+LEGACY_LIGHT_CARDS = [("松", 0), ("桜", 0), ("芒", 0), ("桐", 0)]
+LEGACY_COMBINATIONS = {
+    "Inoshikacho": {"cards": [("萩", 0), ("紅", 0), ("牡", 0)], "score": 2000},
+    "Hanami": {"cards": [("桜", 0), ("菊", 0)], "score": 500, "requires_only": 2},
+    "Tsukimi": {"cards": [("芒", 0), ("菊", 0)], "score": 500, "requires_only": 2},
+}
+
+
+def legacy_evaluate(rules, selected):
+    """選択した (月, カード番号) のリストを元の処理で判定して (得点, 役名, 特殊役か) を返す"""
+    info = [(month, num, rules.card_types[month][num]) for month, num in selected]
+    if len(selected) == 3:
+        if all((month, num) in LEGACY_LIGHT_CARDS for month, num, _ in info):
+            return 1000, "Sanko", True
+        if all(card_type == "Aotan" for _, _, card_type in info):
+            return 800, "Aotan", True
+        if all(card_type == "Akatan" for _, _, card_type in info):
+            return 800, "Akatan", True
+    for name, combo in LEGACY_COMBINATIONS.items():
+        if len(selected) != combo.get("requires_only", 3):
+            continue
+        required = list(combo["cards"])
+        for month, num, _ in info:
+            if (month, num) not in required:
+                break
+            required.remove((month, num))
+        else:
+            if not required:
+                return combo["score"], name, True
+    if len(selected) == 3 and all(month == selected[0][0] for month, _ in selected):
+        return 100, "", False
+    return 0, "", False
+
+
+def test_table_matches_legacy_evaluator():
+    rules = load_rules()
+    checked = 0
+    for count in (2, 3):
+        for key in combinations_with_replacement(range(rules.num_cards), count):
+            selected = [(rules.months[card // CARDS_PER_MONTH], card % CARDS_PER_MONTH)
+                        for card in key]
+            assert rules.evaluate(key) == legacy_evaluate(rules, selected), selected
+            checked += 1
+    assert checked == 20776
+
+
+def test_evaluate_ignores_selection_order():
+    rules = load_rules()
+    hanami = [rules.to_id(("菊", 0)), rules.to_id(("桜", 0))]
+    assert rules.evaluate(hanami) == rules.evaluate(hanami[::-1]) == (500, "Hanami", True)
+
+
+def test_special_flag_is_explicit():
+    data = read_rules_data()
+    for yaku in data["yaku"]:
+        if yaku["match"] == "same_month":
+            yaku["name"] = "Tsuki"  # 名前を付けても特殊役にはならない
+        else:
+            del yaku["special"]  # 省略したら名前のある役は特殊役
+    rules = RuleSet(data)
+    month = [rules.to_id(("松", num)) for num in range(3)]
+    assert rules.evaluate(month) == (100, "Tsuki", False)
+    assert rules.evaluate([rules.to_id(("桜", 0)), rules.to_id(("菊", 0))])[2] is True
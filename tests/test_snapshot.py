@@ -0,0 +1,91 @@
+"""スナップショットの保存・復元"""
+import pytest
+
+from balance import make_policy, play_game
+from engine import KEY_RETURN, GameEngine
+from snapshot import FLAG_GAUSS, GAUSS, HEADER, RNG_STATE, YAKU_COUNT, SnapshotRing, restore, save
+
+
+def played_engine(seed=3):
+    engine = GameEngine(seed=seed)
+    play_game(engine, make_policy("greedy", engine.rules, seed, 3), 1500)
+    if engine.game_state != "playing":
+        engine.start_game()
+        engine.advance(900)
+    return engine
+
+
+@pytest.mark.parametrize("particles", [False, True])
+def test_restore_continues_identically(particles):
+    engine = played_engine()
+    data = save(engine, particles)
+    expected = played_engine()
+    expected.advance(600)
+
+    engine.advance(300)  # 進めてから戻す
+    restore(engine, data)
+    engine.advance(600)
+    assert engine.state_digest() == expected.state_digest()
+
+
+@pytest.mark.parametrize("particles", [False, True])
+def test_truncated_data_is_rejected_without_changes(particles):
+    engine = played_engine()
+    data = save(engine, particles)
+    state = save(engine, True)
+    for size in range(len(data)):
+        with pytest.raises(ValueError):
+            restore(engine, data[:size])
+        assert save(engine, True) == state
+
+
+def test_bad_indices_are_rejected():
+    engine = played_engine()
+    assert engine.yaku_counts
+    data = save(engine)
+    state = save(engine, True)
+    cells = HEADER.size
+    yaku = len(data) - RNG_STATE.size - len(engine.yaku_counts) * YAKU_COUNT.size
+    if data[5] & FLAG_GAUSS:
+        yaku -= GAUSS.size
+    corruptions = {
+        6: 9,  # ゲームの状態
+        cells + next(iter(engine.board)): 200,  # 存在しないカード
+        yaku: 99,  # 役の番号
+    }
+    for offset, value in corruptions.items():
+        broken = bytearray(data)
+        broken[offset] = value
+        with pytest.raises(ValueError):
+            restore(engine, bytes(broken))
+        assert save(engine, True) == state
+
+
+@pytest.mark.parametrize("interval", [1, 3])
+def test_resimulate_inserts_late_input(interval):
+    # 入力が間に合ったときの結果
+    on_time = GameEngine(seed=5)
+    on_time.update(keys=[KEY_RETURN])
+    on_time.advance(400)
+    late_frame = on_time.frame
+    cell = next(iter(on_time.board))
+    x, y = on_time.board.cell_position(cell)
+    click = [(x + 1, y + 1)]
+    on_time.update(clicks=click)
+    assert on_time.board.is_selected(cell)
+    for _ in range(60):
+        on_time.update()
+
+    # 入力が届かないまま進めてから、届いた入力を過去のフレームに差し込んでやり直す
+    late = GameEngine(seed=5)
+    ring = SnapshotRing(capacity=100, interval=interval, particles=True)
+    late.update(keys=[KEY_RETURN])
+    ring.push(late)
+    while late.frame < on_time.frame:
+        late.update()
+        ring.push(late)
+    assert late.state_digest() != on_time.state_digest()
+
+    assert ring.resimulate(late, late_frame, {late_frame: (click, [])})
+    assert late.frame == on_time.frame
+    assert late.state_digest() == on_time.state_digest()
@@ -0,0 +1,95 @@
+"""softpyxel の描画が本物の pyxel.Image と1ピクセル単位で一致するか"""
+import random
+
+import numpy as np
+import pytest
+
+from softpyxel import SoftImage
+
+pyxel = pytest.importorskip("pyxel")
+
+WIDTH = 48
+HEIGHT = 40
+SCALES = [None, 1, 0.3, 1 / 3, 0.5, 0.6, 0.75, 1.25, 1.5, 2, 2.5, 3]
+
+
+def pixels(image):
+    """pyxel.Image の中身を配列にする（pyxel.init() なしで使える）"""
+    return np.frombuffer(image.data_ptr(), dtype=np.uint8).reshape(image.height, image.width)
+
+
+def coord(rng, low, high):
+    """整数・ちょうど .5・半端な小数の座標を混ぜて返す"""
+    return rng.choice([rng.randint(low, high), rng.randint(low, high) + 0.5,
+                       round(rng.uniform(low, high), 2)])
+
+
+def image_pair(rng):
+    """同じ絵の pyxel.Image と SoftImage（blt の転送元）"""
+    rows = ["".join("%x" % rng.randrange(16) for _ in range(16)) for _ in range(12)]
+    image = pyxel.Image(16, 12)
+    image.set(0, 0, rows)
+    soft = SoftImage(16, 12)
+    soft.set(0, 0, rows)
+    return image, soft
+
+
+def draw(kind, rng, image, soft):
+    """kind の描画をランダムな引数で両方に行う"""
+    if rng.random() < 0.3:
+        camera = (coord(rng, -3, 3), coord(rng, -3, 3))
+        image.camera(*camera)
+        soft.camera(*camera)
+    col = rng.randrange(1, 16)
+    if kind == "pset":
+        args = [(coord(rng, -2, WIDTH), coord(rng, -2, HEIGHT), col)] * 2
+    elif kind in ("rect", "rectb"):
+        args = [(coord(rng, -8, WIDTH), coord(rng, -8, HEIGHT),
+                 coord(rng, -3, 20), coord(rng, -3, 20), col)] * 2
+    elif kind == "line":
+        args = [(coord(rng, -8, WIDTH + 8), coord(rng, -8, HEIGHT + 8),
+                 coord(rng, -8, WIDTH + 8), coord(rng, -8, HEIGHT + 8), col)] * 2
+    elif kind == "text":
+        args = [(coord(rng, -8, WIDTH), coord(rng, -8, HEIGHT), "Ab9!\nxy", col)] * 2
+    else:
+        source, soft_source = image_pair(rng)
+        x, y = coord(rng, -10, WIDTH), coord(rng, -10, HEIGHT)
+        u, v = rng.randint(0, 4), rng.randint(0, 2)
+        w = rng.randint(1, 12) * rng.choice([1, -1])
+        h = rng.randint(1, 10) * rng.choice([1, -1])
+        colkey = rng.choice([None, rng.randrange(16)])
+        scale = rng.choice(SCALES + [round(rng.uniform(0.2, 3), 3)])
+        args = [(x, y, img, u, v, w, h, colkey, None, scale) for img in (source, soft_source)]
+    getattr(image, kind)(*args[0])
+    getattr(soft, kind)(*args[1])
+
+
+@pytest.mark.parametrize("kind", ["pset", "rect", "rectb", "line", "text", "blt"])
+def test_matches_pyxel(kind):
+    for seed in range(300):
+        rng = random.Random(seed)
+        image = pyxel.Image(WIDTH, HEIGHT)
+        soft = SoftImage(WIDTH, HEIGHT)
+        draw(kind, rng, image, soft)
+        assert np.array_equal(pixels(image), soft.data), f"{kind} seed={seed}"
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_scaled_blt_matches_pyxel(scale):
+    # 丸めの境目に当たりやすい偶数の幅や、はみ出す位置も含めて調べる
+    rng = random.Random(7)
+    source, soft_source = image_pair(rng)
+    for x in (-6, -0.5, 3, 10.4, 10.5, 40.5):
+        for w in (2, 5, 6, 8, -6, -8):
+            image = pyxel.Image(WIDTH, HEIGHT)
+            soft = SoftImage(WIDTH, HEIGHT)
+            image.blt(x, 10.5, source, 1, 2, w, 8, None, None, scale)
+            soft.blt(x, 10.5, soft_source, 1, 2, w, 8, None, None, scale)
+            assert np.array_equal(pixels(image), soft.data), f"x={x} w={w}"
+
+
+def test_blt_rejects_rotate():
+    soft = SoftImage(8, 8)
+    with pytest.raises(ValueError):
+        soft.blt(0, 0, SoftImage(4, 4), 0, 0, 4, 4, None, 90)
+    soft.blt(0, 0, SoftImage(4, 4), 0, 0, 4, 4, None, 0)
@@ -0,0 +1,38 @@
+"""MatchIndex の差分更新が、盤面を毎回調べ直した結果と一致するか"""
+import random
+
+from rules import load_rules
+from solver import MatchIndex, Solver, board_masks
+
+
+def test_index_matches_full_scan():
+    rules = load_rules()
+    solver = Solver(rules)
+    index = MatchIndex(rules)
+    rng = random.Random(0)
+    board = []
+    for _ in range(20000):
+        # 盤面が 0～40 枚の間を行き来するように置く・消す（同じカードが複数枚になることもある）
+        if board and (len(board) >= 40 or rng.random() < 0.45):
+            card = board.pop(rng.randrange(len(board)))
+            index.remove(card)
+        else:
+            card = rng.randrange(rules.num_cards)
+            board.append(card)
+            index.add(card)
+
+        expected = [combo.key for combo in solver.clearable(board_masks(board))]
+        assert [combo.key for combo in index.available_combos()] == expected
+        assert index.count == len(expected)
+        best = index.best()
+        assert (best.key if best is not None else None) == (expected[0] if expected else None)
+
+
+def test_clear_resets_index():
+    rules = load_rules()
+    index = MatchIndex(rules)
+    for card in range(rules.num_cards):
+        index.add(card)
+    assert index.count > 0
+    index.clear()
+    assert index.count == 0 and index.best() is None
@@ -0,0 +1,18 @@
+"""効果音のスケジューラー"""
+from sound import SOUND_PRIORITY_CLEAR, SOUND_PRIORITY_GAME_OVER, SoundScheduler
+
+
+def test_repeats_are_merged():
+    scheduler = SoundScheduler()
+    clear = (2, SOUND_PRIORITY_CLEAR)
+    assert scheduler.schedule(100, [clear, clear]) == [(0, 2)]
+    assert scheduler.schedule(101, [clear]) == []
+    assert scheduler.merged == 2
+
+
+def test_reset_after_frame_moves_back():
+    scheduler = SoundScheduler()
+    assert scheduler.schedule(1000, [(2, SOUND_PRIORITY_CLEAR)]) == [(0, 2)]
+    scheduler.reset()  # 巻き戻しで 1000 フレームより前に戻った
+    assert scheduler.schedule(910, [(2, SOUND_PRIORITY_CLEAR)]) == [(0, 2)]
+    assert scheduler.schedule(950, [(0, SOUND_PRIORITY_GAME_OVER)]) == [(0, 0)]